@@ -19,6 +19,62 @@ MONGO_PASSWORD = os.getenv("MONGO_PASSWORD", "")
 MONGO_URL = os.getenv("MONGO_URL", "localhost")
 MONGO_PORT = os.getenv("MONGO_PORT", "27017")
 TRADENOTE_DATABASE = os.getenv("TRADENOTE_DATABASE", "tradenote")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+
+# In-process cache of prepared price frames (set either to 0 to disable)
+FRAME_CACHE_MAX_ENTRIES = int(os.getenv("FRAME_CACHE_MAX_ENTRIES", "128"))
+FRAME_CACHE_MAX_MB = int(os.getenv("FRAME_CACHE_MAX_MB", "256"))
+
+# Correlation indexes kept in memory for neighbour/cluster queries, and their lifetime
+CORRELATION_INDEX_MAX_ENTRIES = int(os.getenv("CORRELATION_INDEX_MAX_ENTRIES", "8"))
+CORRELATION_INDEX_TTL_SECONDS = int(os.getenv("CORRELATION_INDEX_TTL_SECONDS", "3600"))
+
+# Correlation series: most values (days x matrix cells or pairs) streamed per request
+CORRELATION_SERIES_MAX_CELLS = int(os.getenv("CORRELATION_SERIES_MAX_CELLS", "5000000"))
+
+# Persist backtest results in market.backtest_results and serve repeat runs from it
+BACKTEST_STORE_ENABLED = os.getenv("BACKTEST_STORE_ENABLED", "true").lower() == "true"
+
+# Upper bound on backtests per optimizer request (tickers x parameter combinations x exit pairs, x 2 per walk-forward window)
+BACKTEST_OPTIMIZER_MAX_EVALUATIONS = int(os.getenv("BACKTEST_OPTIMIZER_MAX_EVALUATIONS", "50000"))
+
+# Incremental yfinance sync: days re-fetched before the watermark to pick up revisions,
+# and how long a ticker is considered fresh after a check
+SYNC_OVERLAP_DAYS = int(os.getenv("SYNC_OVERLAP_DAYS", "5"))
+SYNC_MIN_INTERVAL_MINUTES = int(os.getenv("SYNC_MIN_INTERVAL_MINUTES", "30"))
+
+# Bulk yfinance sync: tickers per yf.download call, concurrent downloads,
+# retries on rate limiting and the default lookback when no start date is given
+BULK_SYNC_CHUNK_SIZE = int(os.getenv("BULK_SYNC_CHUNK_SIZE", "50"))
+BULK_SYNC_MAX_WORKERS = int(os.getenv("BULK_SYNC_MAX_WORKERS", "4"))
+BULK_SYNC_MAX_RETRIES = int(os.getenv("BULK_SYNC_MAX_RETRIES", "5"))
+BULK_SYNC_DEFAULT_DAYS = int(os.getenv("BULK_SYNC_DEFAULT_DAYS", "10"))
+
+# Executors for blocking analysis work: thread pool size, process pool size
+# (0 keeps CPU work on threads), default per-endpoint concurrency and
+# per-endpoint overrides such as "hurst=2,price-distribution=2"
+ANALYSIS_THREAD_WORKERS = int(os.getenv("ANALYSIS_THREAD_WORKERS", "16"))
+ANALYSIS_PROCESS_WORKERS = int(os.getenv("ANALYSIS_PROCESS_WORKERS", "0"))
+ANALYSIS_MAX_CONCURRENCY = int(os.getenv("ANALYSIS_MAX_CONCURRENCY", "4"))
+ANALYSIS_ENDPOINT_LIMITS = os.getenv("ANALYSIS_ENDPOINT_LIMITS", "")
+
+# Volatility suite: most rolling windows per request
+VOLATILITY_MAX_WINDOWS = int(os.getenv("VOLATILITY_MAX_WINDOWS", "10"))
+
+# Next-day stats grid: most thresholds and horizons per request, and the longest horizon in days
+NEXT_DAY_GRID_MAX_THRESHOLDS = int(os.getenv("NEXT_DAY_GRID_MAX_THRESHOLDS", "20"))
+NEXT_DAY_GRID_MAX_HORIZONS = int(os.getenv("NEXT_DAY_GRID_MAX_HORIZONS", "20"))
+NEXT_DAY_GRID_MAX_HORIZON_DAYS = int(os.getenv("NEXT_DAY_GRID_MAX_HORIZON_DAYS", "252"))
+
+# Price distribution: most Monte Carlo simulations, longest horizon in days, most
+# simulated path steps (simulations x horizon days) and most touch levels and bootstrap
+# horizons per request
+PRICE_DISTRIBUTION_MAX_SIMULATIONS = int(os.getenv("PRICE_DISTRIBUTION_MAX_SIMULATIONS", "100000"))
+PRICE_DISTRIBUTION_MAX_HORIZON_DAYS = int(os.getenv("PRICE_DISTRIBUTION_MAX_HORIZON_DAYS", "1260"))
+PRICE_DISTRIBUTION_MAX_PATH_STEPS = int(os.getenv("PRICE_DISTRIBUTION_MAX_PATH_STEPS", "10000000"))
+PRICE_DISTRIBUTION_MAX_TOUCH_LEVELS = int(os.getenv("PRICE_DISTRIBUTION_MAX_TOUCH_LEVELS", "50"))
+PRICE_DISTRIBUTION_MAX_HORIZONS = int(os.getenv("PRICE_DISTRIBUTION_MAX_HORIZONS", "20"))
 
 # Stripe configuration
 STRIPE_SK = os.getenv("STRIPE_SK", "")
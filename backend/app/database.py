@@ -1,6 +1,6 @@
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure
-from .config import MONGO_URI, TRADENOTE_DATABASE
+from .config import MONGO_URI, TRADENOTE_DATABASE, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE
 import logging
 import os
 
@@ -23,7 +23,12 @@ try:
         client = MongoClient()  # This will be mocked by pytest
         db = client[TRADENOTE_DATABASE]
     else:
-        client = MongoClient(MONGO_URI)
+        # Single pooled client shared by the whole application
+        client = MongoClient(
+            MONGO_URI,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE
+        )
         # Force a command to check the connection
         client.admin.command('ping')
         logger.info(" -> Connected to MongoDB successfully")
@@ -78,6 +78,13 @@ app.include_router(stock_analysis_router, prefix="/api")  # Include stock analys
 # Add backend/api routes that redirect to /api routes for frontend compatibility
 app.include_router(api_router, prefix="/backend/api")
 
+# Release the analysis thread/process pools when the server stops
+from .services.executor import shutdown_executors
+
+@app.on_event("shutdown")
+def shutdown_analysis_executors():
+    shutdown_executors()
+
 # Debug endpoint to list all routes
 @app.get("/debug/routes")
 async def debug_routes():
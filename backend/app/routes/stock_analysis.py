@@ -1,23 +1,38 @@
-from fastapi import APIRouter, HTTPException, Query, Body, Depends
+from fastapi import APIRouter, HTTPException, Query, Body, Depends, Header
+from fastapi.responses import StreamingResponse
 from typing import Optional, List, Dict, Any, Tuple, Union
+import asyncio
+import itertools
 import pandas as pd
 import numpy as np
 import logging
 from datetime import datetime, timedelta
 from ..database import db
-from ..stock_analysis_tools import consecutive_analysis, hurst_exponent, volatility, next_day_stats, probability_distribution
-from ..stock_analysis_tools.data_utils import read_and_prepare_data
+from ..config import (
+    ANALYSIS_PROCESS_WORKERS, BACKTEST_OPTIMIZER_MAX_EVALUATIONS, VOLATILITY_MAX_WINDOWS, CORRELATION_SERIES_MAX_CELLS,
+    NEXT_DAY_GRID_MAX_THRESHOLDS, NEXT_DAY_GRID_MAX_HORIZONS, NEXT_DAY_GRID_MAX_HORIZON_DAYS,
+    PRICE_DISTRIBUTION_MAX_SIMULATIONS, PRICE_DISTRIBUTION_MAX_HORIZON_DAYS, PRICE_DISTRIBUTION_MAX_PATH_STEPS,
+    PRICE_DISTRIBUTION_MAX_TOUCH_LEVELS, PRICE_DISTRIBUTION_MAX_HORIZONS
+)
+from ..stock_analysis_tools import consecutive_analysis, hurst_exponent, volatility, next_day_stats, probability_distribution, backtest, backtest_optimizer, kde
+from ..stock_analysis_tools.data_utils import read_and_prepare_data, load_price_frame, load_price_columns, load_price_panels
+from ..stock_analysis_tools.frame_cache import prepared_frame_cache
 from ..services.yfinance_sync import YFinanceSync
+from ..services import bulk_sync
+from ..services.executor import run_blocking, run_cpu, limit_concurrency, limit_stream, get_process_pool
+from ..services.packed_columns import negotiate_format, negotiate_compression, packed_response
 import re
 import traceback
 import json
-import random
 import yfinance as yf  # Make sure we import yfinance directly
 import requests  # Add requests for Finnhub API calls
 from ..services.ibkr_connection import FINNHUB_API_KEY  # Import Finnhub API key
 from ..auth import get_current_user
 from pydantic import BaseModel
 from ..stock_analysis_tools.correlation_coefficient import compute_correlation_matrix
+from ..stock_analysis_tools import correlation_coefficient
+from ..stock_analysis_tools.correlation_index import correlation_index_cache
+from ..stock_analysis_tools.backtest_store import backtest_result_store
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -47,6 +62,24 @@ async def get_mongodb_data(
     """
     Utility function to get data from MongoDB as a fallback.
     
+    The pymongo calls run on the analysis thread pool so the event loop stays free.
+    See fetch_mongodb_data for the parameters and return value.
+    """
+    return await run_blocking(
+        fetch_mongodb_data, ticker, start_date, end_date, sort_direction, limit, most_recent_only
+    )
+
+def fetch_mongodb_data(
+    ticker: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    sort_direction: int = 1,
+    limit: Optional[int] = None,
+    most_recent_only: bool = False
+) -> Tuple[Union[pd.DataFrame, dict, None], str]:
+    """
+    Blocking implementation of get_mongodb_data.
+    
     Parameters:
         ticker: Stock ticker symbol
         start_date: Optional start date in format YYYY-MM-DD
@@ -125,19 +158,17 @@ async def get_mongodb_data(
             
             return result, "Successfully fetched current price from MongoDB"
         else:
-            # For historical data, get multiple data points
-            cursor = market_db["prices"].find(query).sort("date", sort_direction)
-            
-            if limit:
-                cursor = cursor.limit(limit)
-                
-            price_data = list(cursor)
+            # For historical data, load only the OHLCV columns
+            df = load_price_frame(
+                ticker, start_date, end_date,
+                sort_direction=sort_direction, limit=limit
+            )
             
-            if not price_data:
+            if df.empty:
                 return None, f"No price data found for ticker: {ticker}"
                 
-            # Convert to pandas DataFrame for easier analysis
-            df = pd.DataFrame(price_data)
+            # Callers expect the date as a regular column
+            df = df.reset_index()
             
             logger.info(f"Found {len(df)} records for ticker: {ticker}")
             return df, "Successfully fetched historical data from MongoDB"
@@ -146,13 +177,27 @@ async def get_mongodb_data(
         logger.error(f"Error fetching data from MongoDB: {str(e)}")
         return None, f"Error fetching data from MongoDB: {str(e)}"
 
+def negotiate_wire_format(format, compression, accept, accept_encoding):
+    """(format, compression) of a price series response; compression only applies to packed bodies."""
+    try:
+        wire_format = negotiate_format(format, accept)
+        if wire_format != "packed":
+            return wire_format, None
+        return wire_format, negotiate_compression(compression, accept_encoding)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/ticker-data/{ticker}")
 async def get_ticker_data(
     ticker: str,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     limit: int = Query(5000000, ge=1, le=5000000),
-    skip: int = Query(0, ge=0)
+    skip: int = Query(0, ge=0),
+    format: Optional[str] = None,
+    compression: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
 ):
     """
     Get price data for a ticker from MongoDB.
@@ -163,12 +208,28 @@ async def get_ticker_data(
         end_date: Optional end date in format YYYY-MM-DD
         limit: Maximum number of results to return
         skip: Number of results to skip
+        format: "json" (default) or "packed"; Accept: application/x-price-columns also selects packed
+        compression: Packed only; "gzip", "zstd" or "none" (defaults to Accept-Encoding)
     
     Returns:
-        Price data for the ticker
+        Price data for the ticker; packed bodies hold only the date and OHLCV columns
     """
     try:
         logger.info(f"Fetching price data for ticker: {ticker}")
+        wire_format, wire_compression = negotiate_wire_format(format, compression, accept, accept_encoding)
+        
+        if wire_format == "packed":
+            try:
+                columns = await run_blocking(
+                    load_price_columns, ticker.upper(), start_date, end_date, limit=limit, skip=skip
+                )
+            except ValueError as date_error:
+                raise HTTPException(status_code=400, detail=str(date_error))
+            ticker_columns = columns.get(ticker.upper())
+            if ticker_columns is None:
+                raise HTTPException(status_code=404, detail=f"No data found for {ticker}")
+            logger.info(f"Streaming {len(ticker_columns['date'])} packed records for ticker: {ticker}")
+            return packed_response(ticker_columns, {"ticker": ticker.upper(), "source": "mongodb"}, wire_compression)
         
         # Build MongoDB query
         query = {"ticker": ticker.upper()}
@@ -195,8 +256,8 @@ async def get_ticker_data(
         market_db = db.client["market"]
         cursor = market_db["prices"].find(query).sort("date", 1).skip(skip).limit(limit)
         
-        # Convert to list and process
-        price_data = list(cursor)
+        # Convert to list and process (iterating the cursor blocks on MongoDB)
+        price_data = await run_blocking(list, cursor)
         
         if not price_data:
             logger.warning(f"No price data found for ticker: {ticker}")
@@ -212,6 +273,8 @@ async def get_ticker_data(
         logger.info(f"Found {len(price_data)} records for ticker: {ticker}")
         return {"data": price_data}
         
+    except HTTPException:
+        raise  # Re-raise HTTP exceptions
     except Exception as e:
         logger.error(f"Error fetching ticker data: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching data: {str(e)}")
@@ -235,7 +298,7 @@ async def get_available_tickers(
         market_db = db.client["market"]
         
         # Get distinct ticker values
-        all_tickers = market_db["prices"].distinct("ticker", {})
+        all_tickers = await run_blocking(market_db["prices"].distinct, "ticker", {})
         total_tickers = len(all_tickers)
         
         # Sort tickers alphabetically
@@ -282,7 +345,7 @@ async def search_tickers(
     """
     try:
         market_db = db.client["market"]
-        all_tickers = market_db["prices"].distinct("ticker", {})
+        all_tickers = await run_blocking(market_db["prices"].distinct, "ticker", {})
         
         # Convert query to uppercase for case-insensitive matching
         search_query = query.upper()
@@ -319,12 +382,39 @@ async def search_tickers(
         logger.error(f"Error searching tickers: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error searching tickers: {str(e)}")
 
+async def packed_dataframe_response(ticker, start_date, end_date, auto_sync, compression):
+    """Packed /dataframe response: MongoDB columns, falling back to yfinance like the JSON response."""
+    ticker = ticker.upper()
+    try:
+        columns = await run_blocking(load_price_columns, ticker, start_date, end_date)
+    except ValueError as date_error:
+        raise HTTPException(status_code=400, detail=str(date_error))
+    
+    if ticker in columns:
+        return packed_response(columns[ticker], {"ticker": ticker, "source": "mongodb"}, compression)
+    
+    if auto_sync:
+        yf_df = await YFinanceSync.get_yfinance_data(ticker, start_date, end_date)
+        if not yf_df.empty:
+            logger.info(f"Found data in yfinance for {ticker}, updating MongoDB")
+            await YFinanceSync.update_mongodb(ticker, yf_df)
+            yf_columns = {"date": pd.to_datetime(yf_df["date"]).to_numpy()}
+            for field in ("open", "high", "low", "close", "volume"):
+                yf_columns[field] = yf_df[field].to_numpy()
+            return packed_response(yf_columns, {"ticker": ticker, "source": "yfinance"}, compression)
+    
+    raise HTTPException(status_code=404, detail=f"No data found for {ticker}")
+
 @router.get("/dataframe/{ticker}")
 async def get_ticker_dataframe(
     ticker: str,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    auto_sync: bool = True
+    auto_sync: bool = True,
+    format: Optional[str] = None,
+    compression: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
 ):
     """
     Get price data for a ticker as pandas DataFrame format (in JSON).
@@ -335,12 +425,15 @@ async def get_ticker_dataframe(
         start_date: Optional start date in format YYYY-MM-DD
         end_date: Optional end date in format YYYY-MM-DD
         auto_sync: If True, automatically sync with yfinance if data is available
+        format: "json" (default) or "packed"; Accept: application/x-price-columns also selects packed
+        compression: Packed only; "gzip", "zstd" or "none" (defaults to Accept-Encoding)
     
     Returns:
         Price data in a format suitable for pandas DataFrame conversion
     """
     try:
         logger.info(f"Getting dataframe for ticker {ticker} with auto_sync={auto_sync}")
+        wire_format, wire_compression = negotiate_wire_format(format, compression, accept, accept_encoding)
         
         # If auto_sync is enabled, try to sync with yfinance first
         if auto_sync:
@@ -354,8 +447,11 @@ async def get_ticker_dataframe(
                 logger.warning(f"Error during auto-sync for {ticker}: {str(sync_error)}")
                 # Continue with MongoDB data if sync fails
         
+        if wire_format == "packed":
+            return await packed_dataframe_response(ticker, start_date, end_date, auto_sync, wire_compression)
+        
         # Use the existing endpoint to get the data from MongoDB
-        response = await get_ticker_data(ticker, start_date, end_date, 5000000, 0)
+        response = await get_ticker_data(ticker, start_date, end_date, 5000000, 0, format="json")
         
         if not response.get("data"):
             logger.warning(f"No data found in MongoDB for {ticker}, trying yfinance directly")
@@ -413,11 +509,14 @@ async def get_ticker_dataframe(
             "source": "mongodb"
         }
         
+    except HTTPException:
+        raise  # Re-raise HTTP exceptions
     except Exception as e:
         logger.error(f"Error creating dataframe: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error creating dataframe: {str(e)}")
 
 @router.get("/consecutive/{ticker}")
+@limit_concurrency("consecutive")
 async def get_consecutive_analysis(
     ticker: str,
     direction: str = "down",
@@ -536,7 +635,9 @@ async def get_consecutive_analysis(
                         mongodb_df["date"] = [f"Day {i+1}" for i in range(len(mongodb_df))]
                     
                     # Run analysis directly on the MongoDB data
-                    consecutive_moves = consecutive_analysis.analyze_consecutive_patterns(mongodb_df, min_days, max_days)
+                    consecutive_moves = await run_cpu(
+                        consecutive_analysis.analyze_consecutive_patterns, mongodb_df, min_days, max_days
+                    )
                     
                     # If we found patterns, calculate probabilities and return
                     if consecutive_moves and len(consecutive_moves) > 0:
@@ -572,7 +673,8 @@ async def get_consecutive_analysis(
         # If direct MongoDB approach didn't work, try the standard flow
         try:
             logger.info(f"Using standard analysis flow for {ticker}")
-            df, consecutive_moves, probabilities = consecutive_analysis.analyze_consecutive_moves(
+            df, consecutive_moves, probabilities = await run_blocking(
+                consecutive_analysis.analyze_consecutive_moves,
                 ticker, direction, min_days, max_days, start_date, end_date, visualize=False
             )
             
@@ -652,7 +754,68 @@ async def get_consecutive_analysis(
             "error": f"An unexpected error occurred: {str(e)}"
         }
 
+@router.get("/consecutive-scan")
+@limit_concurrency("consecutive-scan")
+async def scan_consecutive_moves(
+    direction: str = "down",
+    streak_days: Optional[int] = Query(None, ge=1),
+    min_days: int = Query(2, ge=1),
+    max_days: int = Query(10, ge=1),
+    tickers: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    min_occurrences: int = Query(5, ge=1),
+    limit: int = Query(100, ge=1, le=5000)
+):
+    """
+    Find tickers currently on a consecutive up/down streak and rank them by the
+    historical probability that such a streak continues.
+    
+    Uses the data already in MongoDB (no yfinance sync) so the whole universe
+    can be scanned in one request.
+    
+    Parameters:
+        direction: "up" for price increases, "down" for price drops
+        streak_days: Only include tickers whose current streak has exactly this length
+        min_days: Shortest current streak to include
+        max_days: Longest streak length with its own statistics
+        tickers: Optional comma-separated watchlist (default: all tickers)
+        start_date: Optional start date in format YYYY-MM-DD
+        end_date: Optional end date in format YYYY-MM-DD
+        min_occurrences: Minimum historical streaks for a ticker to be ranked
+        limit: Maximum number of ranked tickers to return
+    
+    Returns:
+        Ranked list of streaking tickers with continuation probabilities
+    """
+    if direction.lower() not in ["up", "down"]:
+        raise HTTPException(status_code=400, detail="Direction must be either 'up' or 'down'")
+    if min_days > max_days:
+        raise HTTPException(status_code=400, detail="min_days must not be greater than max_days")
+    
+    watchlist = None
+    if tickers:
+        watchlist = [t.strip().upper() for t in tickers.split(",") if t.strip()]
+    
+    try:
+        logger.info(f"Scanning consecutive {direction} streaks for "
+                    f"{len(watchlist) if watchlist else 'all'} tickers")
+        scan = await run_blocking(
+            consecutive_analysis.scan_consecutive_moves,
+            watchlist, direction, min_days, max_days, streak_days,
+            start_date, end_date, min_occurrences
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Error scanning consecutive moves: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error scanning consecutive moves: {str(e)}")
+    
+    scan["results"] = scan["results"][:limit]
+    return replace_nan_with_none(scan)
+
 @router.get("/hurst/{ticker}")
+@limit_concurrency("hurst")
 async def get_hurst_exponent(
     ticker: str,
     window_size: int = 252,
@@ -695,8 +858,9 @@ async def get_hurst_exponent(
         
         # Call the analysis function without visualization
         try:
-            df, hurst = hurst_exponent.analyze_hurst_exponent(
-                ticker, window_size, step, start_date, end_date, visualize=False
+            df, hurst, hurst_ci = await run_blocking(
+                hurst_exponent.analyze_hurst_exponent,
+                ticker, window_size, step, start_date, end_date, visualize=False, return_ci=True
             )
         except ValueError as ve:
             # Check for specific error about insufficient data points
@@ -715,8 +879,10 @@ async def get_hurst_exponent(
                             adjusted_window = min(available - 10, 126)  # Don't go larger than 126
                             adjusted_step = min(step, adjusted_window // 4)  # Adjust step size proportionally
                             
-                            df, hurst = hurst_exponent.analyze_hurst_exponent(
-                                ticker, adjusted_window, adjusted_step, start_date, end_date, visualize=False
+                            df, hurst, hurst_ci = await run_blocking(
+                                hurst_exponent.analyze_hurst_exponent,
+                                ticker, adjusted_window, adjusted_step, start_date, end_date, visualize=False,
+                                return_ci=True
                             )
                             
                             # If we get here, the retry worked
@@ -743,7 +909,7 @@ async def get_hurst_exponent(
                                     clean_prices = mongodb_df["close"].dropna().values
                                     
                                     if len(clean_prices) >= min_window:
-                                        hurst = hurst_exponent.calculate_hurst_exponent(clean_prices)
+                                        hurst, hurst_ci = await run_cpu(hurst_exponent.calculate_hurst_exponent, clean_prices, return_ci=True)
                                         logger.info(f"Successfully calculated direct Hurst: {hurst}")
                                         df = mongodb_df
                                     else:
@@ -774,7 +940,7 @@ async def get_hurst_exponent(
                                 
                                 min_window = max(10, len(clean_prices) // 2)
                                 if len(clean_prices) >= 20:  # Absolute minimum for meaningful calculation
-                                    hurst = hurst_exponent.calculate_hurst_exponent(clean_prices)
+                                    hurst, hurst_ci = await run_cpu(hurst_exponent.calculate_hurst_exponent, clean_prices, return_ci=True)
                                     logger.info(f"Successfully calculated direct Hurst: {hurst}")
                                     df = mongodb_df
                                 else:
@@ -804,18 +970,13 @@ async def get_hurst_exponent(
         
         # Calculate rolling Hurst values for chart
         try:
-            # Check if we have log_returns
-            if 'log_returns' in df.columns and not df['log_returns'].isna().all():
-                logger.info("Using log_returns for rolling Hurst calculation")
-                indices, hurst_values = hurst_exponent.calculate_hurst_by_window(
-                    df["log_returns"].dropna(), window_size, step
-                )
-            else:
-                # Use close prices if log_returns are not available or all NaN
-                logger.info("Using close prices for rolling Hurst calculation")
-                indices, hurst_values = hurst_exponent.calculate_hurst_by_window(
-                    df["close"].dropna(), window_size, step
-                )
+            # The estimator takes prices and derives log returns itself; windows of
+            # long series are spread over the process pool when one is configured
+            logger.info("Using close prices for rolling Hurst calculation")
+            indices, hurst_values, ci_low, ci_high = await run_blocking(
+                hurst_exponent.calculate_hurst_by_window, df["close"].dropna(), window_size, step,
+                executor=get_process_pool(), return_ci=True
+            )
             
             # Check if we got valid rolling Hurst values
             if not indices or not hurst_values or len(indices) == 0 or len(hurst_values) == 0:
@@ -843,10 +1004,14 @@ async def get_hurst_exponent(
             # Filter out NaN values
             filtered_dates = []
             filtered_values = []
+            filtered_ci_low = []
+            filtered_ci_high = []
             for i, h in enumerate(hurst_values):
                 if i < len(dates) and not np.isnan(h):
                     filtered_dates.append(dates[i])
                     filtered_values.append(float(h))
+                    filtered_ci_low.append(float(ci_low[i]))
+                    filtered_ci_high.append(float(ci_high[i]))
             
             # Get interpretation
             interpretation = hurst_exponent.interpret_hurst(hurst)
@@ -868,12 +1033,19 @@ async def get_hurst_exponent(
             return {
                 "ticker": ticker,
                 "hurst_exponent": float(hurst),
+                "hurst_ci": {
+                    "low": float(hurst_ci[0]),
+                    "high": float(hurst_ci[1]),
+                    "confidence": 0.95
+                },
                 "interpretation": interpretation,
                 "window_size": window_size,  # Include the actual window size used
                 "step": step,  # Include the actual step size used
                 "rolling_hurst": {
                     "dates": filtered_dates,
-                    "values": filtered_values
+                    "values": filtered_values,
+                    "ci_low": filtered_ci_low,
+                    "ci_high": filtered_ci_high
                 },
                 "price_data": {
                     "dates": price_dates,
@@ -902,12 +1074,19 @@ async def get_hurst_exponent(
             return {
                 "ticker": ticker,
                 "hurst_exponent": float(hurst),
+                "hurst_ci": {
+                    "low": float(hurst_ci[0]),
+                    "high": float(hurst_ci[1]),
+                    "confidence": 0.95
+                },
                 "interpretation": interpretation,
                 "window_size": window_size,  # Include the actual window size used
                 "step": step,  # Include the actual step size used
                 "rolling_hurst": {
                     "dates": [],
-                    "values": []
+                    "values": [],
+                    "ci_low": [],
+                    "ci_high": []
                 },
                 "price_data": {
                     "dates": price_dates,
@@ -931,13 +1110,18 @@ async def get_hurst_exponent(
         )
 
 @router.get("/volatility/{ticker}")
+@limit_concurrency("volatility")
 async def get_volatility(
     ticker: str,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     bandwidth: float = 0.15,
     grid_size: int = 500,
-    sync_yfinance: bool = True
+    sync_yfinance: bool = True,
+    kde_method: str = "fft",
+    vol_windows: str = "10,21,63",
+    ewma_lambda: float = 0.94,
+    include_vol_series: bool = True
 ):
     """
     Analyze stock price volatility.
@@ -949,6 +1133,11 @@ async def get_volatility(
         bandwidth: Bandwidth for KDE calculation (0.01-1.0)
         grid_size: Number of points in KDE grid (100-1000)
         sync_yfinance: Whether to sync with yfinance before analysis
+        kde_method: "fft" (binned, fast) or "exact" (scipy gaussian_kde) KDE evaluation
+        vol_windows: Comma-separated rolling windows (trading days) for the realized
+            volatility estimators (close-to-close, Parkinson, Garman-Klass, Rogers-Satchell, Yang-Zhang)
+        ewma_lambda: Decay factor for EWMA volatility (0-1)
+        include_vol_series: Include the estimator series aligned with price_data, not just latest values
     
     Returns:
         Volatility analysis
@@ -956,6 +1145,14 @@ async def get_volatility(
     try:
         logger.info(f"Analyzing volatility for ticker: {ticker}, date range: {start_date} to {end_date}")
         
+        windows = parse_number_list(vol_windows, "volatility windows", int)
+        if min(windows) < 2 or not 0 < ewma_lambda < 1:
+            raise HTTPException(status_code=400, detail="Volatility windows must be at least 2 and ewma_lambda between 0 and 1")
+        if len(windows) > VOLATILITY_MAX_WINDOWS:
+            raise HTTPException(status_code=400, detail=f"At most {VOLATILITY_MAX_WINDOWS} volatility windows are allowed")
+        if kde_method not in kde.KDE_METHODS:
+            raise HTTPException(status_code=400, detail=f"Invalid kde_method. Use one of {', '.join(kde.KDE_METHODS)}")
+        
         # Check if it's a cryptocurrency (common formats: BTC-USD, ETH-USD, etc.)
         is_crypto = "-" in ticker or ticker.endswith("USDT") or ticker.endswith("USD")
         if is_crypto:
@@ -1005,7 +1202,7 @@ async def get_volatility(
                 ticker_data = yf.Ticker(ticker)
                 
                 # Get historical data
-                hist = ticker_data.history(start=start_date, end=end_date)
+                hist = await run_blocking(ticker_data.history, start=start_date, end=end_date)
                 
                 if hist.empty:
                     raise ValueError(f"No historical data available for {ticker} in the specified date range")
@@ -1031,12 +1228,17 @@ async def get_volatility(
                 
                 # Prepare return distribution data for frontend chart
                 returns_list = returns.tolist()
+                returns_kde = await run_cpu(volatility.returns_density, returns.values, bandwidth, grid_size, kde_method)
+                check_vol_windows(windows, len(df))
+                realized = await run_cpu(volatility.volatility_suite, df, windows, ewma_lambda, include_vol_series)
                 
                 return {
                     "ticker": ticker,
                     "avg_volatility": avg,
                     "std_volatility": std,
                     "returns_distribution": returns_list,
+                    "returns_kde": returns_kde,
+                    "realized_volatility": realized,
                     "price_data": {
                         "dates": [date.strftime("%Y-%m-%d") if hasattr(date, 'strftime') else str(date) for date in df['date']],
                         "prices": df["close"].tolist()
@@ -1053,6 +1255,8 @@ async def get_volatility(
                     "data_source": "YFinance"
                 }
                 
+            except HTTPException:
+                raise
             except Exception as yf_error:
                 logger.error(f"YFinance error for {ticker}: {str(yf_error)}")
                 
@@ -1080,12 +1284,17 @@ async def get_volatility(
                 
                 # Prepare return distribution data for frontend chart
                 returns_list = returns.tolist()
+                returns_kde = await run_cpu(volatility.returns_density, returns.values, bandwidth, grid_size, kde_method)
+                check_vol_windows(windows, len(df))
+                realized = await run_cpu(volatility.volatility_suite, df, windows, ewma_lambda, include_vol_series)
                 
                 return {
                     "ticker": ticker,
                     "avg_volatility": avg,
                     "std_volatility": std,
                     "returns_distribution": returns_list,
+                    "returns_kde": returns_kde,
+                    "realized_volatility": realized,
                     "price_data": {
                         "dates": [date.strftime("%Y-%m-%d") for date in df["date"]],
                         "prices": df["close"].tolist()
@@ -1119,7 +1328,7 @@ async def get_volatility(
             
             # Call the analysis function without visualization
             try:
-                df, returns = volatility.analyze_volatility(ticker, start_date, end_date)
+                df, returns = await run_blocking(volatility.analyze_volatility, ticker, start_date, end_date)
                 
                 if df is None or returns is None:
                     raise ValueError("No data returned from volatility analysis")
@@ -1156,6 +1365,9 @@ async def get_volatility(
             
             # Prepare return distribution data for frontend chart
             returns_list = returns.tolist()
+            returns_kde = await run_cpu(volatility.returns_density, returns.values, bandwidth, grid_size, kde_method)
+            check_vol_windows(windows, len(df))
+            realized = await run_cpu(volatility.volatility_suite, df, windows, ewma_lambda, include_vol_series)
             
             # Prepare price dates based on index type
             if isinstance(df.index, pd.DatetimeIndex):
@@ -1171,6 +1383,8 @@ async def get_volatility(
                 "avg_volatility": avg,
                 "std_volatility": std,
                 "returns_distribution": returns_list,
+                "returns_kde": returns_kde,
+                "realized_volatility": realized,
                 "price_data": {
                     "dates": dates,
                     "prices": df["close"].tolist()
@@ -1197,6 +1411,7 @@ async def get_volatility(
         raise HTTPException(status_code=500, detail=f"Error analyzing volatility: {str(e)}")
 
 @router.get("/next-day-stats/{ticker}")
+@limit_concurrency("next-day-stats")
 async def get_next_day_stats(
     ticker: str,
     threshold: float = 0.10,
@@ -1276,7 +1491,8 @@ async def get_next_day_stats(
         
         # Call the analysis function with the requested look_ahead_days
         try:
-            df, up, down = next_day_stats.analyze_next_day_stats(
+            df, up, down = await run_blocking(
+                next_day_stats.analyze_next_day_stats,
                 ticker, threshold, look_ahead_days, start_date, end_date, movement
             )
         except Exception as analysis_error:
@@ -1305,63 +1521,16 @@ async def get_next_day_stats(
             "look_ahead_days": look_ahead_days
         }
         
-        # Process up moves if available
-        if up is not None and not up.empty:
-            try:
-                up_stats = up["Forward_Return"].describe(percentiles=[0.25, 0.5, 0.75])
-                
-                # Convert 'date' column to string format if it's a datetime
-                up_data = up.copy()
-                if 'date' in up_data.columns:
-                    if pd.api.types.is_datetime64_any_dtype(up_data['date']) or isinstance(up_data['date'].iloc[0], datetime):
-                        up_data['date'] = up_data['date'].apply(lambda x: x.strftime('%Y-%m-%d') if hasattr(x, 'strftime') else str(x))
-                
-                # Handle NaN values in statistics
-                result["up_moves"] = {
-                    "count": int(up_stats["count"]),
-                    "mean": float(up_stats["mean"]) if not pd.isna(up_stats["mean"]) else None,
-                    "std": float(up_stats["std"]) if not pd.isna(up_stats["std"]) else None,
-                    "min": float(up_stats["min"]) if not pd.isna(up_stats["min"]) else None,
-                    "q1": float(up_stats["25%"]) if not pd.isna(up_stats["25%"]) else None,
-                    "median": float(up_stats["50%"]) if not pd.isna(up_stats["50%"]) else None,
-                    "q3": float(up_stats["75%"]) if not pd.isna(up_stats["75%"]) else None,
-                    "max": float(up_stats["max"]) if not pd.isna(up_stats["max"]) else None,
-                    "data": up_data.to_dict(orient="records")
-                }
-            except Exception as stats_error:
-                logger.error(f"Error calculating up move statistics: {str(stats_error)}")
-                result["up_moves"] = {
-                    "count": len(up),
-                    "data": []
-                }
-        
-        # Process down moves if available
-        if down is not None and not down.empty:
+        # Summaries are computed from the frames directly; nothing is printed
+        for key, moves in (("up_moves", up), ("down_moves", down)):
+            if moves is None or moves.empty:
+                continue
             try:
-                down_stats = down["Forward_Return"].describe(percentiles=[0.25, 0.5, 0.75])
-                
-                # Convert 'date' column to string format if it's a datetime
-                down_data = down.copy()
-                if 'date' in down_data.columns:
-                    if pd.api.types.is_datetime64_any_dtype(down_data['date']) or isinstance(down_data['date'].iloc[0], datetime):
-                        down_data['date'] = down_data['date'].apply(lambda x: x.strftime('%Y-%m-%d') if hasattr(x, 'strftime') else str(x))
-                
-                # Handle NaN values in statistics
-                result["down_moves"] = {
-                    "count": int(down_stats["count"]),
-                    "mean": float(down_stats["mean"]) if not pd.isna(down_stats["mean"]) else None,
-                    "std": float(down_stats["std"]) if not pd.isna(down_stats["std"]) else None,
-                    "min": float(down_stats["min"]) if not pd.isna(down_stats["min"]) else None,
-                    "q1": float(down_stats["25%"]) if not pd.isna(down_stats["25%"]) else None,
-                    "median": float(down_stats["50%"]) if not pd.isna(down_stats["50%"]) else None,
-                    "q3": float(down_stats["75%"]) if not pd.isna(down_stats["75%"]) else None,
-                    "max": float(down_stats["max"]) if not pd.isna(down_stats["max"]) else None,
-                    "data": down_data.to_dict(orient="records")
-                }
+                result[key] = next_day_stats.MoveStats(moves, key, look_ahead_days).to_dict()
             except Exception as stats_error:
-                logger.error(f"Error calculating down move statistics: {str(stats_error)}")
-                result["down_moves"] = {
-                    "count": len(down),
+                logger.error(f"Error calculating {key.replace('_', ' ')} statistics: {str(stats_error)}")
+                result[key] = {
+                    "count": len(moves),
                     "data": []
                 }
         
@@ -1378,7 +1547,103 @@ async def get_next_day_stats(
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Error analyzing next-day stats: {str(e)}")
 
+def check_vol_windows(windows: list, n_bars: int):
+    """Reject realized volatility windows longer than the price history."""
+    if max(windows) > n_bars:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Volatility windows must be at most {n_bars} bars, the length of the price history"
+        )
+
+def parse_number_list(value: str, name: str, cast=float) -> list:
+    """Parse a comma-separated query parameter such as "0.05,0.1" into numbers."""
+    try:
+        numbers = [cast(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: {value}")
+    if not numbers:
+        raise HTTPException(status_code=400, detail=f"No {name} given")
+    return numbers
+
+@router.get("/next-day-stats-grid/{ticker}")
+@limit_concurrency("next-day-stats")
+async def get_next_day_stats_grid(
+    ticker: str,
+    thresholds: str = "0.02,0.03,0.05,0.1",
+    horizons: str = "1,5,10,20",
+    movement: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    sync_yfinance: bool = True
+):
+    """
+    Forward-return statistics after significant moves for a grid of thresholds
+    and look-ahead horizons in a single call.
+    
+    Parameters:
+        ticker: Stock ticker symbol
+        thresholds: Comma-separated move thresholds (e.g. "0.05,0.1" for 5% and 10%)
+        horizons: Comma-separated look-ahead periods in days (e.g. "1,5,10")
+        movement: "up" for only up-moves, "down" for only down-moves, None for both
+        start_date: Optional start date in format YYYY-MM-DD
+        end_date: Optional end date in format YYYY-MM-DD
+        sync_yfinance: If True, automatically sync with yfinance if data is available
+    
+    Returns:
+        One cell per direction, threshold and horizon with count, mean, std,
+        min, max, win rate and percentiles of the forward returns
+    """
+    threshold_list = parse_number_list(thresholds, "thresholds")
+    horizon_list = parse_number_list(horizons, "horizons", int)
+    if any(t <= 0 for t in threshold_list):
+        raise HTTPException(status_code=400, detail="Thresholds must be greater than 0")
+    if any(h <= 0 for h in horizon_list):
+        raise HTTPException(status_code=400, detail="Horizons must be positive")
+    if len(threshold_list) > NEXT_DAY_GRID_MAX_THRESHOLDS or len(horizon_list) > NEXT_DAY_GRID_MAX_HORIZONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {NEXT_DAY_GRID_MAX_THRESHOLDS} thresholds and {NEXT_DAY_GRID_MAX_HORIZONS} horizons are allowed"
+        )
+    if max(horizon_list) > NEXT_DAY_GRID_MAX_HORIZON_DAYS:
+        raise HTTPException(status_code=400, detail=f"Horizons must be at most {NEXT_DAY_GRID_MAX_HORIZON_DAYS} days")
+    if movement not in (None, "up", "down"):
+        raise HTTPException(status_code=400, detail="Movement must be 'up', 'down' or omitted")
+    
+    # Same lower bound as the single-threshold endpoint
+    threshold_list = [max(t, 0.005) for t in threshold_list]
+    
+    try:
+        if sync_yfinance:
+            try:
+                sync_result = await YFinanceSync.sync_ticker_data(ticker, start_date, end_date)
+                logger.info(f"Sync result for {ticker}: {sync_result}")
+            except Exception as sync_error:
+                logger.warning(f"Error during yfinance sync for {ticker}: {str(sync_error)}")
+        
+        grid = await run_blocking(
+            next_day_stats.analyze_next_day_stats_grid,
+            ticker, threshold_list, horizon_list, start_date, end_date, movement
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Error analyzing next-day stats grid: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Error analyzing next-day stats grid: {str(e)}")
+    
+    if grid is None:
+        raise HTTPException(status_code=404, detail=f"No price data found for ticker: {ticker}")
+    
+    return {
+        "ticker": ticker,
+        "thresholds": threshold_list,
+        "horizons": horizon_list,
+        "movement": movement,
+        **grid
+    }
+
 @router.get("/price-distribution/{ticker}")
+@limit_concurrency("price-distribution")
 async def get_price_distribution(
     ticker: str,
     method: str = "kde",
@@ -1390,14 +1655,21 @@ async def get_price_distribution(
     end_date: Optional[str] = None,
     bw_method: float = 0.15,
     grid_size: int = 500,
-    include_volume_indicators: bool = False
+    include_volume_indicators: bool = False,
+    kde_method: str = "fft",
+    sampler: str = "pseudo",
+    seed: Optional[int] = None,
+    touch_levels: Optional[str] = None,
+    horizons: Optional[str] = None,
+    block_size: int = 5
 ):
     """
     Calculate price distribution for a stock or cryptocurrency.
     
     Parameters:
         ticker: Stock ticker symbol or cryptocurrency (e.g., BTC-USD)
-        method: "hist", "kde", or "mc_kde"
+        method: "hist", "kde", "mc_kde", "analytic" (exact lognormal GBM end-price density)
+            or "bootstrap" (block-bootstrapped historical returns)
         bin_size: Bin size for histogram
         smooth_window: Smoothing window size
         simulations: Number of simulations for Monte Carlo
@@ -1407,6 +1679,14 @@ async def get_price_distribution(
         bw_method: Bandwidth for KDE (0.01-1.0)
         grid_size: Number of points in KDE grid (100-1000)
         include_volume_indicators: Whether to include volume indicators (TVC, VA, VV)
+        kde_method: "fft" (binned, fast) or "exact" (scipy gaussian_kde) KDE evaluation
+        sampler: "pseudo", "antithetic" or "sobol" draws for Monte Carlo
+        seed: Optional random seed for reproducible Monte Carlo results
+        touch_levels: Optional comma-separated price levels, e.g. "180,200"; adds the
+            probability of simulated daily closes touching each level within horizon_days
+        horizons: Optional comma-separated horizons in trading days, e.g. "5,21,63"; with
+            method=bootstrap, end-price quantiles are returned for each (default horizon_days)
+        block_size: Consecutive trading days per bootstrap block
     
     Returns:
         Price distribution data
@@ -1414,6 +1694,48 @@ async def get_price_distribution(
     try:
         logger.info(f"Calculating price distribution for ticker: {ticker} using method: {method}")
         
+        if sampler not in probability_distribution.SAMPLERS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid sampler. Use one of {', '.join(probability_distribution.SAMPLERS)}"
+            )
+        if kde_method not in kde.KDE_METHODS:
+            raise HTTPException(status_code=400, detail=f"Invalid kde_method. Use one of {', '.join(kde.KDE_METHODS)}")
+        if not 1 <= simulations <= PRICE_DISTRIBUTION_MAX_SIMULATIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"simulations must be between 1 and {PRICE_DISTRIBUTION_MAX_SIMULATIONS}"
+            )
+        if not 1 <= horizon_days <= PRICE_DISTRIBUTION_MAX_HORIZON_DAYS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"horizon_days must be between 1 and {PRICE_DISTRIBUTION_MAX_HORIZON_DAYS}"
+            )
+        levels = parse_number_list(touch_levels, "touch levels") if touch_levels else None
+        if levels and len(levels) > PRICE_DISTRIBUTION_MAX_TOUCH_LEVELS:
+            raise HTTPException(status_code=400, detail=f"At most {PRICE_DISTRIBUTION_MAX_TOUCH_LEVELS} touch levels are allowed")
+        # Touch probabilities simulate simulations x horizon_days daily closes
+        if levels and simulations * horizon_days > PRICE_DISTRIBUTION_MAX_PATH_STEPS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"simulations x horizon_days must be at most {PRICE_DISTRIBUTION_MAX_PATH_STEPS} with touch levels"
+            )
+        horizon_list = parse_number_list(horizons, "horizons", int) if horizons else [horizon_days]
+        if min(horizon_list) < 1 or block_size < 1:
+            raise HTTPException(status_code=400, detail="Horizons and block_size must be at least 1")
+        if len(horizon_list) > PRICE_DISTRIBUTION_MAX_HORIZONS or max(horizon_list) > PRICE_DISTRIBUTION_MAX_HORIZON_DAYS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {PRICE_DISTRIBUTION_MAX_HORIZONS} horizons of up to {PRICE_DISTRIBUTION_MAX_HORIZON_DAYS} days are allowed"
+            )
+        # The bootstrap resamples simulations x max(horizons) returns
+        if method == "bootstrap" and simulations * max(horizon_list) > PRICE_DISTRIBUTION_MAX_PATH_STEPS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"simulations x the longest horizon must be at most {PRICE_DISTRIBUTION_MAX_PATH_STEPS} for the bootstrap"
+            )
+        log_returns = None
+        
         # Check if it's a cryptocurrency (common formats: BTC-USD, ETH-USD, etc.)
         is_crypto = "-" in ticker or ticker.endswith("USDT") or ticker.endswith("USD")
         if is_crypto:
@@ -1462,7 +1784,7 @@ async def get_price_distribution(
                 ticker_data = yf.Ticker(ticker)
                 
                 # Get historical data
-                hist = ticker_data.history(start=start_date, end=end_date)
+                hist = await run_blocking(ticker_data.history, start=start_date, end=end_date)
                 
                 if hist.empty:
                     logger.warning(f"YFinance error for {ticker}: No historical data available")
@@ -1484,14 +1806,26 @@ async def get_price_distribution(
                     prices = df["close"].values
                     
                     # Compute distribution
-                    x, y = probability_distribution.compute_distribution(
+                    x, y = await run_cpu(
+                        probability_distribution.compute_distribution,
                         prices, method, bin_size, smooth_window, simulations, horizon_days,
-                        bw_method=bw_method, grid_size=grid_size
+                        bw_method=bw_method, grid_size=grid_size, kde_method=kde_method,
+                        sampler=sampler, seed=seed, log_returns=log_returns, block_size=block_size
                     )
+                    touch_probabilities = await run_cpu(
+                        probability_distribution.compute_touch_probabilities,
+                        prices, levels, horizon_days, simulations, sampler, seed
+                    ) if levels else None
+                    horizon_quantiles = await run_cpu(
+                        probability_distribution.bootstrap_horizon_quantiles,
+                        prices, horizon_list, simulations, block_size, seed, log_returns
+                    ) if method == "bootstrap" else None
                     
                     result = {
                         "ticker": ticker,
                         "method": method,
+                        "touch_probabilities": touch_probabilities,
+                        "horizon_quantiles": horizon_quantiles,
                         "distribution": {
                             "x": x.tolist(),
                             "y": y.tolist()
@@ -1530,14 +1864,26 @@ async def get_price_distribution(
                 prices = hist['Close'].values
                 
                 # Compute distribution using the same logic as the regular function
-                x, y = probability_distribution.compute_distribution(
+                x, y = await run_cpu(
+                    probability_distribution.compute_distribution,
                     prices, method, bin_size, smooth_window, simulations, horizon_days,
-                    bw_method=bw_method, grid_size=grid_size
+                    bw_method=bw_method, grid_size=grid_size, kde_method=kde_method,
+                    sampler=sampler, seed=seed, log_returns=log_returns, block_size=block_size
                 )
+                touch_probabilities = await run_cpu(
+                    probability_distribution.compute_touch_probabilities,
+                    prices, levels, horizon_days, simulations, sampler, seed
+                ) if levels else None
+                horizon_quantiles = await run_cpu(
+                    probability_distribution.bootstrap_horizon_quantiles,
+                    prices, horizon_list, simulations, block_size, seed, log_returns
+                ) if method == "bootstrap" else None
                 
                 result = {
                     "ticker": ticker,
                     "method": method,
+                    "touch_probabilities": touch_probabilities,
+                    "horizon_quantiles": horizon_quantiles,
                     "distribution": {
                         "x": x.tolist(),
                         "y": y.tolist()
@@ -1607,14 +1953,26 @@ async def get_price_distribution(
                     prices = df["close"].values
                     
                     # Compute distribution
-                    x, y = probability_distribution.compute_distribution(
+                    x, y = await run_cpu(
+                        probability_distribution.compute_distribution,
                         prices, method, bin_size, smooth_window, simulations, horizon_days,
-                        bw_method=bw_method, grid_size=grid_size
+                        bw_method=bw_method, grid_size=grid_size, kde_method=kde_method,
+                        sampler=sampler, seed=seed, log_returns=log_returns, block_size=block_size
                     )
+                    touch_probabilities = await run_cpu(
+                        probability_distribution.compute_touch_probabilities,
+                        prices, levels, horizon_days, simulations, sampler, seed
+                    ) if levels else None
+                    horizon_quantiles = await run_cpu(
+                        probability_distribution.bootstrap_horizon_quantiles,
+                        prices, horizon_list, simulations, block_size, seed, log_returns
+                    ) if method == "bootstrap" else None
                     
                     result = {
                         "ticker": ticker,
                         "method": method,
+                        "touch_probabilities": touch_probabilities,
+                        "horizon_quantiles": horizon_quantiles,
                         "distribution": {
                             "x": x.tolist(),
                             "y": y.tolist()
@@ -1662,18 +2020,35 @@ async def get_price_distribution(
                     )
         else:
             # For regular stocks, use the standard MongoDB approach
-            # Load price data
-            prices = probability_distribution.load_prices_from_db(ticker, start_date, end_date)
+            # Load price data (with read_and_prepare_data's log returns for the bootstrap)
+            if method == "bootstrap":
+                prices, log_returns = await run_blocking(
+                    probability_distribution.load_log_returns_from_db, ticker, start_date, end_date
+                )
+            else:
+                prices = await run_blocking(probability_distribution.load_prices_from_db, ticker, start_date, end_date)
             
             # Compute distribution without plotting
-            x, y = probability_distribution.compute_distribution(
+            x, y = await run_cpu(
+                probability_distribution.compute_distribution,
                 prices, method, bin_size, smooth_window, simulations, horizon_days,
-                bw_method=bw_method, grid_size=grid_size
+                bw_method=bw_method, grid_size=grid_size, kde_method=kde_method,
+                sampler=sampler, seed=seed, log_returns=log_returns, block_size=block_size
             )
+            touch_probabilities = await run_cpu(
+                probability_distribution.compute_touch_probabilities,
+                prices, levels, horizon_days, simulations, sampler, seed
+            ) if levels else None
+            horizon_quantiles = await run_cpu(
+                probability_distribution.bootstrap_horizon_quantiles,
+                prices, horizon_list, simulations, block_size, seed, log_returns
+            ) if method == "bootstrap" else None
             
             result = {
                 "ticker": ticker,
                 "method": method,
+                "touch_probabilities": touch_probabilities,
+                "horizon_quantiles": horizon_quantiles,
                 "distribution": {
                     "x": x.tolist(),
                     "y": y.tolist()
@@ -1690,7 +2065,9 @@ async def get_price_distribution(
             # If volume indicators requested, calculate and add them
             if include_volume_indicators:
                 # Get the DataFrame with volume data
-                df = read_and_prepare_data(ticker, date_from=start_date, date_to=end_date, calc_returns=True)
+                df = await run_blocking(
+                    read_and_prepare_data, ticker, date_from=start_date, date_to=end_date, calc_returns=True
+                )
                 
                 if df is not None and 'volume' in df.columns and 'close' in df.columns:
                     # Calculate TVC (Total Volume Correlation)
@@ -1718,12 +2095,23 @@ async def get_price_distribution(
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Error calculating price distribution: {str(e)}") 
 
+@router.get("/cache/stats")
+async def get_frame_cache_stats():
+    """
+    Report hit/miss counters and memory usage of the prepared price frame cache.
+    
+    Returns:
+        Cache statistics
+    """
+    return prepared_frame_cache.stats()
+
 @router.get("/sync-yfinance/{ticker}")
 async def sync_ticker_with_yfinance(
     ticker: str,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    force_update: bool = False
+    force_update: bool = False,
+    incremental: bool = True
 ):
     """
     Sync ticker data between MongoDB and yfinance.
@@ -1734,6 +2122,7 @@ async def sync_ticker_with_yfinance(
         start_date: Optional start date in format YYYY-MM-DD
         end_date: Optional end date in format YYYY-MM-DD
         force_update: If True, update MongoDB even if data matches
+        incremental: If True, only fetch bars after the stored sync watermark
         
     Returns:
         Result of the sync operation
@@ -1742,7 +2131,8 @@ async def sync_ticker_with_yfinance(
         logger.info(f"Syncing {ticker} data with yfinance")
         
         # Perform the sync operation
-        result = await YFinanceSync.sync_ticker_data(ticker, start_date, end_date)
+        result = await YFinanceSync.sync_ticker_data(ticker, start_date, end_date,
+                                                     incremental=incremental and not force_update)
         
         # If force update is set and we have yfinance data
         if force_update and not result.get("data_matched", True):
@@ -1759,7 +2149,164 @@ async def sync_ticker_with_yfinance(
         logger.error(f"Error syncing ticker data with yfinance: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error syncing ticker data: {str(e)}") 
 
+class BulkSyncRequest(BaseModel):
+    tickers: Optional[List[str]] = None
+    all_tickers: bool = False
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    chunk_size: int = bulk_sync.BULK_SYNC_CHUNK_SIZE
+    max_workers: int = bulk_sync.BULK_SYNC_MAX_WORKERS
+
+@router.post("/sync-yfinance/bulk")
+async def start_bulk_sync(request: BulkSyncRequest):
+    """
+    Start a background job that syncs many tickers with yfinance.
+    
+    Parameters:
+        tickers: Tickers to sync (ignored when all_tickers is True)
+        all_tickers: Sync every ticker in tickers.json
+        start_date: Optional start date in format YYYY-MM-DD (default: a short lookback for nightly refreshes)
+        end_date: Optional end date in format YYYY-MM-DD (default: today)
+        chunk_size: Tickers fetched per yfinance request
+        max_workers: Concurrent yfinance requests
+        
+    Returns:
+        Job summary including the job_id to poll
+    """
+    if not request.all_tickers and not request.tickers:
+        raise HTTPException(status_code=400, detail="Provide tickers or set all_tickers")
+    if request.chunk_size < 1 or request.max_workers < 1:
+        raise HTTPException(status_code=400, detail="chunk_size and max_workers must be positive")
+    
+    try:
+        job = bulk_sync.create_job(
+            None if request.all_tickers else request.tickers,
+            request.start_date,
+            request.end_date,
+            request.chunk_size
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    bulk_sync.start_job(job, request.max_workers)
+    logger.info(f"Started bulk sync job {job.job_id} for {len(job.tickers)} tickers")
+    return job.to_dict()
+
+@router.get("/sync-yfinance/jobs/{job_id}")
+async def get_bulk_sync_job(job_id: str, include_results: bool = False):
+    """
+    Report progress of a bulk sync job.
+    
+    Parameters:
+        job_id: Id returned when the job was started
+        include_results: Include the per-ticker outcomes
+        
+    Returns:
+        Job summary with progress counters
+    """
+    job = bulk_sync.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Bulk sync job {job_id} not found")
+    return job.to_dict(include_results=include_results)
+
+async def backtest_single(ticker, start_date, end_date, strategy_type, strategy_params, initial_capital,
+                          position_size, stop_loss, take_profit):
+    """Load one ticker's price columns and run the strategy on them in the process pool."""
+    try:
+        columns = await run_blocking(load_price_columns, ticker, start_date, end_date)
+    except ValueError as date_error:
+        raise HTTPException(status_code=400, detail=str(date_error))
+    
+    ticker_columns = columns.get(ticker)
+    if ticker_columns is None or len(ticker_columns["date"]) == 0:
+        raise HTTPException(status_code=404, detail=f"No historical data found for ticker: {ticker}")
+    
+    logger.info(f"Found {len(ticker_columns['date'])} data points for {ticker}")
+    
+    dates = ticker_columns.pop("date")
+    try:
+        result = await run_cpu(
+            backtest.run_strategy_backtest, dates, ticker_columns, strategy_type, strategy_params,
+            initial_capital, position_size, stop_loss, take_profit
+        )
+    except ValueError as strategy_error:
+        raise HTTPException(status_code=400, detail=str(strategy_error))
+    
+    return replace_nan_with_none({
+        "success": True,
+        "ticker": ticker,
+        **result
+    })
+
+async def backtest_portfolio(tickers, start_date, end_date, strategy_type, strategy_params, initial_capital,
+                             position_size, stop_loss, take_profit, weights=None, rebalance="monthly"):
+    """
+    Portfolio mode of /backtest-strategy: one aligned OHLCV panel, one sleeve per ticker.
+    
+    Returns the single-ticker response shape with a ticker on each trade row,
+    plus the normalized weights and per-ticker sleeve results.
+    """
+    try:
+        dates, found, panels = await run_blocking(load_price_panels, tickers, start_date, end_date)
+    except ValueError as date_error:
+        raise HTTPException(status_code=400, detail=str(date_error))
+    if not found:
+        raise HTTPException(status_code=404, detail=f"No historical data found for tickers: {', '.join(tickers)}")
+    
+    logger.info(f"Found {len(dates)} dates for {len(found)} tickers")
+    
+    try:
+        result = await run_cpu(
+            backtest.run_portfolio_backtest, dates, panels, found, strategy_type, strategy_params,
+            initial_capital, position_size, stop_loss, take_profit, weights, rebalance
+        )
+    except ValueError as strategy_error:
+        raise HTTPException(status_code=400, detail=str(strategy_error))
+    
+    return replace_nan_with_none({
+        "success": True,
+        "tickers": found,
+        "missing": [t for t in tickers if t not in found],
+        **result
+    })
+
+async def run_stored_backtest(inputs, username, compute, use_store=True):
+    """
+    Return the stored result for these backtest inputs, or compute and store it.
+    
+    The store key includes the tickers' data watermarks, so results computed
+    before a sync wrote new bars are never returned. Store errors fall back to
+    computing the result.
+    
+    Parameters:
+        inputs (dict): Everything that determines the result (strategy, tickers, dates, sizing, ...)
+        username (str): User recorded on the stored run
+        compute: Async callable returning the response for these inputs
+        use_store (bool): False always recomputes and does not store the result
+    """
+    if not (use_store and backtest_result_store.enabled):
+        return await compute()
+    
+    try:
+        watermarks = await run_blocking(backtest_result_store.data_watermarks, inputs["tickers"])
+        run_id = backtest_result_store.make_key(inputs, watermarks)
+        stored = await run_blocking(backtest_result_store.claim, run_id, username)
+    except Exception as e:
+        logger.warning(f"Backtest result store unavailable: {str(e)}")
+        return await compute()
+    if stored is not None:
+        logger.info(f"Returning stored backtest {run_id}")
+        return {**stored, "run_id": run_id, "cached": True}
+    
+    result = await compute()
+    try:
+        await run_blocking(backtest_result_store.put, run_id, inputs, watermarks, result, username)
+    except Exception as e:
+        logger.warning(f"Could not store backtest {run_id}: {str(e)}")
+    return {**result, "run_id": run_id, "cached": False}
+
 @router.post("/backtest-strategy")
+@limit_concurrency("backtest-strategy")
 async def backtest_strategy(
     backtest_params: Dict[str, Any] = Body(...),
     current_user: Dict[str, Any] = Depends(get_current_user)
@@ -1770,14 +2317,18 @@ async def backtest_strategy(
     Parameters:
         backtest_params: Dictionary containing backtest parameters
             - ticker: Stock ticker symbol
+            - tickers: List of ticker symbols for a portfolio backtest (instead of ticker)
             - start_date: Start date in format YYYY-MM-DD
             - end_date: End date in format YYYY-MM-DD
-            - strategy_type: Type of strategy to backtest
+            - strategy_type: Type of strategy to backtest (a key of backtest.STRATEGIES)
             - strategy_params: Strategy-specific parameters
             - initial_capital: Initial capital amount
             - position_size: Position size percentage
             - stop_loss: Stop loss percentage
             - take_profit: Take profit percentage
+            - weights: Portfolio only; {ticker: weight}, equal weights by default
+            - rebalance: Portfolio only; "none", "weekly", "monthly" (default) or "quarterly"
+            - use_cache: Return a stored result for identical inputs and data (default true)
     
     Returns:
         Backtest results including performance metrics and trade list
@@ -1787,13 +2338,14 @@ async def backtest_strategy(
         logger.info(f"Backtest parameters: {backtest_params}")
         
         # Validate required parameters
-        required_fields = ['ticker', 'start_date', 'end_date', 'strategy_type']
+        required_fields = ['start_date', 'end_date', 'strategy_type']
         for field in required_fields:
             if field not in backtest_params:
                 raise HTTPException(status_code=400, detail=f"Missing required field: {field}")
+        if not backtest_params.get('ticker') and not backtest_params.get('tickers'):
+            raise HTTPException(status_code=400, detail="Missing required field: ticker")
         
         # Extract parameters
-        ticker = backtest_params.get('ticker').upper()
         start_date = backtest_params.get('start_date')
         end_date = backtest_params.get('end_date')
         strategy_type = backtest_params.get('strategy_type')
@@ -1803,169 +2355,50 @@ async def backtest_strategy(
         stop_loss = float(backtest_params.get('stop_loss', 2)) / 100
         take_profit = float(backtest_params.get('take_profit', 5)) / 100
         
-        # Fetch historical data for the ticker
-        try:
-            # First try to sync with yfinance if needed
-            if backtest_params.get('auto_sync', True):
-                sync_result = await YFinanceSync.sync_ticker_data(ticker, start_date, end_date)
-                logger.info(f"Sync result for {ticker}: {sync_result}")
-            
-            # Get historical data for backtesting
-            market_db = db.client["market"]
-            collection = market_db["prices"]
-            
-            # Build MongoDB query
-            query = {"ticker": ticker}
-            if start_date:
-                try:
-                    start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
-                    query["date"] = {"$gte": start_datetime}
-                except ValueError:
-                    raise HTTPException(status_code=400, detail=f"Invalid start_date format: {start_date}")
-            
-            if end_date:
-                try:
-                    end_datetime = datetime.strptime(end_date, "%Y-%m-%d")
-                    if "date" in query:
-                        query["date"]["$lte"] = end_datetime
-                    else:
-                        query["date"] = {"$lte": end_datetime}
-                except ValueError:
-                    raise HTTPException(status_code=400, detail=f"Invalid end_date format: {end_date}")
-            
-            # Execute query
-            cursor = collection.find(query).sort("date", 1)
-            historical_data = list(cursor)
-            
-            if not historical_data:
-                raise HTTPException(status_code=404, detail=f"No historical data found for ticker: {ticker}")
-            
-            logger.info(f"Found {len(historical_data)} data points for {ticker}")
-            
-            # Convert to pandas DataFrame for easier analysis
-            df = pd.DataFrame(historical_data)
-            
-            # Convert ObjectId to string for serialization
-            df['_id'] = df['_id'].astype(str)
-            
-            # Convert date to string format for serialization
-            df['date_str'] = df['date'].dt.strftime('%Y-%m-%d')
-            
-            # For now, return a mock backtest result
-            # In a real implementation, we would run the actual strategy logic here
-            
-            # Mock results for demo purposes
-            trades = []
-            equity_curve = []
-            
-            # Generate mock trades based on the real dates we have
-            dates = df['date'].tolist()
-            if len(dates) > 10:  # Ensure we have enough data points
-                # Select random dates for trades
-                trade_dates = random.sample(dates, min(20, len(dates) // 5))
-                
-                # Sort the selected dates
-                trade_dates.sort()
-                
-                # Generate mock trades
-                current_position = None
-                capital = initial_capital
-                
-                for i, trade_date in enumerate(trade_dates):
-                    date_idx = df[df['date'] == trade_date].index[0]
-                    price = df.loc[date_idx, 'close']
-                    
-                    # Mock trade logic
-                    if i % 2 == 0:  # Buy on even indices
-                        shares = int((capital * position_size) / price)
-                        trades.append({
-                            "date": trade_date.strftime('%Y-%m-%d'),
-                            "type": "BUY",
-                            "price": float(price),
-                            "shares": shares,
-                            "cost": float(shares * price),
-                            "profit": 0
-                        })
-                        current_position = {
-                            "entry_date": trade_date,
-                            "entry_price": price,
-                            "shares": shares
-                        }
-                    elif current_position:  # Sell on odd indices if we have a position
-                        entry_price = current_position["entry_price"]
-                        shares = current_position["shares"]
-                        profit = float(shares * (price - entry_price))
-                        trades.append({
-                            "date": trade_date.strftime('%Y-%m-%d'),
-                            "type": "SELL",
-                            "price": float(price),
-                            "shares": shares,
-                            "cost": 0,
-                            "profit": profit,
-                            "returnPct": float(100 * (price - entry_price) / entry_price)
-                        })
-                        capital += profit
-                        current_position = None
-            
-            # Generate equity curve based on trades
-            current_capital = initial_capital
-            for date in sorted(df['date']):
-                # Find any trades on this date
-                date_str = date.strftime('%Y-%m-%d')
-                day_trades = [t for t in trades if t["date"] == date_str]
-                
-                # Update capital based on trades
-                for trade in day_trades:
-                    if "profit" in trade:
-                        current_capital += trade["profit"]
-                
-                # Add point to equity curve
-                equity_curve.append({
-                    "date": date_str,
-                    "value": float(current_capital)
-                })
-            
-            # Calculate performance metrics
-            win_trades = [t for t in trades if t.get("profit", 0) > 0]
-            lose_trades = [t for t in trades if t.get("profit", 0) < 0]
-            
-            total_trades = len(win_trades) + len(lose_trades)
-            win_rate = (len(win_trades) / total_trades) * 100 if total_trades > 0 else 0
-            
-            total_profit = sum(t.get("profit", 0) for t in win_trades)
-            total_loss = sum(t.get("profit", 0) for t in lose_trades)
-            profit_factor = abs(total_profit / total_loss) if total_loss != 0 else float('inf')
-            
-            # Calculate max drawdown
-            max_drawdown = 0
-            peak = initial_capital
-            for point in equity_curve:
-                if point["value"] > peak:
-                    peak = point["value"]
-                else:
-                    drawdown = (peak - point["value"]) / peak * 100
-                    max_drawdown = max(max_drawdown, drawdown)
-            
-            # Return backtest results
-            return {
-                "success": True,
-                "ticker": ticker,
-                "strategy": strategy_type,
-                "totalReturn": float(((current_capital - initial_capital) / initial_capital) * 100),
-                "initialCapital": float(initial_capital),
-                "finalCapital": float(current_capital),
-                "winRate": float(win_rate),
-                "profitFactor": float(profit_factor),
-                "maxDrawdown": float(max_drawdown),
-                "sharpeRatio": float(random.uniform(0.5, 2.5)),  # Mock Sharpe ratio
-                "totalTrades": total_trades,
-                "equityCurve": equity_curve,
-                "trades": trades
-            }
-            
-        except Exception as data_error:
-            logger.error(f"Error getting historical data: {data_error}")
-            raise HTTPException(status_code=500, detail=f"Error getting historical data: {str(data_error)}")
+        portfolio = bool(backtest_params.get('tickers'))
+        if portfolio:
+            tickers = list(dict.fromkeys(t.upper() for t in backtest_params['tickers']))
+        else:
+            tickers = [backtest_params.get('ticker').upper()]
+        weights = backtest_params.get('weights')
+        rebalance = backtest_params.get('rebalance', 'monthly')
+        
+        # Sync first so the data watermarks below reflect any new bars
+        if backtest_params.get('auto_sync', True):
+            sync_results = await asyncio.gather(
+                *(YFinanceSync.sync_ticker_data(ticker, start_date, end_date) for ticker in tickers),
+                return_exceptions=True
+            )
+            logger.info(f"Sync results for {tickers}: {sync_results}")
+        
+        if portfolio:
+            compute = lambda: backtest_portfolio(
+                tickers, start_date, end_date, strategy_type, strategy_params, initial_capital,
+                position_size, stop_loss, take_profit, weights, rebalance
+            )
+        else:
+            compute = lambda: backtest_single(
+                tickers[0], start_date, end_date, strategy_type, strategy_params, initial_capital,
+                position_size, stop_loss, take_profit
+            )
+        
+        inputs = {
+            "strategy_type": strategy_type,
+            "strategy_params": strategy_params,
+            "tickers": tickers,
+            "portfolio": portfolio,
+            "start_date": start_date,
+            "end_date": end_date,
+            "initial_capital": initial_capital,
+            "position_size": position_size,
+            "stop_loss": stop_loss,
+            "take_profit": take_profit,
+            "weights": weights if portfolio else None,
+            "rebalance": rebalance if portfolio else None
+        }
+        return await run_stored_backtest(
+            inputs, current_user.get('username'), compute, backtest_params.get('use_cache', True)
+        )
         
     except HTTPException:
         raise  # Re-raise HTTP exceptions
@@ -1973,6 +2406,228 @@ async def backtest_strategy(
         logger.error(f"Error backtesting strategy: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error backtesting strategy: {str(e)}") 
 
+@router.get("/backtest-runs")
+async def list_backtest_runs(
+    ticker: Optional[str] = None,
+    strategy: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    include_stale: bool = True,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    List the current user's stored backtest runs with their metrics, newest first.
+    
+    Runs whose tickers got new bars since are kept and flagged as stale.
+    """
+    try:
+        runs = await run_blocking(
+            backtest_result_store.list_runs, current_user.get('username'), ticker, strategy, limit, include_stale
+        )
+        return replace_nan_with_none({"runs": runs})
+    except Exception as e:
+        logger.error(f"Error listing backtest runs: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error listing backtest runs: {str(e)}")
+
+@router.get("/backtest-runs/compare")
+async def compare_backtest_runs(
+    ids: str = Query(..., description="Comma-separated run ids"),
+    include_curves: bool = False,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Compare the current user's stored backtest runs side by side, optionally with their equity curves."""
+    run_ids = [run_id.strip() for run_id in ids.split(",") if run_id.strip()]
+    if not run_ids:
+        raise HTTPException(status_code=400, detail="ids must list at least one run id")
+    try:
+        runs = await run_blocking(
+            backtest_result_store.compare, run_ids, include_curves, current_user.get('username')
+        )
+    except Exception as e:
+        logger.error(f"Error comparing backtest runs: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error comparing backtest runs: {str(e)}")
+    found = {run["run_id"] for run in runs}
+    return replace_nan_with_none({
+        "runs": runs,
+        "missing": [run_id for run_id in run_ids if run_id not in found]
+    })
+
+@router.get("/backtest-runs/{run_id}")
+async def get_backtest_run(
+    run_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Return one of the current user's stored backtest results in the /backtest-strategy response shape."""
+    try:
+        result = await run_blocking(backtest_result_store.get, run_id, current_user.get('username'))
+    except Exception as e:
+        logger.error(f"Error reading backtest run {run_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error reading backtest run: {str(e)}")
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Backtest run {run_id} not found")
+    return {**result, "run_id": run_id, "cached": True}
+
+class BacktestOptimizeRequest(BaseModel):
+    tickers: List[str]
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    strategy_type: str
+    # Values to sweep per strategy parameter, e.g. {"fastPeriod": [5, 10, 20], "slowPeriod": [50, 100]}
+    param_grid: Dict[str, Any] = {}
+    # Percentages, as in /backtest-strategy; every stop loss is paired with every take profit
+    stop_loss: List[float] = [2]
+    take_profit: List[float] = [5]
+    initial_capital: float = 10000
+    position_size: float = 100
+    objective: str = "sharpeRatio"
+    top_n: int = 10
+    # Walk-forward windows in bars; without train_days each combination is run over the whole range
+    train_days: Optional[int] = None
+    test_days: Optional[int] = None
+    step_days: Optional[int] = None
+    anchored: bool = False
+    # Stream every combination's metrics, not only progress and the final summary
+    include_results: bool = True
+
+@router.post("/backtest-optimize")
+async def optimize_backtest(
+    request: BacktestOptimizeRequest,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Sweep strategy parameters, stop losses and take profits across tickers, streamed as NDJSON.
+    
+    Prices are loaded once into shared memory and the sweep is split into chunks
+    run on the analysis process pool. The first line describes the sweep; each
+    finished chunk adds its results and a progress line; the last line is the
+    summary: the top_n combinations per ticker by objective or, with walk-forward
+    windows, the best training combination per window and its test metrics.
+    """
+    if request.strategy_type not in backtest.STRATEGIES:
+        raise HTTPException(status_code=400, detail=f"Unknown strategy_type. Use one of {', '.join(backtest.STRATEGIES)}")
+    if request.objective not in backtest_optimizer.OBJECTIVES:
+        raise HTTPException(status_code=400, detail=f"objective must be one of {', '.join(backtest_optimizer.OBJECTIVES)}")
+    if not request.tickers:
+        raise HTTPException(status_code=400, detail="At least one ticker is required")
+    walk_forward = None
+    if request.train_days is not None or request.test_days is not None:
+        if not request.train_days or not request.test_days:
+            raise HTTPException(status_code=400, detail="Walk-forward needs both train_days and test_days")
+        walk_forward = {
+            "train_bars": request.train_days,
+            "test_bars": request.test_days,
+            "step": request.step_days,
+            "anchored": request.anchored
+        }
+        try:
+            backtest_optimizer.walk_forward_splits(0, **walk_forward)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    tickers = list(dict.fromkeys(t.upper() for t in request.tickers))
+    # Counted before the grid is built, so an oversized sweep costs nothing; every
+    # walk-forward window adds at least two backtests, so this is a lower bound
+    combinations = backtest_optimizer.grid_size(request.param_grid) * len(request.stop_loss) * len(request.take_profit)
+    evaluations = len(tickers) * combinations
+    if evaluations == 0 or evaluations > BACKTEST_OPTIMIZER_MAX_EVALUATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The sweep has {evaluations} backtests; it must have between 1 and {BACKTEST_OPTIMIZER_MAX_EVALUATIONS}"
+        )
+    grid = backtest_optimizer.expand_grid(request.param_grid)
+    exit_pairs = [(sl / 100, tp / 100) for sl in request.stop_loss for tp in request.take_profit]
+    
+    try:
+        columns = await run_blocking(load_price_columns, tickers, request.start_date, request.end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not columns:
+        raise HTTPException(status_code=404, detail="No price data for the requested tickers")
+    
+    evaluations = len(columns) * len(grid) * len(exit_pairs)
+    if walk_forward:
+        # Each combination is backtested on the training and test bars of every window
+        longest = max(len(ticker_columns["date"]) for ticker_columns in columns.values())
+        windows = len(backtest_optimizer.walk_forward_splits(longest, **walk_forward))
+        if windows == 0:
+            raise HTTPException(status_code=400, detail="The price history is too short for the walk-forward windows")
+        evaluations *= 2 * windows
+    if evaluations > BACKTEST_OPTIMIZER_MAX_EVALUATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The sweep has {evaluations} backtests; it must have at most {BACKTEST_OPTIMIZER_MAX_EVALUATIONS}"
+        )
+    
+    dates = {
+        ticker: np.datetime_as_string(ticker_columns["date"], unit="D").tolist()
+        for ticker, ticker_columns in columns.items()
+    }
+    tasks = [(ticker, params) for ticker in columns for params in grid]
+    chunks = backtest_optimizer.sweep_chunks(tasks, max(ANALYSIS_PROCESS_WORKERS, 1))
+    header = {
+        "type": "header",
+        "tickers": list(columns),
+        "missing": [t for t in tickers if t not in columns],
+        "combinations": len(grid) * len(exit_pairs),
+        "evaluations": evaluations,
+        "chunks": len(chunks),
+        "walk_forward": walk_forward
+    }
+    
+    async def lines():
+        # Created once the stream runs, so a response that never starts leaves no shared block behind
+        panel = backtest_optimizer.SharedPricePanel.create(columns)
+        futures = []
+        results = []
+        try:
+            futures = [
+                asyncio.ensure_future(run_cpu(
+                    backtest_optimizer.evaluate_chunk, panel.spec(), chunk, request.strategy_type, exit_pairs,
+                    request.initial_capital, request.position_size / 100, walk_forward
+                ))
+                for chunk in chunks
+            ]
+            yield json.dumps(header) + "\n"
+            for completed, future in enumerate(asyncio.as_completed(futures), start=1):
+                chunk_results = await future
+                results.extend(chunk_results)
+                if request.include_results:
+                    for result in chunk_results:
+                        yield json.dumps(replace_nan_with_none({"type": "result", **result})) + "\n"
+                yield json.dumps({"type": "progress", "completed": completed, "total": len(chunks)}) + "\n"
+            
+            summary = {"type": "summary", "objective": request.objective}
+            if walk_forward:
+                split_dates = {
+                    ticker: [
+                        (ticker_dates[train_start], ticker_dates[train_end], ticker_dates[test_end - 1])
+                        for train_start, train_end, test_end in backtest_optimizer.walk_forward_splits(len(ticker_dates), **walk_forward)
+                    ]
+                    for ticker, ticker_dates in dates.items()
+                }
+                summary["walk_forward"] = backtest_optimizer.walk_forward_summary(results, request.objective, split_dates)
+            else:
+                summary["best"] = backtest_optimizer.rank_results(results, request.objective, request.top_n)
+            yield json.dumps(replace_nan_with_none(summary)) + "\n"
+        except Exception as e:
+            logger.error(f"Error optimizing backtest: {str(e)}")
+            yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+        finally:
+            # Drop chunks that have not started when the client goes away
+            for future in futures:
+                future.cancel()
+            panel.close()
+    
+    # The sweep runs while the body streams, so the concurrency slot is held there
+    return StreamingResponse(limit_stream("backtest-optimize", lines()), media_type="application/x-ndjson")
+
+def read_fast_info(ticker_data) -> Tuple[Optional[float], Optional[float]]:
+    """Return (last price, previous close) from a yfinance Ticker's fast_info."""
+    info = ticker_data.fast_info
+    current_price = info.get('lastPrice') or info.get('regularMarketPrice')
+    return current_price, info.get('previousClose')
+
 @router.get("/current-price/{ticker}")
 async def get_current_price(
     ticker: str
@@ -2009,7 +2664,7 @@ async def get_current_price(
             url = f"https://finnhub.io/api/v1/quote?symbol={finnhub_symbol}&token={FINNHUB_API_KEY}"
             
             # Make the API request
-            response = requests.get(url, timeout=5)  # Add timeout
+            response = await run_blocking(requests.get, url, timeout=5)  # Add timeout
             
             # Check if request was successful
             if response.status_code == 200:
@@ -2054,14 +2709,12 @@ async def get_current_price(
             
             # Try to get latest price data
             try:
-                # First try fast info which works for most tickers
-                info = ticker_data.fast_info
-                current_price = info.get('lastPrice') or info.get('regularMarketPrice')
-                prev_close = info.get('previousClose')
+                # First try fast info which works for most tickers (fetched lazily, so off the loop)
+                current_price, prev_close = await run_blocking(read_fast_info, ticker_data)
                 
                 if not current_price:
                     # Try slower method
-                    hist = ticker_data.history(period="2d")
+                    hist = await run_blocking(ticker_data.history, period="2d")
                     if not hist.empty:
                         # Get last row for current price
                         current_price = hist['Close'].iloc[-1]
@@ -2131,16 +2784,158 @@ async def get_current_price(
 class CorrelationMatrixRequest(BaseModel):
     tickers: List[str]
     lookback_days: int
+    # None, a fixed intensity in [0, 1], or "auto" for Ledoit-Wolf shrinkage toward the identity
+    shrinkage: Optional[Union[float, str]] = None
 
 class CorrelationMatrixResponse(BaseModel):
     matrix: List[List[float]]
     tickers: List[str]
 
 @router.post("/stocks/correlation-matrix", response_model=CorrelationMatrixResponse)
+@limit_concurrency("correlation-matrix")
 async def get_correlation_matrix(request: CorrelationMatrixRequest):
     try:
-        matrix, tickers = compute_correlation_matrix(request.tickers, request.lookback_days)
+        if isinstance(request.shrinkage, str) and request.shrinkage != "auto":
+            raise HTTPException(status_code=400, detail="shrinkage must be a number between 0 and 1 or 'auto'")
+        matrix, tickers = await run_blocking(
+            compute_correlation_matrix, request.tickers, request.lookback_days, request.shrinkage
+        )
         # Convert numpy array to list for JSON serialization
         return CorrelationMatrixResponse(matrix=matrix.tolist(), tickers=tickers)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+class CorrelationSeriesRequest(CorrelationMatrixRequest):
+    # "rolling" (trailing window) or "ewma" (exponentially weighted)
+    method: str = "rolling"
+    window: int = 63
+    halflife: Optional[float] = None
+    # Optional (ticker, ticker) pairs; without them full matrices are streamed
+    pairs: Optional[List[Tuple[str, str]]] = None
+    covariance: bool = False
+    step: int = 1
+
+@router.post("/stocks/correlation-series")
+async def get_correlation_series(request: CorrelationSeriesRequest):
+    """
+    Stream rolling or EWMA correlations (or covariances) of daily returns as NDJSON.
+    
+    The first line describes the series (tickers, method, window); each following
+    line is one day's matrix, or the selected pairs, for the last lookback_days days.
+    """
+    if request.method not in correlation_coefficient.CORRELATION_SERIES_METHODS:
+        raise HTTPException(status_code=400, detail="method must be 'rolling' or 'ewma'")
+    if request.window < 2 or request.step < 1 or request.lookback_days < 1:
+        raise HTTPException(status_code=400, detail="window must be at least 2, step and lookback_days at least 1")
+    if request.halflife is not None and request.halflife <= 0:
+        raise HTTPException(status_code=400, detail="halflife must be positive")
+    # Each emitted day holds the full matrix, or one value per pair
+    n_tickers = len({ticker.upper() for ticker in request.tickers})
+    cells = (len(request.pairs) if request.pairs else n_tickers ** 2) * -(-request.lookback_days // request.step)
+    if cells > CORRELATION_SERIES_MAX_CELLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The series has up to {cells} values; it must have at most {CORRELATION_SERIES_MAX_CELLS}. "
+                   "Use fewer tickers, pairs, a shorter lookback or a larger step"
+        )
+    try:
+        # Load enough history for the first window to end where the lookback starts
+        dates, tickers, returns = await run_blocking(
+            correlation_coefficient.load_returns_panel, request.tickers, request.lookback_days + request.window
+        )
+        if not tickers:
+            raise HTTPException(status_code=404, detail="No price data for the requested tickers")
+        series = correlation_coefficient.correlation_series(
+            dates, tickers, returns, request.method, request.window, request.halflife,
+            request.pairs, request.covariance, request.step
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    header = {
+        "tickers": tickers,
+        "method": request.method,
+        "window": request.window,
+        "halflife": request.halflife,
+        "covariance": request.covariance
+    }
+    
+    def next_lines():
+        return "".join(json.dumps(item) + "\n" for item in itertools.islice(series, 64))
+    
+    async def lines():
+        yield json.dumps(header) + "\n"
+        # The series is computed lazily; produce it in batches on the thread pool, off the event loop
+        while True:
+            batch = await run_blocking(next_lines)
+            if not batch:
+                break
+            yield batch
+    
+    # The series is computed while the body streams, so the concurrency slot is held there
+    return StreamingResponse(limit_stream("correlation-matrix", lines()), media_type="application/x-ndjson")
+
+class CorrelationIndexRequest(CorrelationMatrixRequest):
+    # Linkage for the cluster ordering: "average", "complete", "single" or "ward"
+    linkage: str = "average"
+    n_clusters: Optional[int] = None
+
+def get_cached_correlation_index(index_id: str):
+    """Look up a built correlation index or raise 404 so the client rebuilds it."""
+    index = correlation_index_cache.get(index_id)
+    if index is None:
+        raise HTTPException(status_code=404, detail=f"Correlation index {index_id} not found or expired; build it again")
+    return index
+
+@router.post("/stocks/correlation-index")
+@limit_concurrency("correlation-matrix")
+async def build_correlation_index(request: CorrelationIndexRequest):
+    """
+    Build (or reuse) a correlation index over a ticker universe.
+    
+    Returns the index id for neighbour and cluster queries, with the tickers and
+    matrix in hierarchical-cluster order for a heatmap.
+    """
+    try:
+        if isinstance(request.shrinkage, str) and request.shrinkage != "auto":
+            raise HTTPException(status_code=400, detail="shrinkage must be a number between 0 and 1 or 'auto'")
+        index_id, index, cached = await run_blocking(
+            correlation_index_cache.get_or_build,
+            request.tickers, request.lookback_days, request.shrinkage, request.linkage
+        )
+        return {
+            "index_id": index_id,
+            "cached": cached,
+            **index.summary(),
+            **index.clusters(request.n_clusters)
+        }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stocks/correlation-index/{index_id}/neighbors/{ticker}")
+async def get_correlation_neighbors(index_id: str, ticker: str, k: int = 10, least: bool = False):
+    """Top-k most (or, with least=true, least) correlated tickers from a built index."""
+    index = get_cached_correlation_index(index_id)
+    try:
+        neighbors = index.neighbors(ticker, k, least)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"{ticker} is not in correlation index {index_id}")
+    return {"index_id": index_id, "ticker": ticker.upper(), "least": least, "neighbors": neighbors}
+
+@router.get("/stocks/correlation-index/{index_id}/clusters")
+async def get_correlation_clusters(index_id: str, n_clusters: Optional[int] = None):
+    """Cluster ordering (and optional flat cluster labels) from a built index."""
+    index = get_cached_correlation_index(index_id)
+    return {"index_id": index_id, **index.summary(), **index.clusters(n_clusters)}
@@ -0,0 +1,362 @@
+"""
+Bulk synchronization of many tickers from yfinance into MongoDB.
+
+Tickers are split into chunks that are fetched with one multi-ticker
+yf.download call each. Chunks run on a bounded thread pool, back off when
+yfinance rate limits, and are written with unordered bulk_write. Jobs started
+from the API run in a background thread and are tracked in memory so their
+progress can be polled; the same code runs from the command line:
+
+    python -m app.services.bulk_sync --all --start 2024-01-01
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from uuid import uuid4
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, List
+import pandas as pd
+import yfinance as yf
+from ..database import db
+from ..config import (
+    BULK_SYNC_CHUNK_SIZE,
+    BULK_SYNC_MAX_WORKERS,
+    BULK_SYNC_MAX_RETRIES,
+    BULK_SYNC_DEFAULT_DAYS
+)
+from .yfinance_sync import YFinanceSync
+
+logger = logging.getLogger(__name__)
+
+TICKERS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'tickers.json')
+
+# Operations per bulk_write call
+WRITE_BATCH_SIZE = 1000
+# Finished jobs kept in memory for polling
+MAX_TRACKED_JOBS = 50
+# Base delay in seconds for rate limit backoff
+BACKOFF_SECONDS = 2.0
+
+
+def load_universe() -> List[str]:
+    """Load the full ticker universe from data/tickers.json."""
+    with open(TICKERS_FILE, 'r') as f:
+        return json.load(f)
+
+
+def to_yfinance_symbol(ticker: str) -> str:
+    """Map a stored ticker to its yfinance symbol (AACT_U -> AACT-U)."""
+    return ticker.upper().replace('_', '-')
+
+
+def _is_rate_limited(error) -> bool:
+    """Check whether a yfinance error (exception or message) is a rate limit."""
+    if type(error).__name__ == 'YFRateLimitError':
+        return True
+    message = str(error).lower()
+    return 'rate limit' in message or 'too many requests' in message
+
+
+def split_download(data: pd.DataFrame, symbols: Dict[str, str]) -> Dict[str, pd.DataFrame]:
+    """
+    Split a yf.download(..., group_by="ticker") frame into per-ticker frames.
+
+    Parameters:
+        data (DataFrame): Result of yf.download
+        symbols (dict): yfinance symbol -> stored ticker
+
+    Returns:
+        dict: Ticker -> frame in the MongoDB price schema (tickers without data are omitted)
+    """
+    frames = {}
+    if data is None or data.empty:
+        return frames
+
+    for symbol, ticker in symbols.items():
+        if isinstance(data.columns, pd.MultiIndex):
+            if symbol not in data.columns.get_level_values(0):
+                continue
+            ticker_data = data[symbol]
+        else:
+            ticker_data = data
+        ticker_data = ticker_data.dropna(subset=[c for c in ('Open', 'High', 'Low', 'Close') if c in ticker_data.columns])
+        if ticker_data.empty:
+            continue
+        ticker_data = ticker_data.copy()
+        ticker_data['Volume'] = ticker_data['Volume'].fillna(0)
+        frames[ticker] = YFinanceSync.normalize_yfinance_frame(ticker_data, ticker)
+    return frames
+
+
+def download_chunk(tickers: List[str], start_date: str, end_date: str,
+                   max_retries: int = BULK_SYNC_MAX_RETRIES) -> Dict[str, pd.DataFrame]:
+    """
+    Download daily bars for several tickers with one yf.download call.
+
+    Parameters:
+        tickers (list): Stored ticker symbols
+        start_date (str): First date to fetch, YYYY-MM-DD
+        end_date (str): Last date to fetch (inclusive), YYYY-MM-DD
+        max_retries (int): Retries of rate limited or missing tickers before giving up on them
+
+    Returns:
+        dict: Ticker -> frame in the MongoDB price schema (tickers without data are omitted)
+    """
+    symbols = {to_yfinance_symbol(t): t.upper() for t in tickers}
+    # yfinance treats end as exclusive
+    download_end = (datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    frames = {}
+    pending = dict(symbols)
+    for attempt in range(max_retries + 1):
+        rate_limited = False
+        try:
+            data = yf.download(
+                list(pending),
+                start=start_date,
+                end=download_end,
+                interval="1d",
+                auto_adjust=False,
+                group_by="ticker",
+                threads=False,
+                progress=False
+            )
+        except Exception as e:
+            if not _is_rate_limited(e):
+                raise
+            rate_limited = True
+        else:
+            frames.update(split_download(data, pending))
+            # yf.download logs per-symbol failures (rate limits included) instead of
+            # raising them, so symbols that came back missing or all-NaN are retried
+            pending = {symbol: ticker for symbol, ticker in pending.items() if ticker not in frames}
+
+        if not pending:
+            break
+        if attempt == max_retries:
+            if rate_limited and not frames:
+                raise RuntimeError(f"Rate limited by yfinance after {max_retries} retries")
+            logger.info(f"No data from yfinance for {len(pending)} tickers after {max_retries} retries")
+            break
+
+        delay = BACKOFF_SECONDS * (2 ** attempt) * (1 + random.random())
+        logger.warning(
+            f"yfinance rate limited or returned no data for {len(pending)} of {len(symbols)} tickers, "
+            f"retrying in {delay:.1f}s"
+        )
+        time.sleep(delay)
+
+    return frames
+
+
+def write_frames(frames: Dict[str, pd.DataFrame], synced_from: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Upsert downloaded frames with unordered bulk writes, skipping unchanged bars.
+
+    Parameters:
+        frames (dict): Ticker -> frame in the MongoDB price schema
+        synced_from (str): Explicit start date of the sync, recorded in the sync watermark
+
+    Returns:
+        dict: Ticker -> outcome ({"status": "updated", "rows": n} or {"status": "error", "error": msg})
+    """
+    if not frames:
+        return {}
+
+    collection = db.client["market"]["prices"]
+    docs = YFinanceSync.build_price_documents(pd.concat(list(frames.values()), ignore_index=True))
+    result = YFinanceSync.upsert_price_documents(collection, docs, batch_size=WRITE_BATCH_SIZE)
+
+    # _id is "TICKER_YYYY-MM-DD", so the ticker is everything before the last underscore
+    failed = {}
+    for doc_id, message in result["errors"].items():
+        failed.setdefault(doc_id.rsplit('_', 1)[0], message)
+
+    synced_from_date = datetime.strptime(synced_from, "%Y-%m-%d").date() if synced_from else None
+    outcomes = {}
+    for ticker, df in frames.items():
+        YFinanceSync.invalidate_cached_results(ticker)
+        if ticker in failed:
+            outcomes[ticker] = {"status": "error", "error": failed[ticker]}
+            continue
+        YFinanceSync.save_sync_state(ticker, min(df['date']), max(df['date']), synced_from_date)
+        outcomes[ticker] = {"status": "updated", "rows": len(df)}
+    return outcomes
+
+
+class BulkSyncJob:
+    """Progress and per-ticker outcomes of one bulk sync run."""
+
+    def __init__(self, tickers: List[str], start_date: str, end_date: str,
+                 chunk_size: int = BULK_SYNC_CHUNK_SIZE, explicit_start: bool = True):
+        self.job_id = uuid4().hex
+        self.tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        self.start_date = start_date
+        self.end_date = end_date
+        self.explicit_start = explicit_start
+        self.chunk_size = max(1, chunk_size)
+        self.chunks = [self.tickers[i:i + self.chunk_size] for i in range(0, len(self.tickers), self.chunk_size)]
+        self.status = "pending"
+        self.chunks_done = 0
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def record_chunk(self, outcomes: Dict[str, Dict[str, Any]]):
+        with self._lock:
+            self.results.update(outcomes)
+            self.chunks_done += 1
+
+    def to_dict(self, include_results: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            counts = {}
+            for outcome in self.results.values():
+                counts[outcome["status"]] = counts.get(outcome["status"], 0) + 1
+            summary = {
+                "job_id": self.job_id,
+                "status": self.status,
+                "start_date": self.start_date,
+                "end_date": self.end_date,
+                "tickers_total": len(self.tickers),
+                "tickers_done": len(self.results),
+                "chunks_total": len(self.chunks),
+                "chunks_done": self.chunks_done,
+                "progress": len(self.results) / len(self.tickers) if self.tickers else 1.0,
+                "counts": counts,
+                "error": self.error,
+                "created_at": self.created_at.isoformat(),
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None
+            }
+            if include_results:
+                summary["results"] = dict(self.results)
+            return summary
+
+
+_jobs: Dict[str, BulkSyncJob] = {}
+_jobs_lock = threading.Lock()
+
+
+def _sync_chunk(job: BulkSyncJob, chunk: List[str]) -> Dict[str, Dict[str, Any]]:
+    frames = download_chunk(chunk, job.start_date, job.end_date)
+    outcomes = write_frames(frames, job.start_date if job.explicit_start else None)
+    for ticker in chunk:
+        outcomes.setdefault(ticker, {"status": "no_data"})
+    return outcomes
+
+
+def run_bulk_sync(job: BulkSyncJob, max_workers: int = BULK_SYNC_MAX_WORKERS) -> BulkSyncJob:
+    """
+    Run a bulk sync job to completion on a bounded thread pool.
+
+    Parameters:
+        job (BulkSyncJob): Job describing the tickers and date range
+        max_workers (int): Chunks downloaded concurrently
+
+    Returns:
+        BulkSyncJob: The finished job
+    """
+    job.status = "running"
+    job.started_at = datetime.now()
+    logger.info(f"Bulk sync {job.job_id}: {len(job.tickers)} tickers in {len(job.chunks)} chunks "
+                f"from {job.start_date} to {job.end_date}")
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {executor.submit(_sync_chunk, job, chunk): chunk for chunk in job.chunks}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    outcomes = future.result()
+                except Exception as e:
+                    logger.error(f"Bulk sync chunk starting at {chunk[0]} failed: {str(e)}")
+                    outcomes = {ticker: {"status": "error", "error": str(e)} for ticker in chunk}
+                job.record_chunk(outcomes)
+        job.status = "completed"
+    except Exception as e:
+        logger.error(f"Bulk sync {job.job_id} failed: {str(e)}")
+        job.status = "failed"
+        job.error = str(e)
+    finally:
+        job.finished_at = datetime.now()
+    logger.info(f"Bulk sync {job.job_id} {job.status}: {job.to_dict()['counts']}")
+    return job
+
+
+def create_job(tickers: Optional[List[str]] = None, start_date: Optional[str] = None, end_date: Optional[str] = None,
+               chunk_size: int = BULK_SYNC_CHUNK_SIZE) -> BulkSyncJob:
+    """
+    Create a bulk sync job, defaulting to the whole universe and a short lookback.
+
+    Parameters:
+        tickers (list): Tickers to sync (None syncs every ticker in tickers.json)
+        start_date (str): Optional start date, defaults to BULK_SYNC_DEFAULT_DAYS before end_date
+        end_date (str): Optional end date, defaults to today
+        chunk_size (int): Tickers per yf.download call
+
+    Returns:
+        BulkSyncJob: The new job (not started)
+    """
+    if not tickers:
+        tickers = load_universe()
+    end_dt = datetime.strptime(end_date, "%Y-%m-%d") if end_date else datetime.now()
+    start_dt = datetime.strptime(start_date, "%Y-%m-%d") if start_date else end_dt - timedelta(days=BULK_SYNC_DEFAULT_DAYS)
+    if start_dt > end_dt:
+        raise ValueError(f"Start date {start_dt.date()} is after end date {end_dt.date()}")
+    return BulkSyncJob(tickers, start_dt.strftime("%Y-%m-%d"), end_dt.strftime("%Y-%m-%d"),
+                       chunk_size, explicit_start=start_date is not None)
+
+
+def start_job(job: BulkSyncJob, max_workers: int = BULK_SYNC_MAX_WORKERS) -> BulkSyncJob:
+    """Register a job and run it in a background thread."""
+    with _jobs_lock:
+        if len(_jobs) >= MAX_TRACKED_JOBS:
+            finished = sorted((j for j in _jobs.values() if j.status in ("completed", "failed")),
+                              key=lambda j: j.created_at)
+            for old in finished[:len(_jobs) - MAX_TRACKED_JOBS + 1]:
+                del _jobs[old.job_id]
+        _jobs[job.job_id] = job
+    threading.Thread(target=run_bulk_sync, args=(job, max_workers), daemon=True,
+                     name=f"bulk-sync-{job.job_id[:8]}").start()
+    return job
+
+
+def get_job(job_id: str) -> Optional[BulkSyncJob]:
+    """Look up a tracked job by id."""
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk sync daily bars from yfinance into MongoDB")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--tickers", nargs="+", help="Tickers to sync")
+    target.add_argument("--all", action="store_true", help="Sync every ticker in data/tickers.json")
+    parser.add_argument("--start", help=f"Start date YYYY-MM-DD (default: {BULK_SYNC_DEFAULT_DAYS} days before end)")
+    parser.add_argument("--end", help="End date YYYY-MM-DD (default: today)")
+    parser.add_argument("--chunk-size", type=int, default=BULK_SYNC_CHUNK_SIZE, help="Tickers per yfinance request")
+    parser.add_argument("--workers", type=int, default=BULK_SYNC_MAX_WORKERS, help="Concurrent yfinance requests")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    job = create_job(None if args.all else args.tickers, args.start, args.end, args.chunk_size)
+    run_bulk_sync(job, args.workers)
+
+    summary = job.to_dict(include_results=True)
+    for ticker, outcome in sorted(summary["results"].items()):
+        if outcome["status"] == "error":
+            print(f"{ticker}: {outcome['error']}")
+    print(json.dumps({k: v for k, v in summary.items() if k != "results"}, indent=2))
+    return 0 if job.status == "completed" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
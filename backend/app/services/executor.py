@@ -0,0 +1,143 @@
+"""
+Executors for blocking work called from async route handlers.
+
+pymongo, yfinance, requests and the NumPy/SciPy analysis code are all
+synchronous, so calling them directly from an ``async def`` handler blocks the
+event loop for every other request. ``run_blocking`` moves I/O-bound calls to a
+shared thread pool; ``run_cpu`` sends pure, picklable computations to a process
+pool when ANALYSIS_PROCESS_WORKERS > 0 (threads otherwise). ``limit_concurrency``
+caps how many requests of one endpoint run at the same time; ``limit_stream``
+does the same for the body of a streamed response.
+"""
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Optional
+from ..config import (
+    ANALYSIS_THREAD_WORKERS,
+    ANALYSIS_PROCESS_WORKERS,
+    ANALYSIS_MAX_CONCURRENCY,
+    ANALYSIS_ENDPOINT_LIMITS
+)
+
+logger = logging.getLogger(__name__)
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# (endpoint name, event loop) -> semaphore; semaphores must not be shared across loops
+_semaphores: Dict[tuple, asyncio.Semaphore] = {}
+
+
+def parse_endpoint_limits(value: str) -> Dict[str, int]:
+    """Parse "hurst=2,price-distribution=1" into {"hurst": 2, "price-distribution": 1}."""
+    limits = {}
+    for item in (value or "").split(","):
+        if "=" not in item:
+            continue
+        name, limit = item.split("=", 1)
+        try:
+            limits[name.strip()] = int(limit)
+        except ValueError:
+            logger.warning(f"Ignoring invalid endpoint limit: {item}")
+    return limits
+
+
+ENDPOINT_LIMITS = parse_endpoint_limits(ANALYSIS_ENDPOINT_LIMITS)
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    with _pool_lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(max_workers=ANALYSIS_THREAD_WORKERS, thread_name_prefix="analysis")
+        return _thread_pool
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """Return the shared process pool, or None when ANALYSIS_PROCESS_WORKERS is 0."""
+    global _process_pool
+    if ANALYSIS_PROCESS_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=ANALYSIS_PROCESS_WORKERS)
+        return _process_pool
+
+
+async def run_blocking(func: Callable, *args, **kwargs):
+    """Run a blocking (I/O-bound) call on the shared thread pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_thread_pool(), functools.partial(func, *args, **kwargs))
+
+
+async def run_cpu(func: Callable, *args, **kwargs):
+    """
+    Run a CPU-bound call on the process pool (or the thread pool if disabled).
+
+    func and its arguments must be picklable when the process pool is enabled,
+    so pass module-level functions and plain data, not database handles.
+    """
+    pool = get_process_pool()
+    if pool is None:
+        return await run_blocking(func, *args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+
+
+def get_semaphore(name: str) -> asyncio.Semaphore:
+    """Return the concurrency semaphore for an endpoint on the running loop."""
+    key = (name, asyncio.get_running_loop())
+    semaphore = _semaphores.get(key)
+    if semaphore is None:
+        semaphore = _semaphores.setdefault(key, asyncio.Semaphore(ENDPOINT_LIMITS.get(name, ANALYSIS_MAX_CONCURRENCY)))
+    return semaphore
+
+
+def limit_concurrency(name: str):
+    """
+    Decorator capping concurrent executions of an async route handler.
+
+    The limit comes from ANALYSIS_ENDPOINT_LIMITS (e.g. "hurst=2") and falls back
+    to ANALYSIS_MAX_CONCURRENCY. Extra requests wait for a free slot.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            async with get_semaphore(name):
+                return await handler(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def limit_stream(name: str, lines: AsyncIterator) -> AsyncIterator:
+    """
+    Hold an endpoint's concurrency slot while a streamed response body is produced.
+
+    limit_concurrency releases its slot when the handler returns, before the
+    body of a StreamingResponse runs, so streaming handlers wrap their body
+    generator with this instead. The slot is taken before the first item and
+    released, and the wrapped generator closed, when the stream ends or the
+    client disconnects.
+    """
+    async with get_semaphore(name):
+        try:
+            async for line in lines:
+                yield line
+        finally:
+            await lines.aclose()
+
+
+def shutdown_executors():
+    """Shut down the shared pools (called on application shutdown)."""
+    global _thread_pool, _process_pool
+    with _pool_lock:
+        if _thread_pool is not None:
+            _thread_pool.shutdown(wait=False)
+            _thread_pool = None
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False)
+            _process_pool = None
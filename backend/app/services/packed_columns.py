@@ -0,0 +1,171 @@
+"""
+Packed columnar wire format for price series.
+
+The price endpoints can answer with raw little-endian column arrays instead of
+one JSON object per bar, when a client asks for it with
+``Accept: application/x-price-columns`` or ``?format=packed``. The body is:
+
+    4 bytes   magic b"PCOL"
+    4 bytes   uint32 header length H
+    H bytes   UTF-8 JSON header, space-padded so the columns start 8-byte aligned:
+              {"version": 1, "rows": n, "columns": [{"name": "date", "dtype": "int64"}, ...], ...}
+    n * 8     bytes per column, in header order
+
+Dates are int64 epoch milliseconds, prices float64 with NaN for missing
+values and volume int64 (float64 when it has gaps). Browsers can view each
+column as a Float64Array/BigInt64Array without parsing. The body is streamed
+in slices and can be gzip- (or zstd-, when the zstandard package is installed)
+compressed, chosen by ``?compression=`` or the Accept-Encoding header.
+"""
+import json
+import zlib
+import struct
+import numpy as np
+from fastapi.responses import StreamingResponse
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+PACKED_MEDIA_TYPE = "application/x-price-columns"
+PACKED_MAGIC = b"PCOL"
+PACKED_VERSION = 1
+# Bytes per streamed slice of a column
+CHUNK_BYTES = 1 << 20
+FORMATS = ("json", "packed")
+
+
+def compressions():
+    """Content encodings this server can produce, preferred first."""
+    return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+def negotiate_format(format=None, accept=None):
+    """
+    Pick the response format from ?format= or the Accept header.
+
+    Returns:
+        str: "packed" or "json" (the default)
+    """
+    if format:
+        if format not in FORMATS:
+            raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+        return format
+    if accept and PACKED_MEDIA_TYPE in accept:
+        return "packed"
+    return "json"
+
+
+def negotiate_compression(compression=None, accept_encoding=None):
+    """
+    Pick the content encoding from ?compression= or the Accept-Encoding header.
+
+    Returns:
+        str or None: "zstd", "gzip" or None for an uncompressed body
+    """
+    if compression:
+        if compression == "none":
+            return None
+        if compression not in compressions():
+            raise ValueError(f"compression must be one of: none, {', '.join(compressions())}")
+        return compression
+    accepted = {item.split(";")[0].strip() for item in (accept_encoding or "").split(",")}
+    for encoding in compressions():
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def _wire_array(values):
+    """A column as a little-endian int64/float64 array."""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype("datetime64[ms]").astype(np.int64)
+    elif np.issubdtype(values.dtype, np.integer) or values.dtype == np.bool_:
+        values = values.astype(np.int64)
+    else:
+        values = values.astype(np.float64)
+    return values.astype(values.dtype.newbyteorder("<"), copy=False)
+
+
+def pack_columns(columns, metadata=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Encode equal-length columns in the packed format.
+
+    Parameters:
+        columns (dict): {name: array}, e.g. one ticker of load_price_columns
+        metadata (dict): Extra header fields (ticker, source, ...)
+        chunk_bytes (int): Size of the yielded slices of each column
+
+    Returns:
+        generator: bytes of the body, header first
+    """
+    arrays = {name: _wire_array(values) for name, values in columns.items()}
+    rows = {len(values) for values in arrays.values()}
+    if len(rows) > 1:
+        raise ValueError("All packed columns must have the same length")
+
+    header = dict(metadata or {})
+    header.update({
+        "version": PACKED_VERSION,
+        "rows": rows.pop() if rows else 0,
+        "columns": [{"name": name, "dtype": values.dtype.name} for name, values in arrays.items()]
+    })
+    encoded = json.dumps(header, default=str).encode()
+    encoded += b" " * (-(len(encoded) + 8) % 8)
+    yield PACKED_MAGIC + struct.pack("<I", len(encoded)) + encoded
+
+    for values in arrays.values():
+        buffer = memoryview(np.ascontiguousarray(values)).cast("B")
+        for start in range(0, len(buffer), chunk_bytes):
+            yield bytes(buffer[start:start + chunk_bytes])
+
+
+def unpack_columns(body):
+    """
+    Decode a packed (uncompressed) body.
+
+    Returns:
+        tuple: (header dict, {name: array})
+    """
+    if body[:4] != PACKED_MAGIC:
+        raise ValueError("Not a packed price columns body")
+    (header_length,) = struct.unpack("<I", body[4:8])
+    header = json.loads(body[8:8 + header_length])
+    offset = 8 + header_length
+    columns = {}
+    for column in header["columns"]:
+        dtype = np.dtype(column["dtype"]).newbyteorder("<")
+        columns[column["name"]] = np.frombuffer(body, dtype=dtype, count=header["rows"], offset=offset)
+        offset += header["rows"] * dtype.itemsize
+    return header, columns
+
+
+def compress_chunks(chunks, compression):
+    """Stream-compress body chunks with "gzip" or "zstd"; None passes them through."""
+    if compression is None:
+        yield from chunks
+        return
+    if compression == "zstd":
+        compressor = zstandard.ZstdCompressor().compressobj()
+    else:
+        # wbits=31 writes a gzip header and trailer
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def packed_response(columns, metadata=None, compression=None):
+    """StreamingResponse with columns in the packed format, optionally compressed."""
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if compression:
+        headers["Content-Encoding"] = compression
+    return StreamingResponse(
+        compress_chunks(pack_columns(columns, metadata), compression),
+        media_type=PACKED_MEDIA_TYPE,
+        headers=headers
+    )
@@ -3,10 +3,16 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Tuple, List
 from pymongo.database import Database
 from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from ..database import db
+from ..config import SYNC_OVERLAP_DAYS, SYNC_MIN_INTERVAL_MINUTES
+from ..stock_analysis_tools.data_utils import load_price_frame
+from ..stock_analysis_tools.frame_cache import prepared_frame_cache
+from ..stock_analysis_tools.backtest_store import backtest_result_store
+from .executor import run_blocking
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -19,6 +25,11 @@ console_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 logger.setLevel(logging.INFO)
 
+# Value fields stored on each price document
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+# Upserts sent per bulk_write call
+PRICE_WRITE_BATCH_SIZE = 1000
+
 class YFinanceSync:
     """
     Service to synchronize stock data between yfinance and MongoDB.
@@ -80,61 +91,14 @@ class YFinanceSync:
                 
             logger.info(f"Using date range for yfinance: {start_date} to {end_date}")
             
-            # Try a simpler approach first - get the ticker info
-            try:
-                ticker_obj = yf.Ticker(ticker)
-                # Just try to access the info to see if basic connectivity works
-                info = ticker_obj.info
-                logger.info(f"Successfully connected to yfinance API for {ticker}")
-                
-                # Now try to get history directly through the ticker object
-                ticker_data = ticker_obj.history(
-                    start=start_date,
-                    end=end_date,
-                    period="max"  # This ensures we get as much data as possible
-                    # Note: Removed progress parameter which isn't supported in newer versions
-                )
-            except Exception as ticker_error:
-                logger.warning(f"Error using Ticker approach: {ticker_error}. Trying download method.")
-                # Fall back to the download method with settings from your working script
-                ticker_data = yf.download(
-                    ticker,
-                    start=start_date,
-                    end=end_date,
-                    interval="1d",      # Force daily bars
-                    auto_adjust=False,  # Don't auto adjust
-                    progress=False      # Disable progress bar
-                )
+            # The HTTP calls block, so run them on the executor
+            ticker_data = await run_blocking(YFinanceSync.fetch_history, ticker, start_date, end_date)
             
             if ticker_data.empty:
                 logger.warning(f"No data found on yfinance for ticker: {ticker}")
                 return pd.DataFrame()
             
-            # Reset index to make Date a column
-            ticker_data = ticker_data.reset_index()
-            
-            # Handle potential MultiIndex columns
-            if isinstance(ticker_data.columns, pd.MultiIndex):
-                ticker_data.columns = [col[0] if isinstance(col, tuple) else col for col in ticker_data.columns]
-            
-            # Rename columns to match MongoDB schema
-            ticker_data = ticker_data.rename(columns={
-                'Date': 'date',
-                'Open': 'open',
-                'High': 'high',
-                'Low': 'low',
-                'Close': 'close',
-                'Volume': 'volume'
-            })
-            
-            # Ensure date is datetime
-            ticker_data['date'] = pd.to_datetime(ticker_data['date'])
-            
-            # Convert to date objects
-            ticker_data['date'] = ticker_data['date'].dt.date
-            
-            # Add ticker column
-            ticker_data['ticker'] = ticker.upper()
+            ticker_data = YFinanceSync.normalize_yfinance_frame(ticker_data, ticker)
             
             logger.info(f"Successfully fetched {len(ticker_data)} records from yfinance for {ticker}")
             return ticker_data
@@ -143,6 +107,85 @@ class YFinanceSync:
             logger.error(f"Error fetching yfinance data for {ticker}: {str(e)}")
             return pd.DataFrame()
 
+    @staticmethod
+    def fetch_history(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        Download raw daily bars from yfinance (blocking).
+        
+        Args:
+            ticker: Stock ticker symbol
+            start_date: Start date in format YYYY-MM-DD
+            end_date: End date in format YYYY-MM-DD
+            
+        Returns:
+            Frame as returned by Ticker.history or yf.download
+        """
+        # Try a simpler approach first - get the ticker info
+        try:
+            ticker_obj = yf.Ticker(ticker)
+            # Just try to access the info to see if basic connectivity works
+            info = ticker_obj.info
+            logger.info(f"Successfully connected to yfinance API for {ticker}")
+            
+            # Now try to get history directly through the ticker object
+            return ticker_obj.history(
+                start=start_date,
+                end=end_date,
+                period="max"  # This ensures we get as much data as possible
+                # Note: Removed progress parameter which isn't supported in newer versions
+            )
+        except Exception as ticker_error:
+            logger.warning(f"Error using Ticker approach: {ticker_error}. Trying download method.")
+            # Fall back to the download method with settings from your working script
+            return yf.download(
+                ticker,
+                start=start_date,
+                end=end_date,
+                interval="1d",      # Force daily bars
+                auto_adjust=False,  # Don't auto adjust
+                progress=False      # Disable progress bar
+            )
+
+    @staticmethod
+    def normalize_yfinance_frame(ticker_data: pd.DataFrame, ticker: str) -> pd.DataFrame:
+        """
+        Convert a yfinance history frame to the MongoDB price schema.
+        
+        Args:
+            ticker_data: Frame returned by Ticker.history or yf.download (Date index)
+            ticker: Stock ticker symbol stored on each row
+            
+        Returns:
+            DataFrame with date, open, high, low, close, volume and ticker columns
+        """
+        # Reset index to make Date a column
+        ticker_data = ticker_data.reset_index()
+        
+        # Handle potential MultiIndex columns
+        if isinstance(ticker_data.columns, pd.MultiIndex):
+            ticker_data.columns = [col[0] if isinstance(col, tuple) else col for col in ticker_data.columns]
+        
+        # Rename columns to match MongoDB schema
+        ticker_data = ticker_data.rename(columns={
+            'Date': 'date',
+            'Open': 'open',
+            'High': 'high',
+            'Low': 'low',
+            'Close': 'close',
+            'Volume': 'volume'
+        })
+        
+        # Ensure date is datetime
+        ticker_data['date'] = pd.to_datetime(ticker_data['date'])
+        
+        # Convert to date objects
+        ticker_data['date'] = ticker_data['date'].dt.date
+        
+        # Add ticker column
+        ticker_data['ticker'] = ticker.upper()
+        
+        return ticker_data
+
     @staticmethod
     async def get_mongodb_data(ticker: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> pd.DataFrame:
         """
@@ -159,46 +202,22 @@ class YFinanceSync:
         try:
             logger.info(f"Fetching {ticker} data from MongoDB")
             
-            # Build MongoDB query
-            query = {"ticker": ticker.upper()}
-            
-            # Add date filtering if provided
-            if start_date:
-                try:
-                    start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
-                    query["date"] = {"$gte": start_datetime}
-                except ValueError:
-                    logger.error(f"Invalid start_date format: {start_date}")
-                    return pd.DataFrame()
-                    
-            if end_date:
-                try:
-                    end_datetime = datetime.strptime(end_date, "%Y-%m-%d")
-                    if "date" in query:
-                        query["date"]["$lte"] = end_datetime
-                    else:
-                        query["date"] = {"$lte": end_datetime}
-                except ValueError:
-                    logger.error(f"Invalid end_date format: {end_date}")
-                    return pd.DataFrame()
-            
-            # Execute query on prices collection
-            market_db = db.client["market"]
-            cursor = market_db["prices"].find(query).sort("date", 1)
-            
-            # Convert to DataFrame
-            price_data = list(cursor)
+            # Load only the OHLCV columns from the prices collection
+            try:
+                df = await run_blocking(load_price_frame, ticker, start_date, end_date)
+            except ValueError as load_error:
+                logger.error(str(load_error))
+                return pd.DataFrame()
             
-            if not price_data:
+            if df.empty:
                 logger.warning(f"No price data found in MongoDB for ticker: {ticker}")
                 return pd.DataFrame()
             
-            # Convert to DataFrame
-            df = pd.DataFrame(price_data)
+            df = df.reset_index()
+            df['ticker'] = ticker.upper()
             
             # Ensure date column is datetime.date for comparison
-            if 'date' in df.columns and not df.empty:
-                df['date'] = pd.to_datetime(df['date']).dt.date
+            df['date'] = df['date'].dt.date
             
             logger.info(f"Successfully fetched {len(df)} records from MongoDB for {ticker}")
             return df
@@ -320,6 +339,128 @@ class YFinanceSync:
         logger.info("MongoDB and yfinance data match")
         return True, mongo_df
 
+    @staticmethod
+    def find_changed_rows(mongo_df: pd.DataFrame, yf_df: pd.DataFrame,
+                          price_epsilon: float = 0.01, volume_epsilon: float = 100) -> pd.DataFrame:
+        """
+        Return the yfinance rows that are missing from MongoDB or differ from it.
+        
+        Uses the same tolerances as compare_data, so only real revisions and new
+        bars are written back.
+        
+        Args:
+            mongo_df: DataFrame with MongoDB data (may be empty)
+            yf_df: DataFrame with yfinance data
+            price_epsilon: Allowed absolute difference for OHLC prices
+            volume_epsilon: Allowed absolute difference for volume
+            
+        Returns:
+            Subset of yf_df that should be upserted
+        """
+        if yf_df.empty or mongo_df.empty:
+            return yf_df
+        
+        value_columns = ['open', 'high', 'low', 'close', 'volume']
+        stored = mongo_df[['date'] + value_columns].drop_duplicates(subset=['date'])
+        merged = yf_df.merge(stored, on='date', how='left', suffixes=('', '_db'))
+        
+        changed = merged['close_db'].isna()
+        for col in ['open', 'high', 'low', 'close']:
+            changed |= (merged[col] - merged[f'{col}_db']).abs() > price_epsilon
+        changed |= (merged['volume'] - merged['volume_db']).abs() > volume_epsilon
+        
+        return yf_df[changed.to_numpy()]
+
+    @staticmethod
+    def build_price_documents(df: pd.DataFrame, ticker: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Build price document fields as column arrays in one vectorized pass.
+        
+        Args:
+            df: DataFrame with date, open, high, low, close and volume columns
+            ticker: Ticker for every row (defaults to the frame's ticker column)
+            
+        Returns:
+            Dict of equal-length arrays: _id ("TICKER_YYYY-MM-DD"), ticker, date
+            (midnight datetimes) and the typed PRICE_FIELDS
+        """
+        dates = pd.DatetimeIndex(pd.to_datetime(df['date']))
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+        days = dates.values.astype('datetime64[D]')
+        
+        if ticker is not None:
+            tickers = np.full(len(df), ticker.upper())
+        else:
+            tickers = df['ticker'].astype(str).str.upper().to_numpy(dtype=str)
+        
+        docs = {
+            "_id": np.char.add(np.char.add(tickers, "_"), np.datetime_as_string(days, unit='D')),
+            "ticker": tickers,
+            "date": days.astype('datetime64[us]')
+        }
+        for field in PRICE_FIELDS[:-1]:
+            docs[field] = pd.to_numeric(df[field], errors='coerce').to_numpy(dtype=np.float64)
+        docs["volume"] = pd.to_numeric(df["volume"], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+        return docs
+
+    @staticmethod
+    def upsert_price_documents(collection, docs: Dict[str, np.ndarray], skip_unchanged: bool = True,
+                               batch_size: int = PRICE_WRITE_BATCH_SIZE) -> Dict[str, Any]:
+        """
+        Upsert price documents in fixed-size unordered batches.
+        
+        For each batch the stored values are read with one $in query and rows
+        whose values are identical are not written.
+        
+        Args:
+            collection: The prices collection
+            docs: Column arrays from build_price_documents
+            skip_unchanged: Compare against stored documents before writing
+            batch_size: Documents per bulk_write call
+            
+        Returns:
+            Dict with written and skipped counts and write errors keyed by _id
+        """
+        written = 0
+        skipped = 0
+        errors = {}
+        projection = {field: 1 for field in PRICE_FIELDS}
+        
+        for offset in range(0, len(docs["_id"]), batch_size):
+            # tolist() converts whole columns to Python scalars at C speed
+            batch = {key: values[offset:offset + batch_size].tolist() for key, values in docs.items()}
+            ids = batch["_id"]
+            rows = list(zip(*(batch[field] for field in PRICE_FIELDS)))
+            
+            stored = {}
+            if skip_unchanged:
+                for existing in collection.find({"_id": {"$in": ids}}, projection):
+                    stored[existing["_id"]] = tuple(existing.get(field) for field in PRICE_FIELDS)
+            
+            operations = []
+            operation_ids = []
+            for doc_id, ticker, date, values in zip(ids, batch["ticker"], batch["date"], rows):
+                if stored.get(doc_id) == values:
+                    skipped += 1
+                    continue
+                doc = dict(zip(PRICE_FIELDS, values), _id=doc_id, ticker=ticker, date=date)
+                operations.append(UpdateOne({"_id": doc_id}, {"$set": doc}, upsert=True))
+                operation_ids.append(doc_id)
+            
+            if not operations:
+                continue
+            try:
+                collection.bulk_write(operations, ordered=False)
+                written += len(operations)
+            except BulkWriteError as e:
+                write_errors = e.details.get('writeErrors', [])
+                for write_error in write_errors:
+                    errors[operation_ids[write_error['index']]] = write_error.get('errmsg', 'write error')
+                written += len(operations) - len(write_errors)
+        
+        return {"written": written, "skipped": skipped, "errors": errors}
+
     @staticmethod
     async def update_mongodb(ticker: str, df: pd.DataFrame) -> bool:
         """
@@ -339,9 +480,6 @@ class YFinanceSync:
             
             logger.info(f"Updating MongoDB with {len(df)} records for {ticker}")
             
-            # Create a copy to avoid modifying the original DataFrame
-            df_copy = df.copy()
-            
             # Ensure ticker is uppercase
             ticker = ticker.upper()
             
@@ -349,101 +487,145 @@ class YFinanceSync:
             market_db = db.client["market"]
             collection = market_db["prices"]
             
-            # Prepare bulk operations with proper datetime handling
-            bulk_ops = []
-            batch_size = 500  # Process in batches to avoid memory issues
-            
-            for _, row in df_copy.iterrows():
-                # Convert date to datetime object for MongoDB
-                date_val = row['date']
-                if isinstance(date_val, datetime):
-                    dt = date_val
-                elif isinstance(date_val, pd.Timestamp):
-                    dt = date_val.to_pydatetime()
-                else:
-                    dt = pd.Timestamp(date_val).to_pydatetime()
-                
-                # Create a custom ID combining ticker and date for deduplication
-                doc_id = f"{ticker}_{dt.strftime('%Y-%m-%d')}"
-                
-                # Create document with proper data types
-                doc = {
-                    "_id": doc_id,
-                    "ticker": ticker,
-                    "date": dt,
-                    "open": float(row['open']),
-                    "high": float(row['high']),
-                    "low": float(row['low']),
-                    "close": float(row['close']),
-                    "volume": int(row['volume'])
-                }
-                
-                # Add operation to bulk write
-                bulk_ops.append(
-                    UpdateOne(
-                        {"_id": doc_id},  # Query by the custom ID
-                        {"$set": doc},    # Update or insert the document
-                        upsert=True       # Create if doesn't exist
-                    )
-                )
-                
-                # Execute batch if we've reached batch_size
-                if len(bulk_ops) >= batch_size:
-                    collection.bulk_write(bulk_ops, ordered=False)
-                    bulk_ops = []
+            docs = YFinanceSync.build_price_documents(df, ticker)
+            result = await run_blocking(YFinanceSync.upsert_price_documents, collection, docs)
             
-            # Execute any remaining operations
-            if bulk_ops:
-                collection.bulk_write(bulk_ops, ordered=False)
+            # Cached analysis frames and stored backtests for this ticker are now stale
+            if result["written"]:
+                await run_blocking(YFinanceSync.invalidate_cached_results, ticker)
             
-            logger.info(f"Successfully updated MongoDB with {len(df_copy)} records for {ticker}")
+            if result["errors"]:
+                logger.error(f"Failed to write {len(result['errors'])} records for {ticker}")
+                return False
+            
+            logger.info(f"Successfully updated MongoDB for {ticker}: {result['written']} written, "
+                        f"{result['skipped']} unchanged")
             return True
             
         except Exception as e:
+            # Some batches may already have been written
+            await run_blocking(YFinanceSync.invalidate_cached_results, ticker)
             logger.error(f"Error updating MongoDB for {ticker}: {str(e)}")
             return False
 
+    @staticmethod
+    def invalidate_cached_results(ticker: str) -> None:
+        """
+        Drop cached frames and stored backtests built from a ticker's bars.
+        
+        Also bumps the ticker's data watermark, which keys stored backtests.
+        
+        Args:
+            ticker: Stock ticker symbol whose bars were written
+        """
+        prepared_frame_cache.invalidate(ticker)
+        try:
+            backtest_result_store.invalidate_ticker(ticker)
+        except Exception as e:
+            logger.warning(f"Could not invalidate stored backtests for {ticker}: {str(e)}")
+
+    @staticmethod
+    def get_sync_state(ticker: str) -> Optional[Dict[str, Any]]:
+        """
+        Read the sync watermark for a ticker from market.sync_state.
+        
+        Args:
+            ticker: Stock ticker symbol
+            
+        Returns:
+            The state document, or None if the ticker was never synced
+        """
+        try:
+            return db.client["market"]["sync_state"].find_one({"_id": ticker.upper()})
+        except Exception as e:
+            logger.warning(f"Could not read sync state for {ticker}: {str(e)}")
+            return None
+
+    @staticmethod
+    def save_sync_state(ticker: str, first_date, last_date, synced_from=None) -> None:
+        """
+        Store the sync watermark for a ticker, widening any existing range.
+        
+        The watermark claims MongoDB holds every bar between first_date and
+        last_date, so the stored range is only widened by a range that overlaps
+        it or starts within SYNC_OVERLAP_DAYS of it. A disjoint range leaves the
+        watermark alone: requests before first_date then run a full sync, and
+        incremental syncs keep fetching everything after last_date.
+        
+        Args:
+            ticker: Stock ticker symbol
+            first_date: Earliest bar date written or verified in this sync
+            last_date: Latest bar date written or verified in this sync
+            synced_from: Earliest start date requested in a full sync
+        """
+        def to_datetime(value):
+            return datetime.combine(value, datetime.min.time())
+        
+        collection = db.client["market"]["sync_state"]
+        try:
+            state = collection.find_one({"_id": ticker.upper()}) or {}
+            stored_first, stored_last = state.get("first_date"), state.get("last_date")
+            new_first = to_datetime(first_date) if first_date is not None else None
+            new_last = to_datetime(last_date) if last_date is not None else None
+            
+            if stored_first is not None and stored_last is not None:
+                gap = timedelta(days=SYNC_OVERLAP_DAYS)
+                range_start = new_first if new_first is not None else new_last
+                range_end = new_last if new_last is not None else new_first
+                if range_start is not None and not (range_start <= stored_last + gap and
+                                                    range_end >= stored_first - gap):
+                    logger.info(f"Sync range of {ticker} does not adjoin its watermark "
+                                f"{stored_first.date()}..{stored_last.date()}, leaving it unchanged")
+                    new_first = new_last = synced_from = None
+            
+            update = {
+                "$set": {"ticker": ticker.upper(), "checked_at": datetime.now()},
+                "$min": {},
+                "$max": {}
+            }
+            if new_first is not None:
+                update["$min"]["first_date"] = new_first
+            if synced_from is not None:
+                update["$min"]["synced_from"] = to_datetime(synced_from)
+            if new_last is not None:
+                update["$max"]["last_date"] = new_last
+            update = {op: fields for op, fields in update.items() if fields}
+            
+            collection.update_one({"_id": ticker.upper()}, update, upsert=True)
+        except Exception as e:
+            logger.warning(f"Could not save sync state for {ticker}: {str(e)}")
+
     @classmethod
-    async def sync_ticker_data(cls, ticker: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
+    async def sync_ticker_data(cls, ticker: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                               incremental: bool = True) -> Dict[str, Any]:
         """
         Synchronize ticker data between yfinance and MongoDB.
         
+        When the ticker has a sync watermark covering start_date, only bars after
+        the watermark (plus SYNC_OVERLAP_DAYS for revisions) are fetched and only
+        changed rows are written. Otherwise the whole range is compared.
+        
         Args:
             ticker: Stock ticker symbol
             start_date: Optional start date in format YYYY-MM-DD
             end_date: Optional end date in format YYYY-MM-DD
+            incremental: Use the watermark when available (False forces a full sync)
             
         Returns:
             Dictionary with results of the sync operation
         """
         try:
-            # Step 1: Get data from both sources
-            mongo_df = await cls.get_mongodb_data(ticker, start_date, end_date)
-            yf_df = await cls.get_yfinance_data(ticker, start_date, end_date)
-            
-            # Step 2: Compare the data
-            are_identical, merged_df = await cls.compare_data(mongo_df, yf_df)
+            ticker = ticker.upper()
+            state = await run_blocking(cls.get_sync_state, ticker) if incremental else None
             
-            # Step 3: Update MongoDB if data is different
-            if not are_identical and not yf_df.empty:
-                updated = await cls.update_mongodb(ticker, merged_df)
-                
-                return {
-                    "ticker": ticker,
-                    "data_matched": False,
-                    "mongodb_updated": updated,
-                    "mongodb_records": len(mongo_df) if not mongo_df.empty else 0,
-                    "yfinance_records": len(yf_df) if not yf_df.empty else 0,
-                    "updated_records": len(merged_df) if not merged_df.empty else 0
-                }
+            if state and state.get("last_date"):
+                bounds = [d for d in (state.get("first_date"), state.get("synced_from")) if d is not None]
+                covered_from = min(bounds) if bounds else None
+                if start_date is None or (covered_from is not None and
+                                          datetime.strptime(start_date, "%Y-%m-%d") >= covered_from):
+                    return await cls._incremental_sync(ticker, end_date, state)
             
-            return {
-                "ticker": ticker,
-                "data_matched": are_identical,
-                "mongodb_updated": False,
-                "mongodb_records": len(mongo_df) if not mongo_df.empty else 0,
-                "yfinance_records": len(yf_df) if not yf_df.empty else 0
-            }
+            return await cls._full_sync(ticker, start_date, end_date)
             
         except Exception as e:
             logger.error(f"Error syncing ticker data for {ticker}: {str(e)}")
@@ -452,4 +634,98 @@ class YFinanceSync:
                 "error": str(e),
                 "data_matched": False,
                 "mongodb_updated": False
-            } 
\ No newline at end of file
+            }
+
+    @classmethod
+    async def _incremental_sync(cls, ticker: str, end_date: Optional[str], state: Dict[str, Any]) -> Dict[str, Any]:
+        """Fetch and upsert only the bars after the stored watermark."""
+        today = datetime.now().date()
+        last_date = state["last_date"].date()
+        target_end = min(datetime.strptime(end_date, "%Y-%m-%d").date(), today) if end_date else today
+        
+        # Nothing to do if the watermark already reaches the last business day of the request
+        last_business_day = pd.Timestamp(np.busday_offset(np.datetime64(target_end, 'D'), 0, roll='backward')).date()
+        if last_business_day <= last_date:
+            logger.info(f"{ticker} already synced through {last_date}, skipping yfinance")
+            return {"ticker": ticker, "mode": "skipped", "data_matched": True, "mongodb_updated": False,
+                    "last_date": last_date.isoformat()}
+        
+        # Avoid hitting yfinance on every analysis call while waiting for the next bar
+        checked_at = state.get("checked_at")
+        if checked_at and datetime.now() - checked_at < timedelta(minutes=SYNC_MIN_INTERVAL_MINUTES):
+            logger.info(f"{ticker} was checked at {checked_at}, skipping yfinance")
+            return {"ticker": ticker, "mode": "skipped", "data_matched": True, "mongodb_updated": False,
+                    "last_date": last_date.isoformat()}
+        
+        fetch_start = last_date - timedelta(days=SYNC_OVERLAP_DAYS)
+        # yfinance treats end as exclusive
+        fetch_end = min(target_end + timedelta(days=1), today)
+        
+        yf_df = await cls.get_yfinance_data(ticker, fetch_start.isoformat(), fetch_end.isoformat())
+        mongo_df = await cls.get_mongodb_data(ticker, fetch_start.isoformat(), target_end.isoformat())
+        changed_df = cls.find_changed_rows(mongo_df, yf_df)
+        
+        updated = False
+        if not changed_df.empty:
+            updated = await cls.update_mongodb(ticker, changed_df)
+            if not updated:
+                # Leave the watermark alone so the next call retries
+                return {"ticker": ticker, "mode": "incremental", "data_matched": False, "mongodb_updated": False,
+                        "yfinance_records": len(yf_df), "updated_records": 0}
+        
+        new_first = min(yf_df['date']) if not yf_df.empty else None
+        new_last = max(yf_df['date']) if not yf_df.empty else None
+        await run_blocking(cls.save_sync_state, ticker, new_first, new_last)
+        
+        logger.info(f"Incremental sync for {ticker}: {len(yf_df)} bars fetched, {len(changed_df)} written")
+        return {
+            "ticker": ticker,
+            "mode": "incremental",
+            "data_matched": changed_df.empty,
+            "mongodb_updated": updated,
+            "mongodb_records": len(mongo_df) if not mongo_df.empty else 0,
+            "yfinance_records": len(yf_df) if not yf_df.empty else 0,
+            "updated_records": len(changed_df),
+            "last_date": max(last_date, new_last).isoformat() if new_last else last_date.isoformat()
+        }
+
+    @classmethod
+    async def _full_sync(cls, ticker: str, start_date: Optional[str], end_date: Optional[str]) -> Dict[str, Any]:
+        """Compare the whole requested range and record a watermark afterwards."""
+        # Step 1: Get data from both sources
+        mongo_df = await cls.get_mongodb_data(ticker, start_date, end_date)
+        yf_df = await cls.get_yfinance_data(ticker, start_date, end_date)
+        
+        # Step 2: Compare the data
+        are_identical, merged_df = await cls.compare_data(mongo_df, yf_df)
+        
+        # Step 3: Update MongoDB if data is different
+        updated = False
+        if not are_identical and not yf_df.empty:
+            updated = await cls.update_mongodb(ticker, merged_df)
+        
+        # Step 4: Record what MongoDB now holds so later syncs can be incremental
+        stored_df = merged_df if updated else mongo_df
+        if (are_identical or updated) and not stored_df.empty and 'date' in stored_df.columns:
+            synced_from = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+            await run_blocking(cls.save_sync_state, ticker, min(stored_df['date']), max(stored_df['date']), synced_from)
+        
+        if not are_identical and not yf_df.empty:
+            return {
+                "ticker": ticker,
+                "mode": "full",
+                "data_matched": False,
+                "mongodb_updated": updated,
+                "mongodb_records": len(mongo_df) if not mongo_df.empty else 0,
+                "yfinance_records": len(yf_df) if not yf_df.empty else 0,
+                "updated_records": len(merged_df) if not merged_df.empty else 0
+            }
+        
+        return {
+            "ticker": ticker,
+            "mode": "full",
+            "data_matched": are_identical,
+            "mongodb_updated": False,
+            "mongodb_records": len(mongo_df) if not mongo_df.empty else 0,
+            "yfinance_records": len(yf_df) if not yf_df.empty else 0
+        }
@@ -0,0 +1,569 @@
+"""
+Backtesting engine for single-ticker strategies.
+
+Strategies turn OHLCV arrays into entry and exit signals with vectorized NumPy
+operations. The engine then steps from one trade to the next: each position
+scans forward only until its exit (exit signal, stop loss, take profit,
+holding limit or end of data), so a run is linear in the number of bars.
+Equity comes from cumulative sums of cash and share changes, and drawdown and
+Sharpe ratio are computed from the equity array.
+
+Fills: signals are evaluated on the bar's close. Entries fill at that close
+(or at the bar's open for strategies that trade the open, such as gapAndGo),
+exit signals and holding limits fill at the close, and stops fill at the stop
+level, or at the open when the bar gaps through it. When a bar reaches both the
+stop and the target, the stop is assumed to have been hit first.
+"""
+import numpy as np
+from scipy.signal import lfilter
+from .volatility import rolling_mean, rolling_variance
+from .consecutive_analysis import compute_streaks
+from .next_day_stats import daily_changes, threshold_moves
+
+TRADING_DAYS = 252
+REBALANCE_FREQUENCIES = ("none", "weekly", "monthly", "quarterly")
+
+
+def _crossed_above(a, b):
+    """Bars where a moves from at or below b to above it."""
+    a = np.asarray(a, dtype=float)
+    b = np.broadcast_to(np.asarray(b, dtype=float), a.shape)
+    result = np.zeros(len(a), dtype=bool)
+    with np.errstate(invalid="ignore"):
+        result[1:] = (a[1:] > b[1:]) & (a[:-1] <= b[:-1])
+    return result
+
+
+def _signals(n, entries=None, exits=None, entry_on_open=False, max_hold=None):
+    """Signal dict consumed by run_backtest."""
+    return {
+        "entries": np.zeros(n, dtype=np.int8) if entries is None else np.asarray(entries, dtype=np.int8),
+        "exits": np.zeros(n, dtype=bool) if exits is None else np.asarray(exits, dtype=bool),
+        "entry_on_open": entry_on_open,
+        "max_hold": max_hold
+    }
+
+
+def _int_param(params, name, default, minimum=1):
+    """Integer strategy parameter, rejecting values below minimum."""
+    value = int(params.get(name, default))
+    if value < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    return value
+
+
+def relative_strength_index(close, period=14):
+    """Wilder's RSI; NaN until period changes are available."""
+    if period < 1:
+        raise ValueError("RSI period must be at least 1")
+    close = np.asarray(close, dtype=float)
+    out = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return out
+    change = np.diff(close)
+    gains = np.maximum(change, 0.0)
+    losses = np.maximum(-change, 0.0)
+
+    # Wilder smoothing is an EMA with alpha = 1 / period, seeded with a simple mean
+    alpha = 1.0 / period
+    averages = []
+    for values in (gains, losses):
+        seed = values[:period].mean()
+        smoothed, _ = lfilter([alpha], [1, alpha - 1], values[period:], zi=[(1 - alpha) * seed])
+        averages.append(np.concatenate([[seed], smoothed]))
+    avg_gain, avg_loss = averages
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+    out[period:] = rsi
+    return out
+
+
+def moving_average_crossover(data, params):
+    """Long when the fast SMA crosses above the slow SMA, exit when it crosses back below."""
+    close = data["close"]
+    fast = rolling_mean(close, _int_param(params, "fastPeriod", 20))
+    slow = rolling_mean(close, _int_param(params, "slowPeriod", 50))
+    return _signals(len(close), _crossed_above(fast, slow), _crossed_above(slow, fast))
+
+
+def bollinger_breakout(data, params):
+    """Long when the close breaks above the upper Bollinger band, exit below the middle band."""
+    close = data["close"]
+    # The band width needs a variance, so at least two bars
+    period = _int_param(params, "period", 20, minimum=2)
+    width = float(params.get("stdDev", 2))
+    middle = rolling_mean(close, period)
+    upper = middle + width * np.sqrt(rolling_variance(close, period))
+    return _signals(len(close), _crossed_above(close, upper), _crossed_above(middle, close))
+
+
+def rsi_oversold(data, params):
+    """Long while RSI is below the oversold level, exit once it rises above overbought."""
+    close = data["close"]
+    rsi = relative_strength_index(close, _int_param(params, "period", 14))
+    with np.errstate(invalid="ignore"):
+        entries = rsi < float(params.get("oversoldLevel", 30))
+        exits = rsi > float(params.get("overboughtLevel", 70))
+    return _signals(len(close), entries, exits)
+
+
+def volume_breakout(data, params):
+    """
+    Long when volume exceeds a multiple of its trailing average while the close
+    makes a new lookback high; exit when the close falls below its lookback SMA.
+    """
+    close, volume = data["close"], data.get("volume")
+    if volume is None:
+        raise ValueError("volumeBreakout needs volume data")
+    lookback = _int_param(params, "lookbackPeriod", 20)
+    multiplier = float(params.get("volumeMultiplier", 2))
+    n = len(close)
+
+    # Trailing statistics of the previous lookback bars, excluding the current one
+    prior_volume = np.full(n, np.nan)
+    prior_high = np.full(n, np.nan)
+    if n > lookback:
+        prior_volume[lookback:] = rolling_mean(volume, lookback)[lookback - 1:-1]
+        prior_high[lookback:] = np.lib.stride_tricks.sliding_window_view(close, lookback).max(axis=1)[:-1]
+
+    with np.errstate(invalid="ignore"):
+        entries = (volume > multiplier * prior_volume) & (close > prior_high)
+        exits = close < rolling_mean(close, lookback)
+    return _signals(n, entries, exits)
+
+
+def gap_and_go(data, params):
+    """Trade opening gaps of at least gapSize percent in the gap direction, flat by the close."""
+    open_, close = data["open"], data["close"]
+    gap_size = float(params.get("gapSize", 1.5)) / 100
+    direction = params.get("gapDirection", "up")
+
+    gap = np.full(len(close), np.nan)
+    gap[1:] = open_[1:] / close[:-1] - 1
+    entries = np.zeros(len(close), dtype=np.int8)
+    with np.errstate(invalid="ignore"):
+        if direction in ("up", "both"):
+            entries[gap >= gap_size] = 1
+        if direction in ("down", "both"):
+            entries[gap <= -gap_size] = -1
+    return _signals(len(close), entries, np.ones(len(close), dtype=bool), entry_on_open=True)
+
+
+def streak_reversal(data, params):
+    """
+    Fade a run of consecutive moves: after streakDays down (or up) closes, go
+    long (or short) and hold for up to holdDays bars.
+    """
+    close = data["close"]
+    direction = params.get("direction", "down")
+    streak_days = _int_param(params, "streakDays", 3)
+    changes = daily_changes(close)
+    with np.errstate(invalid="ignore"):
+        is_target_day = changes < 0 if direction == "down" else changes > 0
+    # Exactly streak_days so each run triggers once
+    streaks = compute_streaks(is_target_day)
+    side = 1 if direction == "down" else -1
+    entries = np.where(streaks == streak_days, side, 0)
+    return _signals(len(close), entries, max_hold=_int_param(params, "holdDays", 5))
+
+
+def threshold_reversal(data, params):
+    """
+    Fade large daily moves: after a close-to-close drop (or gain) of at least
+    threshold percent, go long (or short) and hold for up to holdDays bars.
+    """
+    close = data["close"]
+    direction = params.get("direction", "down")
+    moves = threshold_moves(close, float(params.get("threshold", 3)) / 100, direction)
+    side = 1 if direction == "down" else -1
+    return _signals(len(close), np.where(moves, side, 0), max_hold=_int_param(params, "holdDays", 5))
+
+
+STRATEGIES = {
+    "movingAverageCrossover": moving_average_crossover,
+    "bollingerBreakout": bollinger_breakout,
+    "rsiOversold": rsi_oversold,
+    "volumeBreakout": volume_breakout,
+    "gapAndGo": gap_and_go,
+    "streakReversal": streak_reversal,
+    "thresholdReversal": threshold_reversal
+}
+
+
+def _find_stop(data, side, first_bar, last_bar, entry_price, stop_loss, take_profit, entered_on_open):
+    """
+    First bar in [first_bar, last_bar] where the stop or target is reached.
+
+    Returns:
+        tuple: (bar, fill price, reason) or None if neither level is reached
+    """
+    window = slice(first_bar, last_bar + 1)
+    high, low, open_ = data["high"][window], data["low"][window], data["open"][window]
+    if side > 0:
+        stop = entry_price * (1 - stop_loss)
+        target = entry_price * (1 + take_profit)
+        stop_hit = low <= stop if stop_loss > 0 else np.zeros(len(low), dtype=bool)
+        target_hit = high >= target if take_profit > 0 else np.zeros(len(high), dtype=bool)
+    else:
+        stop = entry_price * (1 + stop_loss)
+        target = entry_price * (1 - take_profit)
+        stop_hit = high >= stop if stop_loss > 0 else np.zeros(len(high), dtype=bool)
+        target_hit = low <= target if take_profit > 0 else np.zeros(len(low), dtype=bool)
+
+    hit = stop_hit | target_hit
+    if not hit.any():
+        return None
+    k = int(np.argmax(hit))
+    bar = first_bar + k
+    # The open of an entry bar is the entry itself, so it cannot gap through a level
+    can_gap = not (entered_on_open and k == 0)
+    if stop_hit[k]:
+        gapped = can_gap and (open_[k] <= stop if side > 0 else open_[k] >= stop)
+        return bar, float(open_[k] if gapped else stop), "stop_loss"
+    gapped = can_gap and (open_[k] >= target if side > 0 else open_[k] <= target)
+    return bar, float(open_[k] if gapped else target), "take_profit"
+
+
+def run_backtest(dates, data, signals, initial_capital=10000.0, position_size=1.0, stop_loss=0.02, take_profit=0.05,
+                 fractional=False):
+    """
+    Simulate one position at a time from strategy signals.
+
+    Parameters:
+        dates (np.ndarray): datetime64 bar dates
+        data (dict): "open", "high", "low", "close" (and optionally "volume") arrays
+        signals (dict): Output of a strategy function
+        initial_capital (float): Starting cash
+        position_size (float): Fraction of current capital committed per trade
+        stop_loss (float): Stop distance as a fraction of the entry price (0 disables)
+        take_profit (float): Target distance as a fraction of the entry price (0 disables)
+        fractional (bool): Allow fractional share counts instead of whole shares
+
+    Returns:
+        tuple: (list of round-trip trade dicts, equity array aligned with dates)
+    """
+    close = data["close"]
+    open_ = data["open"]
+    n = len(close)
+    entries = signals["entries"]
+    on_open = signals["entry_on_open"]
+    max_hold = signals["max_hold"]
+
+    # Next bar at or after each position with an exit signal (n when there is none)
+    exit_bars = np.where(signals["exits"], np.arange(n), n)
+    next_exit = np.append(np.minimum.accumulate(exit_bars[::-1])[::-1], n)
+    entry_bars = np.flatnonzero(entries)
+
+    cash_delta = np.zeros(n)
+    share_delta = np.zeros(n)
+    capital = float(initial_capital)
+    trades = []
+    earliest = 0
+
+    while True:
+        k = np.searchsorted(entry_bars, earliest)
+        if k >= len(entry_bars):
+            break
+        bar = int(entry_bars[k])
+        side = int(entries[bar])
+        earliest = bar + 1
+        price = float(open_[bar] if on_open else close[bar])
+        first_live = bar if on_open else bar + 1
+        if first_live >= n or not np.isfinite(price) or price <= 0:
+            continue
+        shares = capital * position_size / price
+        if not fractional:
+            shares = int(shares)
+        if shares <= 0:
+            continue
+
+        # Without a stop, the position ends on the exit signal, holding limit or last bar
+        exit_bar, reason = n - 1, "end_of_data"
+        if next_exit[first_live] < n:
+            exit_bar, reason = int(next_exit[first_live]), "signal"
+        if max_hold is not None and bar + max_hold < exit_bar:
+            exit_bar, reason = bar + max_hold, "max_hold"
+        exit_price = float(close[exit_bar])
+        stopped = _find_stop(data, side, first_live, exit_bar, price, stop_loss, take_profit, on_open)
+        if stopped is not None:
+            exit_bar, exit_price, reason = stopped
+
+        profit = side * shares * (exit_price - price)
+        capital += profit
+        share_delta[bar] += side * shares
+        share_delta[exit_bar] -= side * shares
+        cash_delta[bar] -= side * shares * price
+        cash_delta[exit_bar] += side * shares * exit_price
+        trades.append({
+            "side": side,
+            "entry_bar": bar,
+            "exit_bar": exit_bar,
+            "entry_price": price,
+            "exit_price": exit_price,
+            "shares": shares,
+            "profit": profit,
+            "return_pct": 100 * side * (exit_price - price) / price,
+            "reason": reason
+        })
+        earliest = exit_bar + 1
+
+    equity = initial_capital + np.cumsum(cash_delta) + np.cumsum(share_delta) * close
+    return trades, equity
+
+
+def performance_metrics(equity, trades, initial_capital, trading_days=TRADING_DAYS):
+    """
+    Summary statistics of a backtest in one pass over the equity array.
+
+    Returns:
+        dict: totalReturn, finalCapital, winRate, profitFactor (None when there are
+              winning but no losing trades), maxDrawdown, sharpeRatio, totalTrades,
+              plus the drawdown array in percent
+    """
+    final_capital = float(equity[-1]) if len(equity) else float(initial_capital)
+    peaks = np.maximum.accumulate(np.concatenate([[initial_capital], equity]))[1:]
+    drawdown = 100 * (1 - equity / peaks)
+
+    returns = np.diff(np.concatenate([[initial_capital], equity])) / np.concatenate([[initial_capital], equity[:-1]])
+    std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    sharpe = float(returns.mean() / std * np.sqrt(trading_days)) if std > 0 else 0.0
+
+    profits = np.array([trade["profit"] for trade in trades])
+    gross_profit = profits[profits > 0].sum()
+    gross_loss = -profits[profits < 0].sum()
+    if gross_loss > 0:
+        profit_factor = float(gross_profit / gross_loss)
+    else:
+        profit_factor = None if gross_profit > 0 else 0.0
+
+    return {
+        "totalReturn": 100 * (final_capital - initial_capital) / initial_capital,
+        "finalCapital": final_capital,
+        "winRate": float(100 * (profits > 0).mean()) if len(profits) else 0.0,
+        "profitFactor": profit_factor,
+        "maxDrawdown": float(drawdown.max()) if len(drawdown) else 0.0,
+        "sharpeRatio": sharpe,
+        "totalTrades": len(trades),
+        "drawdown": drawdown
+    }
+
+
+def _trade_rows(trades, date_strings):
+    """Entry and exit rows in the shape the backtest page lists them."""
+    rows = []
+    for trade in trades:
+        long = trade["side"] > 0
+        ticker = {"ticker": trade["ticker"]} if "ticker" in trade else {}
+        rows.append({
+            **ticker,
+            "date": date_strings[trade["entry_bar"]],
+            "type": "BUY" if long else "SHORT",
+            "price": trade["entry_price"],
+            "shares": trade["shares"],
+            "cost": trade["shares"] * trade["entry_price"],
+            "profit": 0,
+            "returnPct": 0
+        })
+        rows.append({
+            **ticker,
+            "date": date_strings[trade["exit_bar"]],
+            "type": "SELL" if long else "COVER",
+            "price": trade["exit_price"],
+            "shares": trade["shares"],
+            "cost": 0,
+            "profit": trade["profit"],
+            "returnPct": trade["return_pct"],
+            "reason": trade["reason"]
+        })
+    return rows
+
+
+def run_strategy_backtest(dates, data, strategy_type, strategy_params=None, initial_capital=10000.0,
+                          position_size=1.0, stop_loss=0.02, take_profit=0.05):
+    """
+    Run a named strategy over price arrays and format the result for the API.
+
+    Parameters:
+        dates (np.ndarray): datetime64 bar dates
+        data (dict): "open", "high", "low", "close" and "volume" arrays
+        strategy_type (str): Key of STRATEGIES
+        strategy_params (dict): Strategy parameters (see each strategy function)
+        initial_capital, position_size, stop_loss, take_profit: see run_backtest
+
+    Returns:
+        dict: Performance metrics, equityCurve and trades
+    """
+    strategy = STRATEGIES.get(strategy_type)
+    if strategy is None:
+        raise ValueError(f"Unknown strategy_type: {strategy_type}. Use one of {', '.join(STRATEGIES)}")
+    if len(data["close"]) < 2:
+        raise ValueError("At least two bars are needed to backtest")
+
+    signals = strategy(data, strategy_params or {})
+    trades, equity = run_backtest(dates, data, signals, initial_capital, position_size, stop_loss, take_profit)
+    return _format_result(strategy_type, initial_capital, dates, equity, trades)
+
+
+def _format_result(strategy_type, initial_capital, dates, equity, trades):
+    """Metrics, equity curve and trade rows in the /backtest-strategy response shape."""
+    metrics = performance_metrics(equity, trades, initial_capital)
+    drawdown = metrics.pop("drawdown")
+
+    date_strings = np.datetime_as_string(np.asarray(dates, dtype="datetime64[D]"), unit="D").tolist()
+    rows = _trade_rows(trades, date_strings)
+    # Stable, so each entry stays ahead of a same-day exit
+    rows.sort(key=lambda row: row["date"])
+    return {
+        "strategy": strategy_type,
+        "initialCapital": float(initial_capital),
+        **metrics,
+        "equityCurve": [
+            {"date": day, "value": float(value), "drawdown": float(dd)}
+            for day, value, dd in zip(date_strings, equity, drawdown)
+        ],
+        "trades": rows
+    }
+
+
+def rebalance_starts(dates, frequency="monthly"):
+    """
+    Bar positions where portfolio sleeves are reset to their target weights.
+
+    The first bar always starts a period; after that the first bar of each new
+    calendar week, month or quarter does. Rebalancing happens at that bar's close.
+    """
+    if frequency not in REBALANCE_FREQUENCIES:
+        raise ValueError(f"Unknown rebalance frequency: {frequency}. Use one of {', '.join(REBALANCE_FREQUENCIES)}")
+    if frequency == "none":
+        return np.array([0])
+    if frequency == "weekly":
+        # Weeks starting on Monday (1970-01-01 was a Thursday)
+        periods = (np.asarray(dates, dtype="datetime64[D]").astype(np.int64) + 3) // 7
+    else:
+        periods = np.asarray(dates, dtype="datetime64[M]").astype(np.int64)
+        if frequency == "quarterly":
+            periods = periods // 3
+    return np.concatenate([[0], np.flatnonzero(np.diff(periods)) + 1])
+
+
+def rebalanced_sleeves(growth, weights, starts, initial_capital):
+    """
+    Dollar value of each strategy sleeve when sleeves are reset to target weights.
+
+    Between rebalances each sleeve grows with its own strategy; at every period
+    start the portfolio value is redistributed by weight. Period starting values
+    are a cumulative product of period growth, so all bars are scaled at once.
+
+    Parameters:
+        growth (np.ndarray): (dates x tickers) sleeve equity per unit of starting capital
+        weights (np.ndarray): Target weight per ticker, summing to 1
+        starts (np.ndarray): Period start positions from rebalance_starts
+        initial_capital (float): Starting portfolio value
+
+    Returns:
+        tuple: ((dates x tickers) sleeve values, (dates x tickers) dollars per unit of
+                sleeve growth in force on each bar)
+    """
+    period = np.searchsorted(starts, np.arange(len(growth)), side="right") - 1
+    anchor = growth[starts]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # A sleeve that has lost everything stays at zero
+        period_growth = np.where(anchor[:-1] > 0, growth[starts[1:]] / anchor[:-1], 0.0)
+        start_values = initial_capital * np.concatenate([[1.0], np.cumprod(period_growth @ weights)])
+        scale = np.where(anchor > 0, start_values[:, None] * weights / anchor, 0.0)[period]
+    return scale * growth, scale
+
+
+def _portfolio_weights(tickers, weights=None):
+    """Target weights in ticker order, normalized to sum to 1; equal when none are given."""
+    if not weights:
+        return np.full(len(tickers), 1.0 / len(tickers))
+    lookup = {ticker.upper(): float(weight) for ticker, weight in weights.items()}
+    target = np.array([lookup.get(ticker, 0.0) for ticker in tickers])
+    if (target < 0).any() or target.sum() <= 0:
+        raise ValueError("weights must be non-negative and not all zero")
+    return target / target.sum()
+
+
+def run_portfolio_backtest(dates, panels, tickers, strategy_type, strategy_params=None, initial_capital=10000.0,
+                           position_size=1.0, stop_loss=0.02, take_profit=0.05, weights=None, rebalance="monthly"):
+    """
+    Run one strategy on every ticker of an aligned panel as weighted sleeves of one portfolio.
+
+    Each ticker trades its own sleeve with fractional shares, on the dates it has
+    bars. Sleeves start at their target weights and are reset to them at every
+    rebalance; portfolio equity, drawdown and each trade's dollar profit come from
+    (dates x tickers) array operations over the sleeves' unit equity curves.
+
+    Parameters:
+        dates (np.ndarray): datetime64 panel dates
+        panels (dict): {field: (dates x tickers) array} from load_price_panels, NaN where
+            a ticker has no bar
+        tickers (list): Tickers matching the panel columns
+        weights (dict): Optional {ticker: weight}; equal weights by default
+        rebalance (str): One of REBALANCE_FREQUENCIES
+        strategy_type, strategy_params, initial_capital, position_size, stop_loss, take_profit:
+            see run_strategy_backtest
+
+    Returns:
+        dict: run_strategy_backtest's result for the whole portfolio, with a ticker on
+              every trade row, plus the weights, rebalance frequency and per-ticker sleeves
+    """
+    strategy = STRATEGIES.get(strategy_type)
+    if strategy is None:
+        raise ValueError(f"Unknown strategy_type: {strategy_type}. Use one of {', '.join(STRATEGIES)}")
+    if len(dates) < 2 or not tickers:
+        raise ValueError("At least two bars and one ticker are needed to backtest")
+    target = _portfolio_weights(tickers, weights)
+    starts = rebalance_starts(dates, rebalance)
+
+    n, k = len(dates), len(tickers)
+    growth = np.ones((n, k))
+    trades = []
+    for j, ticker in enumerate(tickers):
+        valid = np.isfinite(panels["close"][:, j])
+        bars = np.flatnonzero(valid)
+        if len(bars) < 2:
+            continue
+        data = {field: panel[bars, j] for field, panel in panels.items()}
+        ticker_trades, equity = run_backtest(
+            dates[bars], data, strategy(data, strategy_params or {}), 1.0,
+            position_size, stop_loss, take_profit, fractional=True
+        )
+        # Hold each sleeve's value over dates where the ticker has no bar
+        position = np.cumsum(valid) - 1
+        growth[:, j] = np.where(position >= 0, equity[np.maximum(position, 0)], 1.0)
+        for trade in ticker_trades:
+            trades.append(dict(
+                trade, ticker=ticker, column=j,
+                entry_bar=int(bars[trade["entry_bar"]]), exit_bar=int(bars[trade["exit_bar"]])
+            ))
+
+    sleeves, scale = rebalanced_sleeves(growth, target, starts, initial_capital)
+    equity = sleeves.sum(axis=1)
+
+    # Dollar profit per bar: unit equity change times the scale in force since the previous bar
+    scale_before = np.vstack([scale[:1], scale[:-1]])
+    cumulative_profit = np.cumsum(scale_before * np.diff(growth, axis=0, prepend=np.ones((1, k))), axis=0)
+    for trade in trades:
+        j = trade.pop("column")
+        before = cumulative_profit[trade["entry_bar"] - 1, j] if trade["entry_bar"] > 0 else 0.0
+        trade["profit"] = float(cumulative_profit[trade["exit_bar"], j] - before)
+        trade["shares"] = float(trade["shares"] * scale[trade["entry_bar"], j])
+    trades.sort(key=lambda trade: (trade["entry_bar"], trade["ticker"]))
+
+    result = _format_result(strategy_type, initial_capital, dates, equity, trades)
+    result["rebalance"] = rebalance
+    result["weights"] = dict(zip(tickers, target.tolist()))
+    result["symbols"] = [
+        {
+            "ticker": ticker,
+            "weight": float(target[j]),
+            "strategyReturn": float(100 * (growth[-1, j] - 1)),
+            "finalValue": float(sleeves[-1, j]),
+            "totalTrades": sum(1 for trade in trades if trade["ticker"] == ticker)
+        }
+        for j, ticker in enumerate(tickers)
+    ]
+    return result
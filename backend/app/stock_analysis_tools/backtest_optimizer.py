@@ -0,0 +1,270 @@
+"""
+Parameter sweeps and walk-forward optimization for backtests.
+
+The price columns of every ticker in a sweep are loaded once and packed into a
+single shared-memory block (SharedPricePanel), so process-pool workers read
+the prices by block name instead of receiving a pickled copy per task. Work is
+split into chunks of (ticker, strategy parameters) tasks; a worker computes the
+strategy signals once per task and replays them through the backtest engine
+for every stop-loss/take-profit pair and walk-forward window. Signals only look
+backwards, so slicing them to a window needs no separate warm-up.
+"""
+import math
+import itertools
+from multiprocessing import shared_memory
+import numpy as np
+from .backtest import STRATEGIES, run_backtest, performance_metrics
+
+PANEL_FIELDS = ("open", "high", "low", "close", "volume")
+SUMMARY_METRICS = ("totalReturn", "sharpeRatio", "maxDrawdown", "winRate", "profitFactor", "totalTrades")
+OBJECTIVES = ("sharpeRatio", "totalReturn", "profitFactor", "winRate", "maxDrawdown")
+# Chunks per worker: enough to balance uneven tasks without much scheduling overhead
+CHUNKS_PER_WORKER = 4
+
+
+class SharedPricePanel:
+    """
+    Price columns of several tickers in one shared-memory block.
+
+    Rows are PANEL_FIELDS and each ticker occupies a contiguous range of
+    columns. The process that creates the panel owns the block and frees it
+    with close(); workers attach with SharedPricePanel.attach(spec).
+    """
+
+    def __init__(self, shm, offsets, owner=False):
+        self._shm = shm
+        self.offsets = offsets
+        self.owner = owner
+        total = max((end for _, end in offsets.values()), default=0)
+        self.values = np.ndarray((len(PANEL_FIELDS), total), dtype=np.float64, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, columns):
+        """
+        Copy price columns into a new shared block.
+
+        Parameters:
+            columns (dict): {ticker: {field: array}} as returned by load_price_columns
+        """
+        offsets = {}
+        position = 0
+        for ticker, ticker_columns in columns.items():
+            offsets[ticker] = (position, position + len(ticker_columns["close"]))
+            position += len(ticker_columns["close"])
+        shm = shared_memory.SharedMemory(create=True, size=max(len(PANEL_FIELDS) * position * 8, 1))
+        panel = cls(shm, offsets, owner=True)
+        for ticker, (start, end) in offsets.items():
+            for row, field in enumerate(PANEL_FIELDS):
+                values = columns[ticker].get(field)
+                panel.values[row, start:end] = np.nan if values is None else values
+        return panel
+
+    @classmethod
+    def attach(cls, spec):
+        """Open a panel created elsewhere from its spec()."""
+        return cls(shared_memory.SharedMemory(name=spec["name"]), spec["offsets"])
+
+    def spec(self):
+        """Picklable description of the block for workers."""
+        return {"name": self._shm.name, "offsets": self.offsets}
+
+    def columns(self, ticker):
+        """{field: array} views of one ticker's prices."""
+        start, end = self.offsets[ticker]
+        return {field: self.values[row, start:end] for row, field in enumerate(PANEL_FIELDS)}
+
+    def close(self):
+        """Detach from the block; the owner also frees it."""
+        self.values = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # Views are still referenced (e.g. by a traceback); the mapping goes with them
+            pass
+        if self.owner:
+            self._shm.unlink()
+
+
+def grid_size(param_grid):
+    """Number of combinations expand_grid would build, without building them."""
+    return math.prod(len(v) if isinstance(v, (list, tuple)) else 1 for v in (param_grid or {}).values())
+
+
+def expand_grid(param_grid):
+    """
+    Cartesian product of strategy parameter values.
+
+    Parameters:
+        param_grid (dict): {parameter name: list of values}; a scalar is a single value
+
+    Returns:
+        list: Strategy parameter dicts
+    """
+    param_grid = param_grid or {}
+    names = list(param_grid)
+    values = [v if isinstance(v, (list, tuple)) else [v] for v in param_grid.values()]
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def walk_forward_splits(n_bars, train_bars, test_bars, step=None, anchored=False):
+    """
+    Train/test windows rolled forward over a series.
+
+    Parameters:
+        n_bars (int): Length of the series
+        train_bars (int): Bars in each training window
+        test_bars (int): Bars in each test window, which starts right after training
+        step (int): Bars between consecutive splits (defaults to test_bars)
+        anchored (bool): Start every training window at the first bar
+
+    Returns:
+        list: (train_start, train_end, test_end) bar positions; ends are exclusive
+    """
+    if train_bars < 2 or test_bars < 1:
+        raise ValueError("Walk-forward windows need at least 2 training bars and 1 test bar")
+    step = step or test_bars
+    if step < 1:
+        raise ValueError("Walk-forward step must be at least 1")
+    splits = []
+    start = 0
+    while start + train_bars + test_bars <= n_bars:
+        splits.append((0 if anchored else start, start + train_bars, start + train_bars + test_bars))
+        start += step
+    return splits
+
+
+def sweep_chunks(tasks, n_workers, chunks_per_worker=CHUNKS_PER_WORKER):
+    """Split tasks into about n_workers * chunks_per_worker contiguous chunks."""
+    n_chunks = max(1, min(len(tasks), n_workers * chunks_per_worker))
+    size = -(-len(tasks) // n_chunks)
+    return [tasks[i:i + size] for i in range(0, len(tasks), size)]
+
+
+def _window_metrics(data, signals, start, end, initial_capital, position_size, stop_loss, take_profit):
+    """Backtest one bar window of precomputed signals and keep the summary metrics."""
+    window = {field: values[start:end] for field, values in data.items()}
+    window_signals = dict(signals, entries=signals["entries"][start:end], exits=signals["exits"][start:end])
+    trades, equity = run_backtest(None, window, window_signals, initial_capital, position_size, stop_loss, take_profit)
+    metrics = performance_metrics(equity, trades, initial_capital)
+    return {name: metrics[name] for name in SUMMARY_METRICS}
+
+
+def evaluate_task(data, ticker, strategy_type, params, exit_pairs, initial_capital=10000.0,
+                  position_size=1.0, walk_forward=None):
+    """
+    Evaluate one ticker and strategy parameter set for every exit pair.
+
+    Parameters:
+        data (dict): The ticker's price arrays
+        exit_pairs (list): (stop_loss, take_profit) fractions
+        walk_forward (dict): Optional walk_forward_splits keyword arguments
+
+    Returns:
+        list: Result dicts with "metrics" for the whole range, or per-window
+              "splits" [{"train": metrics, "test": metrics}] with walk_forward
+    """
+    signals = STRATEGIES[strategy_type](data, params)
+    n = len(data["close"])
+    splits = walk_forward_splits(n, **walk_forward) if walk_forward else None
+    results = []
+    for stop_loss, take_profit in exit_pairs:
+        costs = (initial_capital, position_size, stop_loss, take_profit)
+        result = {"ticker": ticker, "params": params, "stop_loss": stop_loss, "take_profit": take_profit}
+        if splits is None:
+            result["metrics"] = _window_metrics(data, signals, 0, n, *costs)
+        else:
+            result["splits"] = [
+                {
+                    "train": _window_metrics(data, signals, train_start, train_end, *costs),
+                    "test": _window_metrics(data, signals, train_end, test_end, *costs)
+                }
+                for train_start, train_end, test_end in splits
+            ]
+        results.append(result)
+    return results
+
+
+def evaluate_chunk(spec, tasks, strategy_type, exit_pairs, initial_capital=10000.0,
+                   position_size=1.0, walk_forward=None):
+    """
+    Worker entry point: evaluate (ticker, params) tasks against a shared panel.
+
+    Parameters:
+        spec (dict): SharedPricePanel.spec() of the sweep's prices
+        tasks (list): (ticker, strategy params) pairs
+
+    Returns:
+        list: evaluate_task results for all tasks in order
+    """
+    panel = SharedPricePanel.attach(spec)
+    try:
+        results = []
+        for ticker, params in tasks:
+            results.extend(evaluate_task(
+                panel.columns(ticker), ticker, strategy_type, params, exit_pairs,
+                initial_capital, position_size, walk_forward
+            ))
+        return results
+    finally:
+        panel.close()
+
+
+def objective_score(metrics, objective="sharpeRatio"):
+    """Score where higher is better; no losing trades counts as an infinite profit factor."""
+    value = metrics.get(objective)
+    if value is None:
+        return np.inf if objective == "profitFactor" else -np.inf
+    return -value if objective == "maxDrawdown" else value
+
+
+def rank_results(results, objective="sharpeRatio", top_n=10):
+    """Top full-range results per ticker by objective."""
+    by_ticker = {}
+    for result in results:
+        by_ticker.setdefault(result["ticker"], []).append(result)
+    return {
+        ticker: sorted(ticker_results, key=lambda r: objective_score(r["metrics"], objective), reverse=True)[:top_n]
+        for ticker, ticker_results in by_ticker.items()
+    }
+
+
+def walk_forward_summary(results, objective="sharpeRatio", split_dates=None):
+    """
+    Out-of-sample performance of walk-forward results.
+
+    For every ticker and window the combination with the best training score is
+    chosen and its test metrics reported; the test returns are compounded into
+    one out-of-sample return.
+
+    Parameters:
+        split_dates (dict): Optional {ticker: [(train_start, test_start, test_end) date labels]}
+
+    Returns:
+        dict: {ticker: {"windows": [...], "outOfSampleReturn": percent}}
+    """
+    best = {}
+    for result in results:
+        for k, split in enumerate(result["splits"]):
+            score = objective_score(split["train"], objective)
+            key = (result["ticker"], k)
+            if key not in best or score > best[key][0]:
+                best[key] = (score, result)
+
+    summary = {}
+    for (ticker, k), (_, result) in sorted(best.items()):
+        window = {
+            "split": k,
+            "params": result["params"],
+            "stop_loss": result["stop_loss"],
+            "take_profit": result["take_profit"],
+            "train": result["splits"][k]["train"],
+            "test": result["splits"][k]["test"]
+        }
+        if split_dates and ticker in split_dates:
+            window["train_start"], window["test_start"], window["test_end"] = split_dates[ticker][k]
+        summary.setdefault(ticker, {"windows": []})["windows"].append(window)
+
+    for ticker_summary in summary.values():
+        growth = np.prod([1 + w["test"]["totalReturn"] / 100 for w in ticker_summary["windows"]])
+        ticker_summary["outOfSampleReturn"] = float(100 * (growth - 1))
+    return summary
@@ -0,0 +1,202 @@
+"""
+Persisted, content-addressed backtest results.
+
+A run is stored in market.backtest_results under a hash of everything that
+determines its output: strategy and parameters, tickers, date range, sizing,
+exits, portfolio settings, BACKTEST_ENGINE_VERSION and the data watermark of
+every ticker. The watermark is a per-ticker counter in market.sync_state that
+YFinanceSync and the bulk sync bump whenever they write bars (invalidate_ticker),
+which also marks the stored runs for that ticker as stale; they stay listed as
+the user's history but no new request matches them. Because the watermark is part
+of the key, a run computed from bars that changed while it was running is stored
+under a key no later request produces.
+
+Metrics are stored as plain fields for listing and comparing; the full result
+(equity curve, trades, ...) is zlib-compressed JSON.
+"""
+import json
+import zlib
+import hashlib
+import threading
+from datetime import datetime
+from bson import Binary
+from .data_utils import get_mongo_client
+from ..config import BACKTEST_STORE_ENABLED
+
+# Bump when engine changes alter results, so older stored runs stop matching
+BACKTEST_ENGINE_VERSION = 1
+# Stay below MongoDB's 16 MB document limit
+MAX_PAYLOAD_BYTES = 15 * 1024 * 1024
+METRIC_FIELDS = ("totalReturn", "finalCapital", "winRate", "profitFactor", "maxDrawdown", "sharpeRatio", "totalTrades")
+
+
+class BacktestResultStore:
+    """Backtest results in MongoDB, keyed by their inputs and data watermarks."""
+
+    def __init__(self, db_name="market", collection_name="backtest_results", enabled=True):
+        self.db_name = db_name
+        self.collection_name = collection_name
+        self.enabled = enabled
+        self._indexes_ensured = False
+        self._indexes_lock = threading.Lock()
+
+    @property
+    def collection(self):
+        collection = get_mongo_client()[self.db_name][self.collection_name]
+        # Index the list_runs and invalidate_ticker filters once per process
+        if not self._indexes_ensured:
+            with self._indexes_lock:
+                if not self._indexes_ensured:
+                    collection.create_index("tickers")
+                    collection.create_index("users")
+                    collection.create_index([("created_at", -1)])
+                    self._indexes_ensured = True
+        return collection
+
+    @property
+    def sync_state(self):
+        return get_mongo_client()[self.db_name]["sync_state"]
+
+    def data_watermarks(self, tickers):
+        """{ticker: data version} from market.sync_state; 0 for tickers never written by a sync."""
+        tickers = sorted({t.upper() for t in tickers})
+        versions = {ticker: 0 for ticker in tickers}
+        for state in self.sync_state.find({"_id": {"$in": tickers}}, {"data_version": 1}):
+            versions[state["_id"]] = state.get("data_version", 0)
+        return versions
+
+    @staticmethod
+    def make_key(inputs, watermarks):
+        """
+        Content address of a run.
+
+        Parameters:
+            inputs (dict): JSON-serializable request settings (strategy, params, tickers, dates, ...)
+            watermarks (dict): data_watermarks() of the run's tickers
+        """
+        document = {"inputs": inputs, "watermarks": watermarks, "engine": BACKTEST_ENGINE_VERSION}
+        return hashlib.sha1(json.dumps(document, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, run_id, username=None):
+        """Return a stored result by id (None if unknown), only among the user's runs when username is given."""
+        query = {"_id": run_id}
+        if username:
+            query["users"] = username
+        document = self.collection.find_one(query)
+        if document is None:
+            return None
+        return json.loads(zlib.decompress(document["payload"]))
+
+    def claim(self, run_id, username=None):
+        """
+        Return a stored result by id (None if unknown) for a backtest the user just
+        requested, adding the run to the user's runs.
+        """
+        update = {"$set": {"last_used_at": datetime.now()}}
+        if username:
+            update["$addToSet"] = {"users": username}
+        document = self.collection.find_one_and_update({"_id": run_id}, update)
+        if document is None:
+            return None
+        return json.loads(zlib.decompress(document["payload"]))
+
+    def put(self, run_id, inputs, watermarks, result, username=None):
+        """
+        Store a result under its id.
+
+        Returns:
+            bool: False when the compressed result is too large to store
+        """
+        payload = zlib.compress(json.dumps(result).encode())
+        if len(payload) > MAX_PAYLOAD_BYTES:
+            return False
+        now = datetime.now()
+        document = {
+            "strategy": inputs.get("strategy_type"),
+            "tickers": sorted({t.upper() for t in inputs.get("tickers", [])}),
+            "inputs": inputs,
+            "watermarks": watermarks,
+            "engine": BACKTEST_ENGINE_VERSION,
+            "metrics": {name: result.get(name) for name in METRIC_FIELDS},
+            "stale": False,
+            "created_at": now,
+            "payload_bytes": len(payload),
+            "payload": Binary(payload)
+        }
+        # Storing the same key again (e.g. two users computing it at once) keeps its users
+        update = {"$setOnInsert": document, "$set": {"last_used_at": now}}
+        if username:
+            update["$addToSet"] = {"users": username}
+        else:
+            document["users"] = []
+        self.collection.update_one({"_id": run_id}, update, upsert=True)
+        return True
+
+    def list_runs(self, username=None, ticker=None, strategy=None, limit=50, include_stale=True):
+        """Stored runs, newest first, without their compressed results."""
+        query = {}
+        if not include_stale:
+            query["stale"] = {"$ne": True}
+        if username:
+            query["users"] = username
+        if ticker:
+            query["tickers"] = ticker.upper()
+        if strategy:
+            query["strategy"] = strategy
+        cursor = self.collection.find(query, {"payload": 0, "users": 0}).sort("created_at", -1).limit(limit)
+        return [self._summary(document) for document in cursor]
+
+    def compare(self, run_ids, include_curves=False, username=None):
+        """
+        Metrics of several runs side by side, in the requested order, only among
+        the user's runs when username is given.
+
+        Returns:
+            list: Run summaries (with equityCurve when include_curves) for the ids found
+        """
+        projection = None if include_curves else {"payload": 0}
+        query = {"_id": {"$in": list(run_ids)}}
+        if username:
+            query["users"] = username
+        documents = {d["_id"]: d for d in self.collection.find(query, projection)}
+        runs = []
+        for run_id in run_ids:
+            document = documents.get(run_id)
+            if document is None:
+                continue
+            summary = self._summary(document)
+            if include_curves:
+                summary["equityCurve"] = json.loads(zlib.decompress(document["payload"]))["equityCurve"]
+            runs.append(summary)
+        return runs
+
+    def invalidate_ticker(self, ticker):
+        """
+        Bump a ticker's data watermark and mark the stored runs that used its bars as stale.
+
+        Returns:
+            int: Number of runs newly marked stale
+        """
+        ticker = ticker.upper()
+        self.sync_state.update_one({"_id": ticker}, {"$inc": {"data_version": 1}}, upsert=True)
+        return self.collection.update_many(
+            {"tickers": ticker, "stale": {"$ne": True}},
+            {"$set": {"stale": True, "stale_at": datetime.now()}}
+        ).modified_count
+
+    @staticmethod
+    def _summary(document):
+        return {
+            "run_id": document["_id"],
+            "strategy": document.get("strategy"),
+            "tickers": document.get("tickers", []),
+            "inputs": document.get("inputs", {}),
+            "metrics": document.get("metrics", {}),
+            "stale": document.get("stale", False),
+            "created_at": document.get("created_at"),
+            "last_used_at": document.get("last_used_at")
+        }
+
+
+# Shared instance used by the backtest routes and the sync services
+backtest_result_store = BacktestResultStore(enabled=BACKTEST_STORE_ENABLED)
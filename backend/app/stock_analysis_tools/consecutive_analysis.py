@@ -3,7 +3,27 @@ import pandas as pd
 import numpy as np
 from collections import defaultdict
 from datetime import datetime
-from .data_utils import read_and_prepare_data
+from .data_utils import read_and_prepare_data, load_price_columns, get_collection
+
+# Tickers loaded per query when scanning the universe
+SCAN_BATCH_SIZE = 200
+
+
+def compute_streaks(is_target_day):
+    """
+    Length of the current run of target days at each position (0 on other days).
+    
+    Parameters:
+        is_target_day (array-like): Boolean flags per day
+        
+    Returns:
+        numpy.ndarray: Streak length per day
+    """
+    target = np.asarray(is_target_day, dtype=bool)
+    positions = np.arange(len(target))
+    # Position of the latest non-target day at or before each day (-1 if none)
+    last_break = np.maximum.accumulate(np.where(target, -1, positions))
+    return np.where(target, positions - last_break, 0)
 
 
 def analyze_consecutive_patterns(df, min_days=2, max_days=10):
@@ -30,86 +50,63 @@ def analyze_consecutive_patterns(df, min_days=2, max_days=10):
     movement = df["is_target_day"].fillna(False)
     
     # Count consecutive days with the same movement
-    df["streak"] = 0
-    current_streak = 0
+    streak = compute_streaks(movement.to_numpy(dtype=bool))
+    df["streak"] = streak
     
-    # Safely iterate and update streak column
-    try:
-        for i in range(len(df)):
-            if movement.iloc[i]:  # If this is a target day (up or down)
-                current_streak += 1
-            else:
-                current_streak = 0
-            df.iloc[i, df.columns.get_loc("streak")] = current_streak
-    except Exception as e:
-        print(f"Error while calculating streaks: {e}")
+    # Make sure all required columns exist
+    if "date" not in df.columns or "daily_return" not in df.columns:
+        print(f"Missing required columns in dataframe")
         return {}
     
+    # Plain arrays so follow-on days can be gathered by position
+    n_rows = len(df)
+    dates = df["date"].tolist()
+    returns = df["daily_return"].to_numpy(dtype=float)
+    same_direction = movement.to_numpy(dtype=bool)
+    offsets = np.arange(1, 6)
+    
     # Analyze streaks of different lengths
     for n_days in range(min_days, max_days + 1):
         # Find days that end a streak of exactly n_days
-        streak_ends = df[df["streak"] == n_days].index
+        ends = np.flatnonzero(streak == n_days)
         
-        if len(streak_ends) == 0:
+        if len(ends) == 0:
             print(f"No {n_days}-day streaks found")
             continue
             
-        print(f"Found {len(streak_ends)} {n_days}-day streaks")
+        print(f"Found {len(ends)} {n_days}-day streaks")
         
-        # Store information about what happens after these streaks
-        sequences = []
+        # Only streaks followed by at least one more day
+        ends = ends[ends + 1 < n_rows]
+        if len(ends) == 0:
+            continue
         
-        # Convert index to integer positions for safe manipulation
-        try:
-            idx_positions = [df.index.get_loc(idx) for idx in streak_ends]
-        except Exception as e:
-            print(f"Error getting index positions: {e}")
-            # Try an alternative approach for non-standard indices
-            idx_positions = []
-            for i, idx in enumerate(df.index):
-                if idx in streak_ends:
-                    idx_positions.append(i)
-            
-            if len(idx_positions) == 0:
-                print(f"Could not find positions for streak ends, skipping {n_days}-day analysis")
-                continue
+        # Positions of the next 5 days of every streak; the mask drops those past the end
+        future = ends[:, None] + offsets
+        available = future < n_rows
+        future = np.minimum(future, n_rows - 1)
+        future_returns = returns[future].tolist()
+        future_same = same_direction[future].tolist()
         
-        for pos in idx_positions:
-            try:
-                if pos + 1 < len(df):  # Make sure there's at least one more day
-                    next_pos = pos + 1
-                    
-                    # Make sure all required columns exist and are valid
-                    if "date" not in df.columns or "daily_return" not in df.columns:
-                        print(f"Missing required columns in dataframe")
-                        continue
-                    
-                    # Record information about this sequence
-                    sequence = {
-                        "end_date": df.iloc[pos]["date"],  # Date of the nth consecutive day
-                        "next_day_return": float(df.iloc[next_pos]["daily_return"]),
-                        "next_day_same_direction": bool(df.iloc[next_pos]["is_target_day"]),
-                        "next_5_days": []
+        # Store information about what happens after these streaks
+        sequences = []
+        for row, pos in enumerate(ends.tolist()):
+            sequences.append({
+                "end_date": dates[pos],  # Date of the nth consecutive day
+                "next_day_return": future_returns[row][0],
+                "next_day_same_direction": future_same[row][0],
+                "next_5_days": [
+                    {
+                        "day": day,
+                        "date": dates[pos + day],
+                        "return": future_returns[row][day - 1],
+                        "same_direction": future_same[row][day - 1]
                     }
-                    
-                    # Get the next 5 days data (if available)
-                    for i in range(1, 6):
-                        if pos + i < len(df):
-                            future_pos = pos + i
-                            sequence["next_5_days"].append({
-                                "day": i,
-                                "date": df.iloc[future_pos]["date"],
-                                "return": float(df.iloc[future_pos]["daily_return"]),
-                                "same_direction": bool(df.iloc[future_pos]["is_target_day"])
-                            })
-                    
-                    sequences.append(sequence)
-            except Exception as seq_error:
-                print(f"Error processing sequence at position {pos}: {seq_error}")
-                continue
+                    for day in range(1, int(available[row].sum()) + 1)
+                ]
+            })
         
-        if sequences:  # Only add to results if we found valid sequences
-            results[n_days] = sequences
+        results[n_days] = sequences
     
     return results
 
@@ -210,6 +207,146 @@ def calculate_continuation_probabilities(consecutive_moves):
     return probabilities
 
 
+def scan_consecutive_moves(tickers=None, direction="down", min_days=2, max_days=10, streak_days=None,
+                           date_from=None, date_to=None, min_occurrences=5, batch_size=SCAN_BATCH_SIZE):
+    """
+    Rank tickers currently on a consecutive up/down streak by how often such
+    streaks continued in their own history.
+    
+    Closes are loaded in batches with one query each, and every batch is
+    analyzed as one flat array (streaks reset at ticker boundaries), so the
+    per-ticker statistics match analyze_consecutive_patterns and
+    calculate_continuation_probabilities.
+    
+    Parameters:
+        tickers (list): Tickers to scan (default: every ticker in market.prices)
+        direction (str): "up" for price increases, "down" for price drops
+        min_days (int): Shortest current streak to report
+        max_days (int): Longest streak length with its own statistics; longer
+                        current streaks use the max_days statistics
+        streak_days (int): Only report tickers whose current streak has this length
+        date_from (str): Optional start date for analysis (YYYY-MM-DD)
+        date_to (str): Optional end date for analysis (YYYY-MM-DD)
+        min_occurrences (int): Minimum historical streaks for a ticker to be ranked
+        batch_size (int): Tickers loaded per query
+        
+    Returns:
+        dict: Scan summary and the ranked list of streaking tickers
+    """
+    if direction.lower() not in ["up", "down"]:
+        raise ValueError("Direction must be either 'up' or 'down'")
+    direction = direction.lower()
+    
+    if tickers is None:
+        tickers = sorted(get_collection().distinct("ticker"))
+    tickers = [ticker.upper() for ticker in tickers]
+    
+    ranked = []
+    scanned = 0
+    for i in range(0, len(tickers), batch_size):
+        columns = load_price_columns(tickers[i:i + batch_size], date_from, date_to, fields=("close",))
+        batch_results, batch_scanned = _scan_batch(columns, direction, min_days, max_days, streak_days)
+        ranked.extend(batch_results)
+        scanned += batch_scanned
+    
+    ranked = [entry for entry in ranked if entry["count"] >= min_occurrences]
+    ranked.sort(key=lambda entry: (-entry["next_day_probability"], -entry["count"], entry["ticker"]))
+    
+    return {
+        "direction": direction,
+        "tickers_requested": len(tickers),
+        "tickers_scanned": scanned,
+        "streaking": len(ranked),
+        "results": ranked
+    }
+
+
+def _scan_batch(columns, direction, min_days, max_days, streak_days=None):
+    """Streak statistics for one batch of {ticker: {"date", "close"}} columns."""
+    names, closes, dates = [], [], []
+    for ticker, ticker_columns in columns.items():
+        close = ticker_columns["close"]
+        keep = np.isfinite(close)
+        if keep.sum() < 2:
+            continue
+        names.append(ticker)
+        closes.append(close[keep])
+        dates.append(ticker_columns["date"][keep])
+    if not names:
+        return [], 0
+    
+    # One flat array for the whole batch, with the row range of every ticker
+    lengths = np.array([len(close) for close in closes])
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    segment_ends = starts + lengths
+    segment = np.repeat(np.arange(len(names)), lengths)
+    row_end = segment_ends[segment]
+    close = np.concatenate(closes)
+    
+    previous = np.empty_like(close)
+    previous[1:] = close[:-1]
+    target = close < previous if direction == "down" else close > previous
+    # The first bar of a ticker has no previous close
+    target[starts] = False
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily_return = close / previous - 1
+    
+    streak = compute_streaks(target)
+    current = streak[segment_ends - 1]
+    
+    # Tickers on a reportable streak and the streak length whose statistics apply
+    if streak_days is not None:
+        streaking = np.flatnonzero(current == streak_days)
+    else:
+        streaking = np.flatnonzero(current >= min_days)
+    lookup = np.minimum(current, max_days)
+    
+    results = []
+    for n_days in np.unique(lookup[streaking]):
+        members = streaking[lookup[streaking] == n_days]
+        
+        # Historical streak ends of this length followed by at least one more bar
+        ends = np.flatnonzero(streak == n_days)
+        ends = ends[ends + 1 < row_end[ends]]
+        owners = segment[ends]
+        count = np.bincount(owners, minlength=len(names))
+        
+        returns = daily_return[ends + 1]
+        finite = np.isfinite(returns)
+        return_sum = np.bincount(owners[finite], weights=returns[finite], minlength=len(names))
+        return_count = np.bincount(owners[finite], minlength=len(names))
+        
+        day_probabilities = []
+        for day in range(1, 6):
+            available = ends + day < row_end[ends]
+            same = target[np.minimum(ends + day, len(target) - 1)] & available
+            day_total = np.bincount(owners, weights=available, minlength=len(names))
+            day_same = np.bincount(owners, weights=same, minlength=len(names))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                day_probabilities.append(np.where(day_total > 0, day_same / day_total, 0.0))
+        
+        for member in members:
+            if count[member] == 0:
+                continue
+            last = segment_ends[member] - 1
+            results.append({
+                "ticker": names[member],
+                "current_streak": int(current[member]),
+                "last_date": pd.Timestamp(dates[member][-1]).strftime("%Y-%m-%d"),
+                "last_close": float(close[last]),
+                "streak_length_used": int(n_days),
+                "count": int(count[member]),
+                "next_day_probability": float(day_probabilities[0][member]),
+                "next_days_probabilities": [
+                    {"day": day, "probability": float(day_probabilities[day - 1][member])}
+                    for day in range(1, 6)
+                ],
+                "avg_next_day_return": float(return_sum[member] / return_count[member]) if return_count[member] else 0.0
+            })
+    
+    return results, len(names)
+
+
 def analyze_consecutive_moves(ticker, direction="down", min_days=2, max_days=10, 
                              date_from=None, date_to=None, visualize=False):
     """
@@ -1,34 +1,246 @@
 import numpy as np
-import pandas as pd
-from .data_utils import get_ticker_data
+from .data_utils import load_price_panel
 
+# Rolling windows re-sum from scratch this often to stop add/subtract rounding drift
+ROLLING_RESYNC_STEPS = 252
+CORRELATION_SERIES_METHODS = ("rolling", "ewma")
 
-def compute_correlation_matrix(tickers, lookback_days):
+
+def panel_log_returns(panel, min_coverage=0.9):
+    """
+    Daily log returns of a (dates x tickers) price panel, restricted to complete rows.
+
+    Columns with prices on fewer than min_coverage of the dates are dropped
+    first, so that one short history does not cut every other ticker's sample.
+
+    Returns:
+        tuple: (returns array of shape (rows, kept tickers), boolean mask of kept columns,
+                boolean mask over panel dates[1:] of the rows kept)
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(np.log(panel), axis=0)
+    returns[~np.isfinite(returns)] = np.nan
+    valid = ~np.isnan(returns)
+    keep = valid.mean(axis=0) >= min_coverage if len(returns) else np.zeros(panel.shape[1], dtype=bool)
+    returns = returns[:, keep]
+    rows = valid[:, keep].all(axis=1)
+    return returns[rows], keep, rows
+
+
+def load_returns_panel(tickers, lookback_days, min_coverage=0.9):
+    """
+    Load closes for the lookback window and return aligned daily log returns.
+
+    Returns:
+        tuple: (datetime64 dates of the return rows, kept tickers, (rows x tickers) returns)
+    """
+    dates, found, panel = load_price_panel(tickers, lookback_days=lookback_days)
+    if not found:
+        return dates, [], np.empty((0, 0))
+    returns, keep, rows = panel_log_returns(panel, min_coverage)
+    kept = [ticker for ticker, k in zip(found, keep) if k]
+    return dates[1:][rows], kept, returns
+
+
+def ledoit_wolf_intensity(standardized):
+    """
+    Ledoit-Wolf shrinkage intensity toward the identity for standardized returns.
+
+    Parameters:
+        standardized (np.ndarray): (observations x assets) returns with zero mean and unit variance
+
+    Returns:
+        float: Intensity in [0, 1]
+    """
+    n = standardized.shape[0]
+    sample = standardized.T @ standardized / n
+    # Sum over observations of ||z z' - S||^2, without forming the outer products
+    spread = (np.sum(standardized ** 2, axis=1) ** 2).sum() - n * np.sum(sample ** 2)
+    distance = np.sum((sample - np.eye(len(sample))) ** 2)
+    if distance == 0:
+        return 1.0
+    return float(np.clip(spread / n ** 2 / distance, 0.0, 1.0))
+
+
+def correlation_from_returns(returns, shrinkage=None):
+    """
+    Correlation matrix of return columns from one matrix product.
+
+    Parameters:
+        returns (np.ndarray): (observations x assets) returns without missing values
+        shrinkage: None, a float in [0, 1] or "auto" (Ledoit-Wolf) intensity of
+            shrinkage toward the identity matrix
+
+    Returns:
+        np.ndarray: (assets x assets) correlation matrix; assets with zero variance get NaN
+    """
+    n = returns.shape[0]
+    demeaned = returns - returns.mean(axis=0)
+    std = np.sqrt(np.einsum("ij,ij->j", demeaned, demeaned) / n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        standardized = demeaned / std
+    flat = ~(std > 0)
+    standardized[:, flat] = 0.0
+
+    corr = standardized.T @ standardized / n
+    if shrinkage == "auto":
+        shrinkage = ledoit_wolf_intensity(standardized)
+    if shrinkage:
+        if not 0 <= shrinkage <= 1:
+            raise ValueError("shrinkage must be between 0 and 1 or 'auto'")
+        corr = (1 - shrinkage) * corr + shrinkage * np.eye(len(corr))
+
+    corr = np.clip(corr, -1.0, 1.0)
+    np.fill_diagonal(corr, 1.0)
+    corr[flat, :] = np.nan
+    corr[:, flat] = np.nan
+    return corr
+
+
+def compute_correlation_matrix(tickers, lookback_days, shrinkage=None, min_coverage=0.9):
     """
     Compute the correlation coefficient matrix for a list of tickers over the given lookback period.
+
+    Closes for all tickers are loaded as one aligned panel covering only the
+    lookback window, and correlations are taken on daily log returns.
     Args:
         tickers (List[str]): List of ticker symbols.
         lookback_days (int): Number of days to look back.
+        shrinkage: Optional shrinkage toward the identity (float in [0, 1] or "auto").
+        min_coverage (float): Minimum fraction of the window a ticker must have prices for.
     Returns:
         np.ndarray: 2D array of correlation coefficients.
         List[str]: List of tickers (order matches matrix rows/columns).
     """
-    price_data = {}
-    for ticker in tickers:
-        df = get_ticker_data(ticker)
-        if df is not None and not df.empty:
-            # Use only the last N days
-            if len(df) > lookback_days:
-                df = df.iloc[-lookback_days:]
-            price_data[ticker] = df['close']
-
-    # Combine into a single DataFrame, aligning on date
-    combined = pd.DataFrame(price_data)
-    # Drop rows with any missing values (dates where not all tickers have data)
-    combined = combined.dropna()
-    if combined.shape[0] < 2:
-        # Not enough data to compute correlation
+    _, kept, returns = load_returns_panel(tickers, lookback_days, min_coverage)
+    if not kept:
         return np.full((len(tickers), len(tickers)), np.nan), tickers
 
-    corr_matrix = combined.corr().values
-    return corr_matrix, list(combined.columns) 
\ No newline at end of file
+    if returns.shape[0] < 2:
+        # Not enough data to compute correlation
+        return np.full((len(kept), len(kept)), np.nan), kept
+
+    return correlation_from_returns(returns, shrinkage), kept
+
+
+def covariance_to_correlation(cov):
+    """Scale a covariance matrix to correlations; assets with zero variance get NaN."""
+    std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = np.clip(cov / np.outer(std, std), -1.0, 1.0)
+    np.fill_diagonal(corr, 1.0)
+    flat = ~(std > 0)
+    corr[flat, :] = np.nan
+    corr[:, flat] = np.nan
+    return corr
+
+
+def rolling_covariances(returns, window):
+    """
+    Yield (row, covariance) for every full trailing window of returns.
+
+    The column sums and the sum of outer products are updated with the row
+    entering and the row leaving the window, so each step costs O(k^2) for k
+    assets instead of a fresh O(window * k^2) product. Covariances use ddof=1,
+    like pandas' rolling cov.
+    """
+    n = returns.shape[0]
+    if window < 2 or n < window:
+        return
+    for end in range(window, n + 1):
+        if (end - window) % ROLLING_RESYNC_STEPS == 0:
+            block = returns[end - window:end]
+            total = block.sum(axis=0)
+            products = block.T @ block
+        else:
+            new, old = returns[end - 1], returns[end - 1 - window]
+            total += new - old
+            products += np.outer(new, new) - np.outer(old, old)
+        mean = total / window
+        yield end - 1, (products - window * np.outer(mean, mean)) / (window - 1)
+
+
+def ewma_covariances(returns, halflife, min_periods=2):
+    """
+    Yield (row, covariance) of exponentially weighted returns from row min_periods - 1 on.
+
+    Each day updates the weighted mean and covariance recursively in O(k^2).
+    Weights decay by half every halflife days (pandas ewm(adjust=False), biased).
+    """
+    if halflife <= 0:
+        raise ValueError("halflife must be positive")
+    alpha = 1 - 0.5 ** (1.0 / halflife)
+    n, k = returns.shape
+    if n == 0:
+        return
+    mean = returns[0].astype(float)
+    cov = np.zeros((k, k))
+    for row in range(1, n):
+        diff = returns[row] - mean
+        mean += alpha * diff
+        cov = (1 - alpha) * (cov + alpha * np.outer(diff, diff))
+        if row + 1 >= min_periods:
+            yield row, cov
+
+
+def _json_values(values):
+    """Round to plain floats for JSON, with NaN as None."""
+    return np.where(np.isnan(values), None, np.round(values, 6)).tolist()
+
+
+def correlation_series(dates, tickers, returns, method="rolling", window=63, halflife=None,
+                       pairs=None, covariance=False, step=1):
+    """
+    Build a time series of correlation (or covariance) matrices over aligned returns.
+
+    Parameters:
+        dates (np.ndarray): Dates of the return rows
+        tickers (list): Tickers matching the return columns
+        returns (np.ndarray): (rows x tickers) daily returns
+        method (str): "rolling" for a trailing window, "ewma" for exponential weighting
+        window (int): Rolling window length, or warm-up length for ewma
+        halflife (float): EWMA half-life in days (defaults to window / 2)
+        pairs (list): Optional (ticker, ticker) pairs; only these values are emitted
+        covariance (bool): Emit covariances instead of correlations
+        step (int): Emit every step-th day
+
+    Returns:
+        generator: Dicts {"date", "matrix"} or, with pairs, {"date", "pairs": {"A/B": value}}.
+            Arguments are validated before the first item is produced.
+    """
+    if method == "rolling":
+        updates = rolling_covariances(returns, window)
+    elif method == "ewma":
+        if halflife is None:
+            halflife = window / 2
+        elif halflife <= 0:
+            raise ValueError("halflife must be positive")
+        updates = ewma_covariances(returns, halflife, min_periods=window)
+    else:
+        raise ValueError(f"Unknown method: {method}. Use one of {', '.join(CORRELATION_SERIES_METHODS)}")
+
+    if pairs:
+        position = {ticker: i for i, ticker in enumerate(tickers)}
+        missing = [ticker for pair in pairs for ticker in pair if ticker.upper() not in position]
+        if missing:
+            raise ValueError(f"No data for tickers in pairs: {', '.join(sorted(set(missing)))}")
+        rows = np.array([position[a.upper()] for a, _ in pairs])
+        cols = np.array([position[b.upper()] for _, b in pairs])
+        labels = [f"{a.upper()}/{b.upper()}" for a, b in pairs]
+    else:
+        rows = cols = labels = None
+    return _series_items(dates, updates, covariance, step, rows, cols, labels)
+
+
+def _series_items(dates, updates, covariance, step, rows, cols, labels):
+    """Format covariance updates from correlation_series as JSON-ready dicts."""
+    for count, (row, cov) in enumerate(updates):
+        if count % step:
+            continue
+        values = cov if covariance else covariance_to_correlation(cov)
+        item = {"date": str(np.datetime_as_string(dates[row], unit="D"))}
+        if labels:
+            item["pairs"] = dict(zip(labels, _json_values(values[rows, cols])))
+        else:
+            item["matrix"] = _json_values(values)
+        yield item
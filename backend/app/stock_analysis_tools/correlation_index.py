@@ -0,0 +1,195 @@
+"""
+Cached correlation indexes for "what trades like X" queries.
+
+A CorrelationIndex wraps one compute_correlation_matrix result with its
+correlation distances and a hierarchical-cluster ordering, so neighbour and
+cluster queries are answered from the precomputed matrix. Indexes are kept in
+a small LRU keyed by (tickers, lookback_days, shrinkage) and rebuilt once they
+are older than the configured TTL.
+"""
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import cached_property
+import numpy as np
+from scipy.cluster.hierarchy import linkage, leaves_list, fcluster
+from scipy.spatial.distance import squareform
+from .correlation_coefficient import compute_correlation_matrix
+from ..config import CORRELATION_INDEX_MAX_ENTRIES, CORRELATION_INDEX_TTL_SECONDS
+
+LINKAGE_METHODS = ("average", "complete", "single", "ward")
+
+
+def correlation_distance(matrix):
+    """
+    Correlation distance sqrt((1 - rho) / 2), in [0, 1].
+
+    Undefined correlations are treated as zero correlation.
+    """
+    rho = np.nan_to_num(np.asarray(matrix, dtype=float), nan=0.0)
+    distance = np.sqrt(np.clip((1.0 - rho) / 2.0, 0.0, 1.0))
+    np.fill_diagonal(distance, 0.0)
+    return distance
+
+
+class CorrelationIndex:
+    """Correlation matrix over a ticker universe with neighbour and cluster lookups."""
+
+    def __init__(self, tickers, matrix, lookback_days=None, shrinkage=None, linkage_method="average"):
+        if linkage_method not in LINKAGE_METHODS:
+            raise ValueError(f"Unknown linkage method: {linkage_method}. Use one of {', '.join(LINKAGE_METHODS)}")
+        self.tickers = [t.upper() for t in tickers]
+        self.matrix = np.asarray(matrix, dtype=float)
+        self.lookback_days = lookback_days
+        self.shrinkage = shrinkage
+        self.linkage_method = linkage_method
+        self.built_at = time.time()
+        self.positions = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.distance = correlation_distance(self.matrix)
+
+    @cached_property
+    def linkage(self):
+        """Hierarchical clustering linkage on the correlation distances."""
+        if len(self.tickers) < 2:
+            return np.empty((0, 4))
+        return linkage(squareform(self.distance, checks=False), method=self.linkage_method)
+
+    @cached_property
+    def order(self):
+        """Ticker positions in dendrogram leaf order, for heatmap rows and columns."""
+        if len(self.tickers) < 2:
+            return np.arange(len(self.tickers))
+        return leaves_list(self.linkage)
+
+    def neighbors(self, ticker, k=10, least=False):
+        """
+        Top-k most (or least) correlated tickers to ticker.
+
+        Returns:
+            list: Dicts with ticker, correlation and distance, best match first
+        """
+        i = self.positions.get(ticker.upper())
+        if i is None:
+            raise KeyError(ticker)
+        row = self.matrix[i]
+        candidates = np.flatnonzero(~np.isnan(row))
+        candidates = candidates[candidates != i]
+        k = min(k, len(candidates))
+        if k <= 0:
+            return []
+
+        scores = row[candidates] if least else -row[candidates]
+        top = candidates[np.argpartition(scores, k - 1)[:k]]
+        top = top[np.argsort(row[top] if least else -row[top], kind="stable")]
+        return [
+            {
+                "ticker": self.tickers[j],
+                "correlation": float(row[j]),
+                "distance": float(self.distance[i, j])
+            }
+            for j in top
+        ]
+
+    def clusters(self, n_clusters=None):
+        """
+        Cluster ordering for a heatmap.
+
+        Parameters:
+            n_clusters (int): Optional number of flat clusters to cut the tree into
+
+        Returns:
+            dict: Tickers and matrix in cluster order, plus cluster labels when requested
+        """
+        order = self.order
+        result = {
+            "tickers": [self.tickers[i] for i in order],
+            "matrix": np.where(np.isnan(self.matrix), None, self.matrix)[np.ix_(order, order)].tolist()
+        }
+        if n_clusters:
+            if len(self.tickers) < 2:
+                labels = np.ones(len(self.tickers), dtype=int)
+            else:
+                labels = fcluster(self.linkage, t=n_clusters, criterion="maxclust")
+            result["clusters"] = [int(labels[i]) for i in order]
+        return result
+
+    def summary(self):
+        """Metadata describing the index."""
+        return {
+            "tickers": len(self.tickers),
+            "lookback_days": self.lookback_days,
+            "shrinkage": self.shrinkage,
+            "linkage": self.linkage_method,
+            "built_at": self.built_at
+        }
+
+
+class CorrelationIndexCache:
+    """Thread-safe LRU of CorrelationIndex objects with an entry cap and a TTL."""
+
+    def __init__(self, max_entries=8, ttl_seconds=3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # index id -> CorrelationIndex
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_id(tickers, lookback_days, shrinkage=None, linkage_method="average"):
+        """Stable id for an index over the same universe and settings."""
+        universe = ",".join(sorted({t.upper() for t in tickers}))
+        key = f"{universe}|{lookback_days}|{shrinkage}|{linkage_method}"
+        return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+    def get(self, index_id):
+        """Return a live index by id, or None if it is unknown or expired."""
+        with self._lock:
+            index = self._entries.get(index_id)
+            if index is None:
+                return None
+            if time.time() - index.built_at > self.ttl_seconds:
+                del self._entries[index_id]
+                return None
+            self._entries.move_to_end(index_id)
+            return index
+
+    def put(self, index_id, index):
+        """Store an index, evicting the least recently used ones beyond max_entries."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[index_id] = index
+            self._entries.move_to_end(index_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_build(self, tickers, lookback_days, shrinkage=None, linkage_method="average"):
+        """
+        Return (index id, index, cached) for a universe, building it if needed.
+
+        Building loads prices and computes the correlation matrix, so it runs
+        outside the lock; concurrent misses for the same id may both build.
+        """
+        index_id = self.make_id(tickers, lookback_days, shrinkage, linkage_method)
+        index = self.get(index_id)
+        if index is not None:
+            return index_id, index, True
+
+        matrix, found = compute_correlation_matrix(tickers, lookback_days, shrinkage)
+        index = CorrelationIndex(found, matrix, lookback_days, shrinkage, linkage_method)
+        # Cluster once up front so later queries only read it
+        index.order
+        self.put(index_id, index)
+        return index_id, index, False
+
+    def clear(self):
+        """Remove all cached indexes."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared instance used by the correlation index routes
+correlation_index_cache = CorrelationIndexCache(
+    max_entries=CORRELATION_INDEX_MAX_ENTRIES,
+    ttl_seconds=CORRELATION_INDEX_TTL_SECONDS
+)
@@ -1,13 +1,19 @@
 import os
+import threading
 import pandas as pd
 import numpy as np
 from pymongo import MongoClient
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
+from .frame_cache import prepared_frame_cache
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Collections already confirmed to exist, so the existence check runs once per process
+_verified_collections = set()
+_verified_collections_lock = threading.Lock()
+
 def connect_to_mongodb(connection_string="mongodb://localhost:27017/"):
     """Connect to MongoDB and return the client."""
     try:
@@ -19,6 +25,300 @@ def connect_to_mongodb(connection_string="mongodb://localhost:27017/"):
         raise ConnectionError(f"Failed to connect to MongoDB: {e}")
 
 
+def get_mongo_client():
+    """
+    Return the application-wide pooled MongoDB client.
+    
+    The import is deferred so the analysis tools stay importable (and can use
+    the file fallback) when the database module cannot connect.
+    """
+    from ..database import client
+    return client
+
+
+def get_collection(db_name="market", collection_name="prices"):
+    """
+    Get a collection from the shared client.
+    
+    The collection's existence is checked only the first time it is requested.
+    
+    Parameters:
+        db_name (str): MongoDB database name
+        collection_name (str): MongoDB collection name
+    
+    Returns:
+        pymongo.collection.Collection: The requested collection
+    """
+    db = get_mongo_client()[db_name]
+    key = (db_name, collection_name)
+    
+    if key not in _verified_collections:
+        with _verified_collections_lock:
+            if key not in _verified_collections:
+                if collection_name not in db.list_collection_names():
+                    print(f"Collection '{collection_name}' does not exist in database '{db_name}'")
+                    raise ValueError(f"Collection '{collection_name}' not found in database")
+                _verified_collections.add(key)
+    
+    return db[collection_name]
+
+
+# OHLCV fields stored in market.prices
+PRICE_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def parse_date_bound(value, name="date"):
+    """
+    Convert a YYYY-MM-DD string (or date-like object) to a datetime for MongoDB queries.
+    
+    Parameters:
+        value: Date string in format YYYY-MM-DD, datetime, date or pandas Timestamp
+        name (str): Parameter name used in the error message
+    
+    Returns:
+        datetime: Parsed date, or None if no value was given
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, datetime):
+        return value
+    if hasattr(value, "year") and hasattr(value, "month") and hasattr(value, "day"):
+        return datetime(value.year, value.month, value.day)
+    try:
+        return datetime.strptime(str(value), "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"Invalid {name} format: {value}. Use YYYY-MM-DD")
+
+
+def build_price_match(tickers, date_from=None, date_to=None):
+    """
+    Build the MongoDB filter for one or more tickers and an optional date range.
+    
+    Parameters:
+        tickers (str or list): Ticker symbol or list of ticker symbols
+        date_from: Optional start date (inclusive)
+        date_to: Optional end date (inclusive)
+    
+    Returns:
+        dict: MongoDB query filter
+    """
+    if isinstance(tickers, str):
+        match = {"ticker": tickers.upper()}
+    else:
+        match = {"ticker": {"$in": [t.upper() for t in tickers]}}
+    
+    start_datetime = parse_date_bound(date_from, "date_from")
+    end_datetime = parse_date_bound(date_to, "date_to")
+    
+    if start_datetime or end_datetime:
+        match["date"] = {}
+        if start_datetime:
+            match["date"]["$gte"] = start_datetime
+        if end_datetime:
+            match["date"]["$lte"] = end_datetime
+    
+    return match
+
+
+def _column_to_array(values, field):
+    """Decode one pushed column straight into a NumPy array."""
+    # None (missing or null values) becomes NaN
+    arr = np.array(values, dtype=np.float64)
+    if field == "volume" and np.isfinite(arr).all():
+        return arr.astype(np.int64)
+    return arr
+
+
+def load_price_columns(tickers, date_from=None, date_to=None, fields=PRICE_FIELDS,
+                       sort_direction=1, limit=None, db_name="market", collection_name="prices", skip=0):
+    """
+    Load price columns for one or more tickers as NumPy arrays.
+    
+    Instead of materialising one dict per bar, the aggregation projects only the
+    requested fields (no _id) and pushes them into one array per column and
+    ticker on the server. Each column is then decoded directly into a NumPy array,
+    with dates transferred as epoch milliseconds.
+    
+    Parameters:
+        tickers (str or list): Ticker symbol or list of ticker symbols
+        date_from: Optional start date in format YYYY-MM-DD
+        date_to: Optional end date in format YYYY-MM-DD
+        fields (tuple): Price fields to load (subset of PRICE_FIELDS)
+        sort_direction (int): 1 for oldest first, -1 for newest first
+        limit (int): Optional maximum number of bars (single ticker only)
+        db_name (str): MongoDB database name
+        collection_name (str): MongoDB collection name
+        skip (int): Number of bars to skip before the limit (single ticker only)
+    
+    Returns:
+        dict: {ticker: {"date": datetime64[ms] array, field: array, ...}}
+              Tickers without data are omitted.
+    """
+    if (limit is not None or skip) and not isinstance(tickers, str):
+        raise ValueError("limit and skip are only supported when loading a single ticker")
+    
+    fields = tuple(fields)
+    collection = get_collection(db_name, collection_name)
+    
+    pipeline = [
+        {"$match": build_price_match(tickers, date_from, date_to)},
+        {"$sort": {"date": sort_direction}},
+    ]
+    if skip:
+        pipeline.append({"$skip": int(skip)})
+    if limit:
+        pipeline.append({"$limit": int(limit)})
+    
+    group = {"_id": "$ticker", "date": {"$push": {"$toLong": "$date"}}}
+    for field in fields:
+        # $ifNull keeps missing values so every column stays aligned with the dates
+        group[field] = {"$push": {"$ifNull": [f"${field}", None]}}
+    pipeline.append({"$group": group})
+    
+    columns = {}
+    for doc in collection.aggregate(pipeline, allowDiskUse=True):
+        dates = np.array(doc["date"], dtype=np.int64).astype("datetime64[ms]")
+        if len(dates) == 0:
+            continue
+        # Don't rely on $group preserving the $sort order
+        order = np.argsort(dates, kind="stable")
+        if sort_direction < 0:
+            order = order[::-1]
+        ticker_columns = {"date": dates[order]}
+        for field in fields:
+            ticker_columns[field] = _column_to_array(doc[field], field)[order]
+        columns[doc["_id"]] = ticker_columns
+    
+    return columns
+
+
+def columns_to_frame(columns, fields=PRICE_FIELDS):
+    """Build a date-indexed DataFrame from one ticker's column arrays."""
+    index = pd.DatetimeIndex(columns["date"], name="date")
+    return pd.DataFrame({field: columns[field] for field in fields if field in columns}, index=index)
+
+
+def load_price_frame(ticker, date_from=None, date_to=None, fields=PRICE_FIELDS,
+                     sort_direction=1, limit=None, db_name="market", collection_name="prices"):
+    """
+    Load price data for a single ticker as a date-indexed DataFrame.
+    
+    Parameters:
+        ticker (str): Stock ticker symbol
+        date_from: Optional start date in format YYYY-MM-DD
+        date_to: Optional end date in format YYYY-MM-DD
+        fields (tuple): Price fields to load
+        sort_direction (int): 1 for oldest first, -1 for newest first
+        limit (int): Optional maximum number of bars
+        db_name (str): MongoDB database name
+        collection_name (str): MongoDB collection name
+    
+    Returns:
+        pandas.DataFrame: Price data indexed by date (empty if no data)
+    """
+    columns = load_price_columns(
+        ticker, date_from, date_to, fields=fields, sort_direction=sort_direction,
+        limit=limit, db_name=db_name, collection_name=collection_name
+    )
+    ticker_columns = columns.get(ticker.upper())
+    if ticker_columns is None:
+        return pd.DataFrame(columns=list(fields), index=pd.DatetimeIndex([], name="date"))
+    return columns_to_frame(ticker_columns, fields)
+
+
+def load_price_frames(tickers, date_from=None, date_to=None, fields=PRICE_FIELDS,
+                      db_name="market", collection_name="prices"):
+    """
+    Load price data for several tickers with a single query.
+    
+    Returns:
+        dict: {ticker: date-indexed DataFrame}; tickers without data are omitted
+    """
+    columns = load_price_columns(
+        tickers, date_from, date_to, fields=fields,
+        db_name=db_name, collection_name=collection_name
+    )
+    return {ticker: columns_to_frame(cols, fields) for ticker, cols in columns.items()}
+
+
+def latest_price_date(tickers, db_name="market", collection_name="prices"):
+    """Most recent bar date stored for any of the tickers, or None if there are none."""
+    collection = get_collection(db_name, collection_name)
+    doc = collection.find_one(build_price_match(tickers), {"date": 1, "_id": 0}, sort=[("date", -1)])
+    return doc["date"] if doc else None
+
+
+def load_price_panel(tickers, date_from=None, date_to=None, field="close", lookback_days=None,
+                     db_name="market", collection_name="prices"):
+    """
+    Load one price field for several tickers as a dense (dates x tickers) array.
+    
+    All tickers come from a single $in query. Dates are the union of the
+    tickers' bar dates; a ticker without a bar on a date gets NaN there.
+    
+    Parameters:
+        tickers (list): Ticker symbols
+        date_from: Optional start date in format YYYY-MM-DD
+        date_to: Optional end date in format YYYY-MM-DD
+        field (str): Price field to load
+        lookback_days (int): Optional number of most recent trading days to keep.
+            Without date_from, the query is limited to a calendar window ending at
+            the latest stored bar that covers this many trading days.
+        db_name (str): MongoDB database name
+        collection_name (str): MongoDB collection name
+    
+    Returns:
+        tuple: (datetime64[ms] dates, list of tickers, float64 array of shape (dates, tickers)).
+               Tickers without data are omitted; the rest keep the requested order.
+    """
+    dates, found, panels = load_price_panels(
+        tickers, date_from, date_to, fields=(field,), lookback_days=lookback_days,
+        db_name=db_name, collection_name=collection_name
+    )
+    return dates, found, panels[field]
+
+
+def load_price_panels(tickers, date_from=None, date_to=None, fields=PRICE_FIELDS, lookback_days=None,
+                      db_name="market", collection_name="prices"):
+    """
+    Load several price fields for several tickers as aligned (dates x tickers) arrays.
+    
+    Same query, date alignment and lookback handling as load_price_panel.
+    
+    Returns:
+        tuple: (datetime64[ms] dates, list of tickers, {field: float64 array of shape (dates, tickers)})
+    """
+    if lookback_days and date_from is None:
+        end = parse_date_bound(date_to, "date_to") or latest_price_date(tickers, db_name, collection_name)
+        if end is None:
+            return np.array([], dtype="datetime64[ms]"), [], {field: np.empty((0, 0)) for field in fields}
+        # Trading days to calendar days, with slack for holidays
+        date_from = end - timedelta(days=int(lookback_days * 365 / 252) + 10)
+    
+    columns = load_price_columns(
+        tickers, date_from, date_to, fields=tuple(fields),
+        db_name=db_name, collection_name=collection_name
+    )
+    found = [t.upper() for t in tickers if t.upper() in columns]
+    found = list(dict.fromkeys(found))
+    if not found:
+        return np.array([], dtype="datetime64[ms]"), [], {field: np.empty((0, 0)) for field in fields}
+    
+    dates = np.unique(np.concatenate([columns[t]["date"] for t in found]))
+    panels = {field: np.full((len(dates), len(found)), np.nan) for field in fields}
+    for j, ticker in enumerate(found):
+        rows = np.searchsorted(dates, columns[ticker]["date"])
+        for field in fields:
+            panels[field][rows, j] = columns[ticker][field]
+    
+    if lookback_days:
+        dates = dates[-lookback_days:]
+        panels = {field: panel[-lookback_days:] for field, panel in panels.items()}
+    return dates, found, panels
+
+
 def get_ticker_data(ticker, db_name="market", collection_name="prices", date_from=None, date_to=None, sync_with_yfinance=False):
     """
     Get price data for a ticker from MongoDB.
@@ -44,98 +344,32 @@ def get_ticker_data(ticker, db_name="market", collection_name="prices", date_fro
             print(f"Sync with yfinance requested for {ticker}")
             logger.info(f"Checking yfinance data for {ticker} before MongoDB fetch (sync_with_yfinance=True)")
         
-        # Connect to MongoDB
+        # Load only the OHLCV columns through the shared pooled client
         try:
-            client = connect_to_mongodb()
-            db = client[db_name]
-            collection = db[collection_name]
-            
-            # Check if collection exists
-            if collection_name not in db.list_collection_names():
-                print(f"Collection '{collection_name}' does not exist in database '{db_name}'")
-                # Try to fallback to file-based data
-                raise ValueError(f"Collection '{collection_name}' not found in database")
-                
-        except Exception as conn_err:
-            print(f"MongoDB connection error: {conn_err}")
+            df = load_price_frame(
+                ticker, date_from, date_to,
+                db_name=db_name, collection_name=collection_name
+            )
+            print(f"Query returned {len(df)} documents")
+        except ValueError:
             raise
-        
-        # Build MongoDB query
-        query = {"ticker": ticker.upper()}
-        
-        # Add date filtering if provided
-        if date_from:
-            try:
-                start_datetime = datetime.strptime(date_from, "%Y-%m-%d")
-                query["date"] = {"$gte": start_datetime}
-                print(f"Added start date filter: {start_datetime}")
-            except ValueError:
-                print(f"Invalid date_from format: {date_from}")
-                raise ValueError(f"Invalid date_from format: {date_from}. Use YYYY-MM-DD")
-                
-        if date_to:
-            try:
-                end_datetime = datetime.strptime(date_to, "%Y-%m-%d")
-                if "date" in query:
-                    query["date"]["$lte"] = end_datetime
-                else:
-                    query["date"] = {"$lte": end_datetime}
-                print(f"Added end date filter: {end_datetime}")
-            except ValueError:
-                print(f"Invalid date_to format: {date_to}")
-                raise ValueError(f"Invalid date_to format: {date_to}. Use YYYY-MM-DD")
-        
-        print(f"MongoDB query: {query}")
-        
-        # Execute query
-        try:
-            cursor = collection.find(query).sort("date", 1)
-            data = list(cursor)
-            print(f"Query returned {len(data)} documents")
         except Exception as query_err:
             print(f"MongoDB query error: {query_err}")
             raise
         
-        if not data:
+        if df.empty:
             print(f"No data found for ticker: {ticker}")
             if sync_with_yfinance:
                 print(f"No MongoDB data, will try yfinance in the endpoint")
             raise ValueError(f"No data found for ticker: {ticker}")
-            
-        df = pd.DataFrame(data)
-        
-        # Rename columns if needed to match expected format
-        column_mapping = {
-            "date": "date",
-            "open": "open",
-            "high": "high",
-            "low": "low",
-            "close": "close",
-            "volume": "volume"
-        }
-        df = df.rename(columns={k: v for k, v in column_mapping.items() if k in df.columns})
-        
-        # Ensure required columns exist
-        required_cols = ["close"]
-        missing_cols = [col for col in required_cols if col not in df.columns]
-        if missing_cols:
-            print(f"Missing required columns: {missing_cols}")
-            raise ValueError(f"Missing required columns in data: {missing_cols}")
         
-        # Ensure date column is datetime
-        if "date" in df.columns:
-            df["date"] = pd.to_datetime(df["date"])
-            df.set_index("date", inplace=True)
-            
-            # Print date range summary
-            if not df.empty:
-                print(f"DataFrame date range: {df.index.min()} to {df.index.max()}")
-        
-        # Close connection
-        client.close()
+        # Print date range summary
+        print(f"DataFrame date range: {df.index.min()} to {df.index.max()}")
         
         return df
         
+    except ValueError:
+        raise
     except Exception as e:
         print(f"Error getting ticker data from MongoDB: {e}")
         raise Exception(f"Error getting ticker data from MongoDB: {e}")
@@ -167,6 +401,13 @@ def read_and_prepare_data(ticker, date_from=None, date_to=None, source="mongodb"
         df = None
         mongodb_error = None
         
+        # Prepared MongoDB frames are cached in-process; files are cheap to re-read
+        if source == "mongodb":
+            cached = prepared_frame_cache.get(ticker, date_from, date_to, calc_returns)
+            if cached is not None:
+                print(f"Using cached prepared data for {ticker} ({len(cached)} rows)")
+                return cached
+        
         # First try MongoDB if that's the preferred source
         if source == "mongodb":
             try:
@@ -283,6 +524,10 @@ def read_and_prepare_data(ticker, date_from=None, date_to=None, source="mongodb"
             print("Warning: DataFrame is empty after processing")
             raise ValueError("DataFrame is empty after processing")
         
+        # Only cache frames that came from MongoDB (source is "file" after a fallback)
+        if source == "mongodb":
+            prepared_frame_cache.put(ticker, date_from, date_to, calc_returns, df)
+        
         return df
         
     except Exception as e:
@@ -0,0 +1,163 @@
+"""
+In-process cache of prepared price frames.
+
+read_and_prepare_data results are kept in a bounded, memory-capped LRU keyed by
+(ticker, date_from, date_to, calc_returns). A request whose date range lies
+inside a cached range is served by slicing the cached frame, and all entries for
+a ticker are dropped when YFinanceSync writes new bars for it.
+"""
+import threading
+from collections import OrderedDict
+import pandas as pd
+from ..config import FRAME_CACHE_MAX_ENTRIES, FRAME_CACHE_MAX_MB
+
+# A sliced frame shorter than this is treated as a miss so the normal loading
+# path produces its usual "insufficient data" errors
+MIN_SLICE_ROWS = 10
+
+
+def _normalize_bound(value):
+    """Convert a date bound to a pandas Timestamp (or None for an open bound)."""
+    if value is None or value == "":
+        return None
+    return pd.Timestamp(value).normalize()
+
+
+def _covers(cached_from, cached_to, date_from, date_to):
+    """Check whether the cached range contains the requested range."""
+    if cached_from is not None and (date_from is None or date_from < cached_from):
+        return False
+    if cached_to is not None and (date_to is None or date_to > cached_to):
+        return False
+    return True
+
+
+class PreparedFrameCache:
+    """Thread-safe LRU of prepared price DataFrames with an entry and memory cap."""
+
+    def __init__(self, max_entries=128, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = max_entries > 0 and max_bytes > 0
+        self._entries = OrderedDict()  # key -> (DataFrame, size in bytes)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._slice_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def make_key(ticker, date_from, date_to, calc_returns):
+        return (ticker.upper(), _normalize_bound(date_from), _normalize_bound(date_to), bool(calc_returns))
+
+    def get(self, ticker, date_from=None, date_to=None, calc_returns=True):
+        """
+        Return a copy of the cached frame for this request, or None on a miss.
+
+        An exact key match is returned as-is; otherwise the first cached frame
+        whose range covers the request is sliced down to it.
+        """
+        if not self.enabled:
+            return None
+
+        key = self.make_key(ticker, date_from, date_to, calc_returns)
+        ticker_key, req_from, req_to, calc = key
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0].copy()
+
+            for cached_key in reversed(self._entries):
+                cached_ticker, cached_from, cached_to, cached_calc = cached_key
+                if cached_ticker != ticker_key or cached_calc != calc:
+                    continue
+                if not _covers(cached_from, cached_to, req_from, req_to):
+                    continue
+
+                df = self._entries[cached_key][0]
+                sliced = df.loc[req_from:req_to] if (req_from is not None or req_to is not None) else df
+
+                # A fresh load drops the first bar of the range because it has no
+                # previous close; do the same when the cached range starts earlier
+                if calc and req_from is not None and (cached_from is None or cached_from < req_from):
+                    sliced = sliced.iloc[1:]
+
+                if len(sliced) < MIN_SLICE_ROWS:
+                    continue
+
+                self._entries.move_to_end(cached_key)
+                self._slice_hits += 1
+                return sliced.copy()
+
+            self._misses += 1
+            return None
+
+    def put(self, ticker, date_from, date_to, calc_returns, df):
+        """Store a copy of a prepared frame, evicting least recently used entries."""
+        if not self.enabled or df is None or df.empty:
+            return
+
+        key = self.make_key(ticker, date_from, date_to, calc_returns)
+        frame = df.copy()
+        size = int(frame.memory_usage(index=True).sum())
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (frame, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def invalidate(self, ticker):
+        """Drop every cached frame for a ticker. Returns the number of entries removed."""
+        ticker = ticker.upper()
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == ticker]
+            for key in stale:
+                self._bytes -= self._entries.pop(key)[1]
+            self._invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        """Remove all cached frames (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return hit/miss counters and current memory usage."""
+        with self._lock:
+            lookups = self._hits + self._slice_hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "slice_hits": self._slice_hits,
+                "misses": self._misses,
+                "hit_rate": (self._hits + self._slice_hits) / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "tickers": sorted({key[0] for key in self._entries})
+            }
+
+
+# Shared instance used by read_and_prepare_data and invalidated by YFinanceSync
+prepared_frame_cache = PreparedFrameCache(
+    max_entries=FRAME_CACHE_MAX_ENTRIES,
+    max_bytes=FRAME_CACHE_MAX_MB * 1024 * 1024
+)
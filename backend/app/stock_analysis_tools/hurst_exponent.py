@@ -1,103 +1,153 @@
 import os
+import logging
 import numpy as np
 import pandas as pd
 from datetime import datetime
+from scipy.stats import t as t_dist
 from .data_utils import read_and_prepare_data
 
+logger = logging.getLogger(__name__)
 
-def calculate_hurst_exponent(time_series, max_lag=100):
+# Rolling Hurst windows per process-pool block
+ROLLING_PARALLEL_MIN_WINDOWS = 1000
+
+
+def calculate_hurst_exponent(time_series, max_lag=100, return_ci=False, confidence=0.95):
     """
     Calculate the Hurst exponent of a time series using the rescaled range (R/S) method.
     
     Parameters:
         time_series (array-like): The time series data (e.g., stock prices)
         max_lag (int): Maximum lag for R/S calculation
+        return_ci (bool): Also return the confidence interval of the estimate
+        confidence (float): Confidence level of the interval
         
     Returns:
-        float: The Hurst exponent value
+        float: The Hurst exponent value, or (hurst, (low, high)) if return_ci is True
+    """
+    result = hurst_rs_analysis(time_series, max_lag, confidence)
+    if return_ci:
+        return result["hurst"], (result["ci_low"], result["ci_high"])
+    return result["hurst"]
+
+
+def hurst_rs_analysis(time_series, max_lag=100, confidence=0.95):
+    """
+    Estimate the Hurst exponent with its standard error and confidence interval.
+    
+    Parameters:
+        time_series (array-like): The time series data (e.g., stock prices)
+        max_lag (int): Maximum lag for R/S calculation
+        confidence (float): Confidence level of the interval
+        
+    Returns:
+        dict: hurst, stderr, ci_low, ci_high, lags and rs_values used in the fit
     """
     # Convert to numpy array and calculate returns/changes
-    ts = np.asarray(time_series)
+    ts = np.asarray(time_series, dtype=float)
     
     # Check for zero values that would cause division by zero
     if np.any(ts == 0):
-        print("Warning: Time series contains zero values, replacing with small positive values")
+        logger.warning("Time series contains zero values, replacing with small positive values")
         ts = np.where(ts == 0, 1e-10, ts)
     
     # Use log returns for financial time series
-    returns = np.log(ts[1:] / ts[:-1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.log(ts[1:] / ts[:-1])
     
     # Remove NaN and infinite values
-    returns = returns[~np.isnan(returns) & ~np.isinf(returns)]
+    returns = returns[np.isfinite(returns)]
     
     if len(returns) < max_lag:
         max_lag = len(returns) // 2
     
     # Safety check for very small datasets
     if max_lag < 10:
-        print(f"Warning: max_lag is very small ({max_lag}), results may be unreliable")
+        logger.warning(f"max_lag is very small ({max_lag}), results may be unreliable")
         if max_lag < 5:
             raise ValueError(f"Insufficient data points for Hurst calculation (max_lag={max_lag})")
     
-    # Calculate R/S values for different lags
-    lags = range(2, max_lag)
-    rs_values = []
-    
-    for lag in lags:
-        # Calculate the R/S value for this lag
-        try:
-            rs = calculate_rs(returns, lag)
-            if not np.isnan(rs) and np.isfinite(rs):
-                rs_values.append(rs)
-            else:
-                print(f"Warning: Invalid R/S value for lag {lag}, skipping")
-        except Exception as e:
-            print(f"Error calculating R/S for lag {lag}: {e}")
-            # Skip this lag and continue
+    # Calculate R/S values for all lags, skipping lags without a valid value
+    lags = np.arange(2, max_lag)
+    rs_values = rescaled_range(returns, lags)
+    valid = np.isfinite(rs_values) & (rs_values > 0)
+    lags, rs_values = lags[valid], rs_values[valid]
     
     # Check if we have enough valid R/S values
     if len(rs_values) < 5:
         raise ValueError(f"Insufficient valid R/S values (got {len(rs_values)}, need at least 5)")
     
-    # Convert to logarithms for regression
-    log_lags = np.log10(lags[:len(rs_values)])
-    log_rs = np.log10(rs_values)
-    
-    # Perform linear regression to find the Hurst exponent
-    hurst_exponent, _ = np.polyfit(log_lags, log_rs, 1)
+    # The Hurst exponent is the slope of log(R/S) against log(lag)
+    hurst_exponent, stderr = _fit_slope(np.log10(lags), np.log10(rs_values))
     
     # Validate the result
     if np.isnan(hurst_exponent) or not np.isfinite(hurst_exponent):
         raise ValueError("Calculated Hurst exponent is not a valid number")
     
-    return hurst_exponent
+    margin = t_dist.ppf(0.5 + confidence / 2, len(lags) - 2) * stderr
+    return {
+        "hurst": float(hurst_exponent),
+        "stderr": float(stderr),
+        "ci_low": float(hurst_exponent - margin),
+        "ci_high": float(hurst_exponent + margin),
+        "lags": lags,
+        "rs_values": rs_values
+    }
 
 
-def calculate_rs(time_series, lag):
-    """
-    Calculate the Rescaled Range (R/S) value for a specific lag.
+def rescaled_range(time_series, lags):
     """
-    # Check for NaN values
-    if np.any(np.isnan(time_series[:lag])) or np.any(np.isinf(time_series[:lag])):
-        return np.nan
+    Calculate the average rescaled range (R/S) for several lags at once.
     
-    # Calculate cumulative deviations from mean
-    mean = np.mean(time_series[:lag])
-    ts_mean_adj = time_series[:lag] - mean
-    cumsum = np.cumsum(ts_mean_adj)
+    For each lag the series is cut into non-overlapping chunks of that length
+    (a reshaped view, no copies); R/S is computed for every chunk at once and
+    averaged over the chunks with a non-zero standard deviation.
     
-    # Calculate range (max - min)
-    R = np.max(cumsum) - np.min(cumsum)
-    
-    # Calculate standard deviation
-    S = np.std(time_series[:lag])
+    Parameters:
+        time_series (array-like): Series of returns
+        lags (array-like): Chunk lengths
+        
+    Returns:
+        numpy.ndarray: Average R/S per lag (NaN where no chunk is valid)
+    """
+    x = np.asarray(time_series, dtype=float)
+    rs_values = np.full(len(lags), np.nan)
     
-    # Handle division by zero
-    if S < 1e-10:  # Use a small threshold instead of exact zero
-        return np.nan
+    for i, lag in enumerate(lags):
+        n_chunks = len(x) // lag
+        if lag < 2 or n_chunks == 0:
+            continue
+        
+        chunks = x[:n_chunks * lag].reshape(n_chunks, lag)
+        
+        # Cumulative deviations from each chunk's mean
+        cumsum = np.cumsum(chunks - chunks.mean(axis=1, keepdims=True), axis=1)
+        R = cumsum.max(axis=1) - cumsum.min(axis=1)
+        S = chunks.std(axis=1)
+        
+        # Chunks with NaN or (near) zero deviation have no defined R/S
+        valid = np.isfinite(R) & (S >= 1e-10)
+        if valid.any():
+            rs_values[i] = np.mean(R[valid] / S[valid])
     
-    # Return R/S
-    return R / S
+    return rs_values
+
+
+def calculate_rs(time_series, lag):
+    """
+    Calculate the Rescaled Range (R/S) value for a specific lag.
+    """
+    return rescaled_range(time_series, [lag])[0]
+
+
+def _fit_slope(x, y):
+    """Least-squares slope of y on x and its standard error."""
+    x_dev = x - x.mean()
+    sxx = np.sum(x_dev ** 2)
+    slope = np.sum(x_dev * (y - y.mean())) / sxx
+    residuals = y - y.mean() - slope * x_dev
+    stderr = np.sqrt(np.sum(residuals ** 2) / (len(x) - 2) / sxx)
+    return slope, stderr
 
 
 def interpret_hurst(h):
@@ -120,73 +170,143 @@ def interpret_hurst(h):
         return f"Random walk (H={h:.3f}): No memory effect. Past movements don't influence future ones."
 
 
-def calculate_hurst_by_window(time_series, window_size=252, step=63):
+def calculate_hurst_by_window(time_series, window_size=252, step=63, max_lag=100, executor=None,
+                              return_ci=False, confidence=0.95):
     """
     Calculate the Hurst exponent over rolling windows.
     
+    Each window gives the same value as calculate_hurst_exponent on that window,
+    but the R/S value of every chunk is computed once and shared by all the
+    windows that contain it, so step=1 (one value per bar) stays cheap.
+    
     Parameters:
-        time_series (array-like): The time series data
+        time_series (array-like): The time series data (e.g., stock prices)
         window_size (int): Size of each window (e.g., 252 for annual window)
         step (int): Step size for rolling window (e.g., 63 for quarterly steps)
+        max_lag (int): Maximum lag for R/S calculation
+        executor (Executor): Optional process pool; long series are split into
+            blocks of windows computed in parallel
+        return_ci (bool): Also return the confidence interval of each window's estimate
+        confidence (float): Confidence level of the intervals
         
     Returns:
-        tuple: (dates, hurst_values)
+        tuple: (dates, hurst_values), or (dates, hurst_values, ci_low, ci_high) if return_ci is True
     """
-    hurst_values = []
-    indices = []
-    
     # Clean the input data
     if hasattr(time_series, 'dropna'):  # Check if it's a pandas Series or similar
         time_series = time_series.dropna().values
     else:
         # For numpy arrays or lists, convert to numpy and filter out NaN and Inf values
-        time_series = np.array(time_series)
+        time_series = np.array(time_series, dtype=float)
         time_series = time_series[~np.isnan(time_series) & ~np.isinf(time_series)]
     
     # Safety check for window size
     if len(time_series) < window_size:
-        print(f"Warning: time series length ({len(time_series)}) is less than window size ({window_size})")
+        logger.warning(f"Time series length ({len(time_series)}) is less than window size ({window_size})")
         # Try with a smaller window size if possible
         if len(time_series) >= 20:  # Minimum reasonable window size
             window_size = len(time_series) // 2
             step = max(1, window_size // 4)
-            print(f"Adjusting window size to {window_size} and step to {step}")
+            logger.info(f"Adjusting window size to {window_size} and step to {step}")
         else:
-            print("Insufficient data points for rolling Hurst calculation")
-            return indices, hurst_values
+            logger.warning("Insufficient data points for rolling Hurst calculation")
+            return ([], [], [], []) if return_ci else ([], [])
     
     # Use a smaller step if we have few data points
     if len(time_series) < 4 * step:
         step = max(1, len(time_series) // 8)
-        print(f"Adjusted step size to {step} based on available data")
+        logger.info(f"Adjusted step size to {step} based on available data")
     
-    for i in range(0, len(time_series) - window_size + 1, step):
-        if i + window_size <= len(time_series):
-            try:
-                window_data = time_series[i:i+window_size]
-                # Skip windows with insufficient valid data
-                if len(window_data) < window_size * 0.8:  # Require at least 80% of the window
-                    print(f"Skipping window at index {i} due to insufficient valid data")
-                    continue
-                    
-                h = calculate_hurst_exponent(window_data)
-                
-                # Validate the result
-                if np.isnan(h) or not np.isfinite(h) or h < 0 or h > 1:
-                    print(f"Invalid Hurst value {h} for window at index {i}, skipping")
-                    continue
-                    
-                hurst_values.append(h)
-                indices.append(i + window_size - 1)  # Index at the end of the window
-            except Exception as e:
-                print(f"Error calculating Hurst for window starting at index {i}: {e}")
-                # Skip this window and continue
-                continue
-    
-    return indices, hurst_values
+    starts = np.arange(0, len(time_series) - window_size + 1, step)
+    
+    if executor is not None and len(starts) >= ROLLING_PARALLEL_MIN_WINDOWS:
+        # Each block only needs the prices its windows cover
+        blocks = np.array_split(starts, min(len(starts) // ROLLING_PARALLEL_MIN_WINDOWS + 1, 32))
+        futures = [
+            executor.submit(_rolling_hurst, time_series[block[0]:block[-1] + window_size],
+                            block - block[0], window_size, max_lag, confidence)
+            for block in blocks
+        ]
+        hurst, ci_low, ci_high = np.concatenate([future.result() for future in futures], axis=1)
+    else:
+        hurst, ci_low, ci_high = _rolling_hurst(time_series, starts, window_size, max_lag, confidence)
+    
+    # Drop windows without a valid estimate
+    valid = np.isfinite(hurst) & (hurst >= 0) & (hurst <= 1)
+    indices = (starts[valid] + window_size - 1).tolist()  # Index at the end of the window
+    if return_ci:
+        return indices, hurst[valid].tolist(), ci_low[valid].tolist(), ci_high[valid].tolist()
+    return indices, hurst[valid].tolist()
 
 
-def analyze_hurst_exponent(ticker, window_size=252, step=63, date_from=None, date_to=None, visualize=False):
+def _rolling_hurst(prices, starts, window_size, max_lag=100, confidence=0.95):
+    """
+    Hurst exponent of the windows prices[start:start + window_size].
+    
+    Returns:
+        numpy.ndarray: Rows of hurst, ci_low and ci_high with one value per start,
+            NaN where the estimate is undefined
+    """
+    ts = np.asarray(prices, dtype=float)
+    ts = np.where(ts == 0, 1e-10, ts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.log(ts[1:] / ts[:-1])
+    
+    # Same lag range as calculate_hurst_exponent on a single window
+    n_returns = window_size - 1
+    if n_returns < max_lag:
+        max_lag = n_returns // 2
+    if max_lag < 5 or len(starts) == 0:
+        return np.full((3, len(starts)), np.nan)
+    lags = np.arange(2, max_lag)
+    
+    log_rs = np.full((len(starts), len(lags)), np.nan)
+    for j, lag in enumerate(lags):
+        # Chunk starts of every window for this lag
+        n_chunks = n_returns // lag
+        positions = starts[:, None] + np.arange(n_chunks) * lag
+        needed, inverse = np.unique(positions, return_inverse=True)
+        
+        # R/S of each distinct chunk, computed once
+        chunks = np.lib.stride_tricks.sliding_window_view(returns, lag)[needed]
+        cumsum = np.cumsum(chunks - chunks.mean(axis=1, keepdims=True), axis=1)
+        R = cumsum.max(axis=1) - cumsum.min(axis=1)
+        S = chunks.std(axis=1)
+        chunk_valid = np.isfinite(R) & (S >= 1e-10)
+        chunk_rs = np.where(chunk_valid, R / np.where(chunk_valid, S, 1.0), 0.0)
+        
+        # Average over the chunks of each window
+        inverse = inverse.reshape(positions.shape)
+        counts = chunk_valid[inverse].sum(axis=1)
+        totals = chunk_rs[inverse].sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_rs[:, j] = np.where(counts > 0, np.log10(totals / counts), np.nan)
+    
+    # Per-window least-squares slope over the valid lags
+    mask = np.isfinite(log_rs)
+    x = np.where(mask, np.log10(lags), 0.0)
+    y = np.where(mask, log_rs, 0.0)
+    n = mask.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_mean = x.sum(axis=1) / n
+        y_mean = y.sum(axis=1) / n
+        x_dev = np.where(mask, x - x_mean[:, None], 0.0)
+        sxx = (x_dev ** 2).sum(axis=1)
+        slope = (x_dev * (y - y_mean[:, None])).sum(axis=1) / sxx
+        
+        # Standard error of the slope, as in _fit_slope
+        residuals = np.where(mask, y - y_mean[:, None] - slope[:, None] * x_dev, 0.0)
+        stderr = np.sqrt((residuals ** 2).sum(axis=1) / (n - 2) / sxx)
+    
+    # Same minimum number of lags as calculate_hurst_exponent
+    enough = n >= 5
+    margin = t_dist.ppf(0.5 + confidence / 2, np.where(enough, n - 2, 1)) * stderr
+    slope = np.where(enough, slope, np.nan)
+    return np.vstack([slope, np.where(enough, slope - margin, np.nan), np.where(enough, slope + margin, np.nan)])
+
+
+def analyze_hurst_exponent(ticker, window_size=252, step=63, date_from=None, date_to=None, visualize=False,
+                           return_ci=False, confidence=0.95):
     """
     Analyze the Hurst exponent for a stock.
     
@@ -197,21 +317,24 @@ def analyze_hurst_exponent(ticker, window_size=252, step=63, date_from=None, dat
         date_from (str): Optional start date for analysis (YYYY-MM-DD)
         date_to (str): Optional end date for analysis (YYYY-MM-DD)
         visualize (bool): Whether to display visualization (kept for compatibility)
+        return_ci (bool): Also return the confidence interval of the full-period estimate
+        confidence (float): Confidence level of the interval
         
     Returns:
-        tuple: (DataFrame, Hurst exponent value)
+        tuple: (DataFrame, Hurst exponent value), or (DataFrame, Hurst exponent value,
+            (low, high)) if return_ci is True
     """
     try:
         date_range_info = ""
         if date_from or date_to:
             date_range_info = f" (from {date_from or 'beginning'} to {date_to or 'end'})"
-        print(f"Analyzing Hurst exponent for {ticker}{date_range_info}")
+        logger.info(f"Analyzing Hurst exponent for {ticker}{date_range_info}")
         
         # Read and prepare data with date filtering
         try:
             df = read_and_prepare_data(ticker, date_from, date_to)
         except Exception as data_error:
-            print(f"Error reading data: {data_error}")
+            logger.error(f"Error reading data: {data_error}")
             # Provide more specific error message
             if "No data available" in str(data_error) or "File not found" in str(data_error):
                 raise ValueError(f"No price data found for ticker '{ticker}'{date_range_info}")
@@ -228,83 +351,50 @@ def analyze_hurst_exponent(ticker, window_size=252, step=63, date_from=None, dat
         today = pd.Timestamp.today()
         future_dates = df.index[df.index > today]
         if len(future_dates) > 0:
-            print(f"Warning: Found {len(future_dates)} future dates in the data (first: {future_dates[0]})")
+            logger.warning(f"Found {len(future_dates)} future dates in the data (first: {future_dates[0]})")
         
-        # Calculate Hurst exponent for the entire series
-        # First try with log_returns if available
+        # Calculate Hurst exponent for the entire series from close prices; the
+        # estimator derives log returns itself, as for the rolling windows
         try:
-            if 'log_returns' in df.columns and not df['log_returns'].empty and not df['log_returns'].isna().all():
-                # Verify we have valid log_returns
-                valid_returns = df["log_returns"].dropna()
-                if len(valid_returns) >= window_size:
-                    print(f"Using log_returns for Hurst calculation ({len(valid_returns)} valid points)")
-                    hurst = calculate_hurst_exponent(valid_returns.values)
-                else:
-                    # Not enough valid log returns, fall back to using price data
-                    print(f"Insufficient valid log_returns ({len(valid_returns)}), falling back to close prices")
-                    prices = df["close"].dropna().values
-                    if len(prices) < window_size:
-                        raise ValueError(f"Insufficient close prices ({len(prices)}) for Hurst calculation")
-                    hurst = calculate_hurst_exponent(prices)
-            else:
-                # Fall back to calculating from close prices
-                print("No valid log_returns in data, using close prices for Hurst calculation")
-                prices = df["close"].dropna().values
-                if len(prices) < window_size:
-                    raise ValueError(f"Insufficient close prices ({len(prices)}) for Hurst calculation")
-                hurst = calculate_hurst_exponent(prices)
-                
+            prices = df["close"].dropna().values
+            if len(prices) < window_size:
+                raise ValueError(f"Insufficient close prices ({len(prices)}) for Hurst calculation")
+            logger.info(f"Using {len(prices)} close prices for Hurst calculation")
+            hurst, hurst_ci = calculate_hurst_exponent(prices, return_ci=True, confidence=confidence)
         except Exception as calc_error:
-            print(f"Error in Hurst calculation: {calc_error}")
+            logger.warning(f"Error in Hurst calculation: {calc_error}")
             
             # Try with a smaller window size if the original calculation failed
             try:
-                print(f"Retrying with a smaller subset of data (last {min(252, len(df))} points)")
+                logger.info(f"Retrying with a smaller subset of data (last {min(252, len(df))} points)")
                 if len(df) >= 20:  # Need at least some reasonable number of points
                     subset_size = min(252, len(df))
-                    
-                    # Try with log_returns first if available
-                    if 'log_returns' in df.columns and not df['log_returns'].empty:
-                        valid_returns = df["log_returns"].dropna().tail(subset_size)
-                        if len(valid_returns) >= 20:
-                            print(f"Using last {len(valid_returns)} valid log_returns for retry")
-                            hurst = calculate_hurst_exponent(valid_returns.values)
-                        else:
-                            # Not enough valid returns, use prices
-                            print(f"Using last {subset_size} close prices for retry")
-                            prices = df["close"].dropna().tail(subset_size).values
-                            hurst = calculate_hurst_exponent(prices)
-                    else:
-                        # Use prices directly
-                        prices = df["close"].dropna().tail(subset_size).values
-                        print(f"Using last {len(prices)} close prices for retry")
-                        hurst = calculate_hurst_exponent(prices)
-                        
-                    print(f"Successfully calculated Hurst with subset: {hurst:.3f}")
+                    prices = df["close"].dropna().tail(subset_size).values
+                    logger.info(f"Using last {len(prices)} close prices for retry")
+                    hurst, hurst_ci = calculate_hurst_exponent(prices, return_ci=True, confidence=confidence)
+                    logger.info(f"Successfully calculated Hurst with subset: {hurst:.3f}")
                 else:
                     raise ValueError(f"Not enough data points for retry (have {len(df)}, need at least 20)")
             except Exception as retry_error:
-                print(f"Retry failed: {retry_error}")
+                logger.error(f"Retry failed: {retry_error}")
                 raise ValueError(f"Failed to calculate Hurst exponent: {calc_error}. Retry error: {retry_error}")
             
         # Validate Hurst value
         if np.isnan(hurst) or not np.isfinite(hurst):
-            print(f"Invalid Hurst value calculated: {hurst}")
+            logger.error(f"Invalid Hurst value calculated: {hurst}")
             raise ValueError("Calculated Hurst exponent is not a valid number")
             
         interpretation = interpret_hurst(hurst)
         
-        print(f"\n=== Hurst Exponent Analysis for {ticker}{date_range_info} ===")
-        print(f"Full period Hurst: {hurst:.3f}")
-        print(interpretation)
+        logger.info(f"Hurst exponent for {ticker}{date_range_info}: {hurst:.3f}. {interpretation}")
         
+        if return_ci:
+            return df, hurst, hurst_ci
         return df, hurst
     
     except Exception as e:
-        print(f"Error analyzing Hurst exponent: {e}")
-        import traceback
-        traceback.print_exc()
-        return None, None
+        logger.exception(f"Error analyzing Hurst exponent: {e}")
+        return (None, None, None) if return_ci else (None, None)
 
 
 if __name__ == "__main__":
@@ -322,7 +412,7 @@ if __name__ == "__main__":
     if df is not None and hurst is not None:
         # Calculate rolling Hurst values
         indices, hurst_values = calculate_hurst_by_window(
-            df["log_returns"].values, WINDOW_SIZE, STEP
+            df["close"].dropna(), WINDOW_SIZE, STEP
         )
         
         # Print rolling Hurst values
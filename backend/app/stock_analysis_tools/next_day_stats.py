@@ -1,30 +1,162 @@
 import os
+import warnings
+import functools
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from .data_utils import read_and_prepare_data
 
 
+# Horizons (in bars) that calculate_returns always adds as Forward_Return_{n}d
+STANDARD_HORIZONS = (1, 5, 10, 20)
+
+# Percentiles reported per cell in grid mode
+GRID_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def forward_returns(close, horizons):
+    """
+    Forward returns for several horizons at once.
+    
+    Parameters:
+        close (array-like): Close prices
+        horizons (list): Look-ahead periods in bars
+        
+    Returns:
+        numpy.ndarray: Shape (len(close), len(horizons)); NaN where the horizon
+                       runs past the end of the data
+    """
+    close = np.asarray(close, dtype=float)
+    result = np.full((len(close), len(horizons)), np.nan)
+    for j, days in enumerate(horizons):
+        if 0 < days < len(close):
+            result[:-days, j] = close[days:] / close[:-days] - 1
+    return result
+
+
+def daily_changes(close):
+    """Daily percentage change as a fraction, NaN on the first bar."""
+    close = np.asarray(close, dtype=float)
+    pct_change = np.full(len(close), np.nan)
+    pct_change[1:] = close[1:] / close[:-1] - 1
+    return pct_change
+
+
+def threshold_moves(close, threshold, direction="down"):
+    """
+    Flag bars whose daily change is a move of at least threshold.
+    
+    Parameters:
+        close (array-like): Close prices in date order
+        threshold (float): Move size as a fraction (e.g. 0.03 for 3%)
+        direction (str): "up" for changes >= threshold, "down" for <= -threshold
+        
+    Returns:
+        numpy.ndarray: Boolean flag per bar
+    """
+    pct_change = daily_changes(close)
+    threshold = abs(threshold)
+    with np.errstate(invalid="ignore"):
+        if direction == "up":
+            return pct_change >= threshold
+        return pct_change <= -threshold
+
+
 def calculate_returns(df, close_col, y_days):
     """Calculate daily and forward returns."""
     df["Pct_Change"] = df[close_col].pct_change()
-    df["Forward_Return"] = df[close_col].shift(-y_days) / df[close_col] - 1
     
     # Make sure date is available as a column (not just as index)
     if "date" not in df.columns and df.index.name == "date":
         df["date"] = df.index
     
-    # Add multiple forward returns (1, 5, 10, 20 days)
-    days_list = [1, 5, 10, 20]
-    for days in days_list:
-        if days != y_days:  # Skip if already calculated
-            col_name = f"Forward_Return_{days}d"
-            df[col_name] = df[close_col].shift(-days) / df[close_col] - 1
+    # Requested horizon plus the standard 1, 5, 10, 20 day forward returns
+    extra_days = [days for days in STANDARD_HORIZONS if days != y_days]
+    returns = forward_returns(df[close_col].to_numpy(), [y_days] + extra_days)
+    df["Forward_Return"] = returns[:, 0]
+    for j, days in enumerate(extra_days, start=1):
+        df[f"Forward_Return_{days}d"] = returns[:, j]
     
     df = df.dropna(subset=["Pct_Change", "Forward_Return"])
     return df
 
 
+def next_day_stats_grid(close, thresholds, horizons, movement=None, percentiles=GRID_PERCENTILES):
+    """
+    Forward-return statistics for every (threshold, horizon) pair in one pass.
+    
+    A bar is an up-move for threshold x when its daily change is >= x and a
+    down-move when it is <= -x. Each cell summarises the forward returns over
+    the horizon of the moves that still have that many bars after them.
+    
+    Parameters:
+        close (array-like): Close prices in date order
+        thresholds (list): Move thresholds (e.g. 0.05 for 5%)
+        horizons (list): Look-ahead periods in bars
+        movement (str): "up", "down" or None for both
+        percentiles (tuple): Percentiles of the forward returns per cell
+        
+    Returns:
+        list: One dict per (direction, threshold, horizon) cell
+    """
+    close = np.asarray(close, dtype=float)
+    thresholds = np.abs(np.asarray(thresholds, dtype=float))
+    horizons = [int(days) for days in horizons]
+    
+    pct_change = daily_changes(close)
+    returns = forward_returns(close, horizons)
+    
+    directions = []
+    if movement in (None, "up"):
+        directions.append(("up", pct_change[None, :] >= thresholds[:, None]))
+    if movement in (None, "down"):
+        directions.append(("down", pct_change[None, :] <= -thresholds[:, None]))
+    
+    cells = []
+    for direction, masks in directions:
+        # (thresholds, bars, horizons) with NaN outside each threshold's moves
+        selected = np.where(masks[:, :, None], returns[None, :, :], np.nan)
+        valid = np.isfinite(selected)
+        counts = valid.sum(axis=1)
+        
+        with warnings.catch_warnings():
+            # Cells without moves are all-NaN and reported with None values
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            means = np.nanmean(selected, axis=1)
+            stds = np.nanstd(selected, axis=1, ddof=1)
+            mins = np.nanmin(selected, axis=1)
+            maxs = np.nanmax(selected, axis=1)
+            quantiles = np.nanpercentile(selected, percentiles, axis=1)
+            win_rates = (selected > 0).sum(axis=1) / counts
+        
+        for i, threshold in enumerate(thresholds):
+            for j, days in enumerate(horizons):
+                count = int(counts[i, j])
+                cells.append({
+                    "direction": direction,
+                    "threshold": float(threshold),
+                    "horizon": days,
+                    "count": count,
+                    "mean": _cell_value(means[i, j], count),
+                    "std": _cell_value(stds[i, j], count),
+                    "min": _cell_value(mins[i, j], count),
+                    "max": _cell_value(maxs[i, j], count),
+                    "win_rate": _cell_value(win_rates[i, j], count),
+                    "percentiles": {
+                        f"p{p:g}": _cell_value(quantiles[k, i, j], count)
+                        for k, p in enumerate(percentiles)
+                    }
+                })
+    return cells
+
+
+def _cell_value(value, count):
+    """Float for JSON output, None for empty cells or undefined statistics."""
+    if count == 0 or not np.isfinite(value):
+        return None
+    return float(value)
+
+
 def filter_moves(df, x_threshold):
     """Filter moves based on threshold."""
     # Add debug logging
@@ -102,9 +234,61 @@ def report_stats(group, label, date_col, x_threshold, y_days):
         print(f"Error calculating statistics: {e}")
 
 
+class MoveStats:
+    """
+    Forward-return statistics of one group of moves.
+    
+    Nothing is computed until the summary or rows are requested, and the
+    summary is computed once.
+    """
+    
+    def __init__(self, moves, label, y_days, date_col="date"):
+        self.moves = moves
+        self.label = label
+        self.y_days = y_days
+        self.date_col = date_col
+    
+    @functools.cached_property
+    def summary(self):
+        """count, mean, std, min, q1, median, q3 and max of the forward returns."""
+        desc = self.moves["Forward_Return"].describe(percentiles=[0.25, 0.5, 0.75])
+        keys = {"mean": "mean", "std": "std", "min": "min", "q1": "25%",
+                "median": "50%", "q3": "75%", "max": "max"}
+        summary = {"count": int(desc["count"])}
+        for key, name in keys.items():
+            summary[key] = float(desc[name]) if not pd.isna(desc[name]) else None
+        return summary
+    
+    def records(self):
+        """The matching rows as JSON-ready dicts with string dates."""
+        data = self.moves.copy()
+        if self.date_col in data.columns and not data.empty:
+            dates = data[self.date_col]
+            if pd.api.types.is_datetime64_any_dtype(dates):
+                data[self.date_col] = dates.dt.strftime("%Y-%m-%d")
+            elif isinstance(dates.iloc[0], datetime):
+                data[self.date_col] = dates.apply(lambda x: x.strftime("%Y-%m-%d") if hasattr(x, 'strftime') else str(x))
+        return data.to_dict(orient="records")
+    
+    def to_dict(self, include_data=True):
+        result = dict(self.summary)
+        if include_data:
+            result["data"] = self.records()
+        return result
+    
+    def report(self, x_threshold):
+        """Print the human-readable table and summary."""
+        report_stats(self.moves, self.label, self.date_col, x_threshold, self.y_days)
+
+
 def analyze_next_day_stats(ticker, x_threshold=0.10, y_days=10, 
-                          date_from=None, date_to=None, movement=None):
-    """Main function to analyze next-day statistics after significant moves."""
+                          date_from=None, date_to=None, movement=None, report=False):
+    """
+    Main function to analyze next-day statistics after significant moves.
+    
+    Returns (df, up, down); wrap up/down in MoveStats for their statistics.
+    With report=True the matching rows and statistics are also printed.
+    """
     try:
         # Add debug logging
         print(f"Starting next-day stats analysis for {ticker} with threshold={x_threshold}, y_days={y_days}")
@@ -169,22 +353,15 @@ def analyze_next_day_stats(ticker, x_threshold=0.10, y_days=10,
             print(f"WARNING: No significant price moves found for {ticker} with threshold {x_threshold}")
             return df, pd.DataFrame(), pd.DataFrame()  # Return empty DataFrames with the same structure
         
-        # Run reports based on movement config - use ASCII versions to avoid Unicode encoding issues
-        try:
-            if movement == "up":
-                if len(up) > 0:
-                    report_stats(up, f"Up-moves >= +{x_threshold:.1%}", "date", x_threshold, y_days)
-            elif movement == "down":
-                if len(down) > 0:
-                    report_stats(down, f"Down-moves <= -{x_threshold:.1%}", "date", x_threshold, y_days)
-            else:
-                if len(up) > 0:
-                    report_stats(up, f"Up-moves >= +{x_threshold:.1%}", "date", x_threshold, y_days)
-                if len(down) > 0:
-                    report_stats(down, f"Down-moves <= -{x_threshold:.1%}", "date", x_threshold, y_days)
-        except Exception as e:
-            print(f"WARNING: Error generating reports: {e}")
-            # Continue anyway - we still want to return the data
+        # Printing every row is only wanted on the command line
+        if report:
+            try:
+                if movement != "down" and len(up) > 0:
+                    MoveStats(up, f"Up-moves >= +{x_threshold:.1%}", y_days).report(x_threshold)
+                if movement != "up" and len(down) > 0:
+                    MoveStats(down, f"Down-moves <= -{x_threshold:.1%}", y_days).report(x_threshold)
+            except Exception as e:
+                print(f"WARNING: Error generating reports: {e}")
         
         return df, up, down
     
@@ -195,6 +372,36 @@ def analyze_next_day_stats(ticker, x_threshold=0.10, y_days=10,
         return None, None, None
 
 
+def analyze_next_day_stats_grid(ticker, thresholds, horizons, date_from=None, date_to=None,
+                               movement=None, percentiles=GRID_PERCENTILES):
+    """
+    Grid version of analyze_next_day_stats for several thresholds and horizons.
+    
+    Parameters:
+        ticker (str): Stock ticker symbol
+        thresholds (list): Move thresholds (e.g. [0.03, 0.05, 0.1])
+        horizons (list): Look-ahead periods in days (e.g. [1, 5, 10, 20])
+        date_from (str): Optional start date (YYYY-MM-DD)
+        date_to (str): Optional end date (YYYY-MM-DD)
+        movement (str): "up", "down" or None for both
+        percentiles (tuple): Percentiles of the forward returns per cell
+        
+    Returns:
+        dict: Data range summary and the list of cells, or None if there is no data
+    """
+    df = read_and_prepare_data(ticker, date_from, date_to, calc_returns=False, sync_with_yfinance=True)
+    if df is None or df.empty:
+        return None
+    
+    close = df["close"].to_numpy(dtype=float)
+    return {
+        "bars": len(close),
+        "start": df.index.min().strftime("%Y-%m-%d"),
+        "end": df.index.max().strftime("%Y-%m-%d"),
+        "cells": next_day_stats_grid(close, thresholds, horizons, movement, percentiles)
+    }
+
+
 if __name__ == "__main__":
     # ─── CONFIG ────────────────────────────────────────────────────────────────
     TICKER       = "AAPL"                                    # ← your ticker here
@@ -205,5 +412,5 @@ if __name__ == "__main__":
     MOVEMENT     = "down"                                    # "up" for only up-moves, "down" for only down-moves, None for both
     
     df, up, down = analyze_next_day_stats(
-        TICKER, X_THRESHOLD, Y_DAYS, DATE_FROM, DATE_TO, MOVEMENT
+        TICKER, X_THRESHOLD, Y_DAYS, DATE_FROM, DATE_TO, MOVEMENT, report=True
     )
@@ -3,12 +3,17 @@
 import os
 import numpy as np
 import pandas as pd
-from scipy.stats import gaussian_kde
 from datetime import datetime
+from scipy.stats import lognorm, norm, qmc
 from .data_utils import read_and_prepare_data
+from .kde import evaluate_kde
 
 # ———————— Config ————————
 DEFAULT_TRADING_DAYS = 252    # for annualization
+ANALYTIC_TAIL = 1e-4          # probability mass left off each end of the analytic grid
+SAMPLERS = ("pseudo", "antithetic", "sobol")
+BOOTSTRAP_BLOCK_SIZE = 5      # trading days per resampled block
+HORIZON_PERCENTILES = (5, 25, 50, 75, 95)
 # ————————————————————————————————————————————
 
 
@@ -18,50 +23,227 @@ def load_prices_from_db(ticker, date_from=None, date_to=None):
     return df["close"].values
 
 
+def load_log_returns_from_db(ticker, date_from=None, date_to=None):
+    """Load closes and the log returns read_and_prepare_data computes for them."""
+    df = read_and_prepare_data(ticker, date_from=date_from, date_to=date_to, calc_returns=True)
+    return df["close"].values, df["log_returns"].dropna().values
+
+
+def historical_log_returns(prices):
+    """Daily log returns of prices, skipping non-positive ratios as read_and_prepare_data does."""
+    ratios = prices[1:] / prices[:-1]
+    return np.log(ratios[(ratios > 0) & np.isfinite(ratios)])
+
+
+def bootstrap_indices(n_returns, horizon_days, n_sims, block_size=BOOTSTRAP_BLOCK_SIZE, seed=None):
+    """
+    Resampling matrix for a moving-block bootstrap.
+
+    Each row strings together randomly chosen runs of block_size consecutive
+    return indices, so short-range autocorrelation and volatility clustering in
+    the history carry over into the simulated paths.
+
+    Returns:
+        numpy.ndarray: (n_sims, horizon_days) indices into the return series
+    """
+    if horizon_days < 1:
+        raise ValueError("horizon_days must be at least 1")
+    if n_returns < 2:
+        raise ValueError("At least two returns are needed to bootstrap")
+    block_size = max(1, min(block_size, n_returns))
+    n_blocks = -(-horizon_days // block_size)
+    starts = np.random.default_rng(seed).integers(0, n_returns - block_size + 1, size=(n_sims, n_blocks))
+    indices = (starts[:, :, None] + np.arange(block_size)).reshape(n_sims, -1)
+    return indices[:, :horizon_days]
+
+
+def bootstrap_log_paths(log_returns, horizon_days, n_sims=10000, block_size=BOOTSTRAP_BLOCK_SIZE, seed=None):
+    """Cumulative log-return paths, (n_sims, horizon_days), resampled from log_returns in blocks."""
+    log_returns = np.asarray(log_returns, dtype=float)
+    indices = bootstrap_indices(len(log_returns), horizon_days, n_sims, block_size, seed)
+    return np.cumsum(log_returns[indices], axis=1)
+
+
+def bootstrap_horizon_quantiles(
+    prices,
+    horizons,
+    n_sims=10000,
+    block_size=BOOTSTRAP_BLOCK_SIZE,
+    seed=None,
+    log_returns=None,
+    percentiles=HORIZON_PERCENTILES
+):
+    """
+    End-price quantiles for several horizons from one set of bootstrapped paths.
+
+    Paths are simulated once to the longest horizon; each horizon reads its
+    column of the cumulative log returns. log_returns defaults to the
+    historical log returns of prices.
+
+    Returns:
+        list: One dict per horizon with horizon, mean, prob_up and percentiles
+    """
+    if log_returns is None:
+        log_returns = historical_log_returns(prices)
+    last_price = prices[-1]
+    horizons = sorted({int(h) for h in horizons})
+    paths = bootstrap_log_paths(log_returns, horizons[-1], n_sims, block_size, seed)
+    end_prices = last_price * np.exp(paths[:, np.array(horizons) - 1])
+    quantiles = np.percentile(end_prices, percentiles, axis=0)
+    return [
+        {
+            "horizon": horizon,
+            "mean": float(end_prices[:, j].mean()),
+            "prob_up": float((end_prices[:, j] > last_price).mean()),
+            "percentiles": {f"p{p}": float(quantiles[i, j]) for i, p in enumerate(percentiles)}
+        }
+        for j, horizon in enumerate(horizons)
+    ]
+
+
+def gbm_parameters(prices):
+    """Daily drift and volatility of log returns, the GBM parameters of a price series."""
+    returns = np.log(prices[1:] / prices[:-1])
+    return returns.mean(), returns.std(ddof=1)
+
+
+def standard_normals(n_sims, n_steps=1, sampler="pseudo", seed=None):
+    """
+    Draw an (n_sims, n_steps) array of standard normal variates.
+
+    sampler:
+      - "pseudo": plain pseudo-random draws
+      - "antithetic": pseudo-random draws paired with their negatives
+      - "sobol": scrambled Sobol points mapped through the normal quantile function
+    seed: seed for the generator, so that runs are reproducible
+    """
+    if sampler == "pseudo":
+        return np.random.default_rng(seed).standard_normal((n_sims, n_steps))
+    if sampler == "antithetic":
+        half = np.random.default_rng(seed).standard_normal(((n_sims + 1) // 2, n_steps))
+        return np.concatenate([half, -half])[:n_sims]
+    if sampler == "sobol":
+        engine = qmc.Sobol(d=n_steps, scramble=True, seed=seed)
+        points = engine.random_base2(m=max(0, int(np.ceil(np.log2(n_sims)))))[:n_sims]
+        return norm.ppf(np.clip(points, 1e-12, 1 - 1e-12))
+    raise ValueError(f"Unknown sampler: {sampler}. Use one of {', '.join(SAMPLERS)}")
+
+
+def simulate_gbm_paths(last_price, drift, volatility, horizon_days, n_sims=10000, sampler="pseudo", seed=None):
+    """
+    Simulate daily GBM price paths.
+
+    drift and volatility are the daily log-return mean and standard deviation
+    (see gbm_parameters). Returns an (n_sims, horizon_days + 1) array whose
+    first column is last_price.
+    """
+    steps = drift + volatility * standard_normals(n_sims, horizon_days, sampler, seed)
+    log_paths = np.cumsum(steps, axis=1)
+    return last_price * np.exp(np.concatenate([np.zeros((n_sims, 1)), log_paths], axis=1))
+
+
+def touch_probabilities(paths, levels):
+    """
+    Probability that simulated closes reach each level within the horizon.
+
+    Levels above the starting price count a touch when a path's maximum reaches
+    them, levels below when its minimum does. "finish" is the probability that
+    the last close is beyond the level.
+
+    Returns:
+        list: One dict per level with level, direction, touch and finish
+    """
+    start = paths[0, 0]
+    levels = np.asarray(levels, dtype=float)
+    up = levels >= start
+    highs = paths.max(axis=1)
+    lows = paths.min(axis=1)
+    ends = paths[:, -1]
+
+    touch = np.where(up, (highs[:, None] >= levels).mean(axis=0), (lows[:, None] <= levels).mean(axis=0))
+    finish = np.where(up, (ends[:, None] >= levels).mean(axis=0), (ends[:, None] <= levels).mean(axis=0))
+    return [
+        {
+            "level": float(level),
+            "direction": "up" if is_up else "down",
+            "touch": float(t),
+            "finish": float(f)
+        }
+        for level, is_up, t, f in zip(levels, up, touch, finish)
+    ]
+
+
+def compute_touch_probabilities(prices, levels, horizon_days=1, n_sims=10000, sampler="pseudo", seed=None):
+    """Fit GBM to prices, simulate daily paths over the horizon and return touch_probabilities."""
+    drift, volatility = gbm_parameters(prices)
+    paths = simulate_gbm_paths(prices[-1], drift, volatility, horizon_days, n_sims, sampler, seed)
+    return touch_probabilities(paths, levels)
+
+
 def compute_distribution(
     prices,
-    method="hist",          # "hist", "kde", or "mc_kde"
+    method="hist",          # "hist", "kde", "mc_kde", "analytic" or "bootstrap"
     bin_size=5,
     smooth_window=3,
     n_sims=10000,
     horizon_days=1,
     bw_method=0.15,         # Added parameter for KDE bandwidth
-    grid_size=500           # Added parameter for KDE grid size
+    grid_size=500,          # Added parameter for KDE grid size
+    kde_method="fft",       # "fft" (binned) or "exact" (scipy gaussian_kde)
+    sampler="pseudo",       # "pseudo", "antithetic" or "sobol" draws for mc_kde
+    seed=None,              # random seed for mc_kde and bootstrap
+    log_returns=None,       # historical log returns for bootstrap (derived from prices if omitted)
+    block_size=BOOTSTRAP_BLOCK_SIZE
 ):
     """
     Returns (x, y) for plotting:
       - method="hist": histogram + moving average on historical prices
       - method="kde": KDE on historical prices
       - method="mc_kde": Monte Carlo simulate future end-prices, then KDE
+      - method="analytic": exact lognormal density of the GBM end-price
+      - method="bootstrap": block-bootstrap historical log returns to end-prices, then KDE
 
     n_sims: number of Monte Carlo simulations
-    horizon_days: days ahead to simulate (uses DEFAULT_TRADING_DAYS for annualization)
+    horizon_days: trading days ahead to simulate
     bw_method: bandwidth method for gaussian_kde (scalar or str)
     grid_size: number of points in the output grid
+    kde_method: "fft" for the binned FFT KDE, "exact" for scipy's gaussian_kde
+    sampler: how mc_kde draws its normals (see standard_normals)
+    seed: random seed for mc_kde and bootstrap
+    log_returns: historical daily log returns to resample for bootstrap
+    block_size: consecutive days per bootstrap block
     """
+    if method.lower() == "analytic":
+        # GBM end-price is lognormal: log(S_T / S_0) ~ N(drift * T, volatility^2 * T)
+        drift, volatility = gbm_parameters(prices)
+        end_price = lognorm(s=volatility * np.sqrt(horizon_days), scale=prices[-1] * np.exp(drift * horizon_days))
+        xs = np.linspace(end_price.ppf(ANALYTIC_TAIL), end_price.ppf(1 - ANALYTIC_TAIL), grid_size)
+        ys = end_price.pdf(xs) * 100
+        return xs, ys
+
     if method.lower() == "mc_kde":
-        # Monte Carlo on log-returns
-        # compute daily log returns
-        returns = np.log(prices[1:] / prices[:-1])
-        mu = returns.mean()
-        sigma = returns.std(ddof=1)
-        # simulation horizon in years
-        T = horizon_days / DEFAULT_TRADING_DAYS
-        last_price = prices[-1]
-        # simulate N end-prices: GBM
-        Z = np.random.normal(size=n_sims)
-        sim_end = last_price * np.exp((mu - 0.5 * sigma**2)*T + sigma * np.sqrt(T) * Z)
+        # Monte Carlo on daily log-returns: simulate N GBM end-prices
+        drift, volatility = gbm_parameters(prices)
+        Z = standard_normals(n_sims, 1, sampler, seed)[:, 0]
+        sim_end = prices[-1] * np.exp(drift * horizon_days + volatility * np.sqrt(horizon_days) * Z)
         # KDE on simulated end prices
-        kde = gaussian_kde(sim_end, bw_method=bw_method)
         xs = np.linspace(sim_end.min(), sim_end.max(), grid_size)
-        ys = kde(xs) * 100
+        ys = evaluate_kde(sim_end, xs, bw_method, kde_method) * 100
+        return xs, ys
+
+    if method.lower() == "bootstrap":
+        if log_returns is None:
+            log_returns = historical_log_returns(prices)
+        paths = bootstrap_log_paths(log_returns, horizon_days, n_sims, block_size, seed)
+        sim_end = prices[-1] * np.exp(paths[:, -1])
+        xs = np.linspace(sim_end.min(), sim_end.max(), grid_size)
+        ys = evaluate_kde(sim_end, xs, bw_method, kde_method) * 100
         return xs, ys
 
     if method.lower() == "kde":
         # KDE on historical prices with configurable bandwidth and grid size
-        kde = gaussian_kde(prices, bw_method=bw_method)
         xs = np.linspace(prices.min(), prices.max(), grid_size)
-        ys = kde(xs) * 100
+        ys = evaluate_kde(prices, xs, bw_method, kde_method) * 100
         return xs, ys
 
     # default: histogram + moving average
@@ -78,13 +260,19 @@ def get_price_distribution_data(
     ticker,
     date_from=None,
     date_to=None,
-    method="hist",         # "hist", "kde", or "mc_kde"
+    method="hist",         # "hist", "kde", "mc_kde", "analytic" or "bootstrap"
     bin_size=5,
     smooth_window=3,
     n_sims=10000,
     horizon_days=1,
     bw_method=0.15,        # Added parameter for KDE bandwidth
-    grid_size=500          # Added parameter for KDE grid size
+    grid_size=500,         # Added parameter for KDE grid size
+    kde_method="fft",      # "fft" (binned) or "exact" (scipy gaussian_kde)
+    sampler="pseudo",      # "pseudo", "antithetic" or "sobol" draws for mc_kde
+    seed=None,             # random seed for Monte Carlo
+    touch_levels=None,     # price levels for path touch probabilities
+    horizons=None,         # horizons (days) for bootstrap end-price quantiles
+    block_size=BOOTSTRAP_BLOCK_SIZE
 ):
     """
     Get price distribution data for a ticker.
@@ -100,12 +288,22 @@ def get_price_distribution_data(
         horizon_days (int): Horizon days for Monte Carlo
         bw_method (float): Bandwidth for KDE (0.01-1.0)
         grid_size (int): Number of points in KDE grid
+        kde_method (str): "fft" or "exact" KDE evaluation
+        sampler (str): "pseudo", "antithetic" or "sobol" Monte Carlo draws
+        seed (int): Random seed for Monte Carlo
+        touch_levels (list): Price levels to report touch probabilities for
+        horizons (list): Horizons in trading days for bootstrap quantiles (default [horizon_days])
+        block_size (int): Consecutive days per bootstrap block
         
     Returns:
         dict: Price distribution data
     """
     # Load price data
-    prices = load_prices_from_db(ticker, date_from=date_from, date_to=date_to)
+    log_returns = None
+    if method.lower() == "bootstrap":
+        prices, log_returns = load_log_returns_from_db(ticker, date_from=date_from, date_to=date_to)
+    else:
+        prices = load_prices_from_db(ticker, date_from=date_from, date_to=date_to)
     if prices.size == 0:
         raise ValueError("No price data for given range")
         
@@ -118,7 +316,12 @@ def get_price_distribution_data(
         n_sims=n_sims,
         horizon_days=horizon_days,
         bw_method=bw_method,
-        grid_size=grid_size
+        grid_size=grid_size,
+        kde_method=kde_method,
+        sampler=sampler,
+        seed=seed,
+        log_returns=log_returns,
+        block_size=block_size
     )
     
     # Calculate statistics
@@ -130,13 +333,22 @@ def get_price_distribution_data(
         "std": float(np.std(prices))
     }
     
-    return {
+    result = {
         "distribution": {
             "x": x.tolist(),
             "y": y.tolist()
         },
         "stats": stats
     }
+    if method.lower() == "bootstrap":
+        result["horizon_quantiles"] = bootstrap_horizon_quantiles(
+            prices, horizons or [horizon_days], n_sims, block_size, seed, log_returns
+        )
+    if touch_levels:
+        result["touch_probabilities"] = compute_touch_probabilities(
+            prices, touch_levels, horizon_days, n_sims, sampler, seed
+        )
+    return result
 
 
 # Example usage:
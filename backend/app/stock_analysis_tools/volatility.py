@@ -2,7 +2,16 @@ import os
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from scipy.signal import lfilter
 from .data_utils import read_and_prepare_data
+from .kde import evaluate_kde
+
+# Realized volatility defaults: rolling windows (trading days), RiskMetrics EWMA decay
+# and the annualization factor
+VOLATILITY_WINDOWS = (10, 21, 63)
+EWMA_LAMBDA = 0.94
+TRADING_DAYS = 252
+ESTIMATORS = ("close_to_close", "parkinson", "garman_klass", "rogers_satchell", "yang_zhang")
 
 
 def calculate_returns(df):
@@ -50,6 +59,178 @@ def calculate_statistics(df):
     return returns, avg, std
 
 
+def returns_density(returns, bandwidth=0.15, grid_size=500, kde_method="fft"):
+    """
+    Kernel density of returns on an evenly spaced grid, ready for charting.
+    
+    Args:
+        returns: Series or array of returns
+        bandwidth: KDE bandwidth factor
+        grid_size: Number of grid points
+        kde_method: "fft" (binned) or "exact" (scipy gaussian_kde)
+    
+    Returns:
+        Dict with "x" and "y" lists, or None when there are too few returns
+    """
+    values = np.asarray(returns, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values) < 2 or values.std() == 0:
+        return None
+    xs = np.linspace(values.min(), values.max(), grid_size)
+    ys = evaluate_kde(values, xs, bandwidth, kde_method)
+    return {"x": xs.tolist(), "y": ys.tolist()}
+
+
+def rolling_mean(values, window):
+    """
+    Trailing mean over window bars using cumulative sums.
+    
+    Bars without a full window of finite values are NaN, so a gap only
+    affects the windows that contain it.
+    """
+    values = np.asarray(values, dtype=float)
+    out = np.full(len(values), np.nan)
+    if window < 1 or window > len(values):
+        return out
+    valid = np.isfinite(values)
+    sums = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(valid)])
+    window_sums = sums[window:] - sums[:-window]
+    full = (counts[window:] - counts[:-window]) == window
+    out[window - 1:] = np.where(full, window_sums / window, np.nan)
+    return out
+
+
+def rolling_variance(values, window):
+    """Trailing sample variance (ddof=1) over window bars."""
+    values = np.asarray(values, dtype=float)
+    mean = rolling_mean(values, window)
+    mean_square = rolling_mean(values ** 2, window)
+    return np.maximum(mean_square - mean ** 2, 0.0) * window / (window - 1)
+
+
+def ewma_variance(returns, ewma_lambda=EWMA_LAMBDA):
+    """
+    RiskMetrics EWMA variance: var_t = lambda * var_(t-1) + (1 - lambda) * r_t^2.
+    
+    The recursion runs as a single linear filter, seeded with the first squared
+    return. Leading NaN returns stay NaN.
+    """
+    returns = np.asarray(returns, dtype=float)
+    out = np.full(len(returns), np.nan)
+    finite = np.flatnonzero(np.isfinite(returns))
+    if len(finite) == 0:
+        return out
+    squared = np.nan_to_num(returns[finite[0]:] ** 2)
+    initial = [ewma_lambda * squared[0]]
+    out[finite[0]:], _ = lfilter([1 - ewma_lambda], [1, -ewma_lambda], squared, zi=initial)
+    return out
+
+
+def realized_volatility(close, open_=None, high=None, low=None, windows=VOLATILITY_WINDOWS,
+                        ewma_lambda=EWMA_LAMBDA, trading_days=TRADING_DAYS):
+    """
+    Annualized realized volatility estimators over several rolling windows.
+    
+    Args:
+        close, open_, high, low: Price arrays aligned by bar (OHLC optional; without
+            them only close-to-close and EWMA are computed)
+        windows: Rolling window lengths in bars
+        ewma_lambda: EWMA decay factor
+        trading_days: Bars per year for annualization
+    
+    Returns:
+        dict: {"windows": {window: {estimator: array}}, "ewma": array}; each array
+              is aligned with close and NaN before its first full window
+    """
+    close = np.asarray(close, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.concatenate([[np.nan], np.log(close[1:] / close[:-1])])
+        has_ohlc = open_ is not None and high is not None and low is not None
+        if has_ohlc:
+            open_, high, low = (np.asarray(a, dtype=float) for a in (open_, high, low))
+            log_ho = np.log(high / open_)
+            log_lo = np.log(low / open_)
+            log_co = np.log(close / open_)
+            log_hl = log_ho - log_lo
+            overnight = np.concatenate([[np.nan], np.log(open_[1:] / close[:-1])])
+            parkinson = log_hl ** 2 / (4 * np.log(2))
+            garman_klass = 0.5 * log_hl ** 2 - (2 * np.log(2) - 1) * log_co ** 2
+            rogers_satchell = log_ho * (log_ho - log_co) + log_lo * (log_lo - log_co)
+
+    def annualize(variance):
+        return np.sqrt(variance * trading_days)
+
+    result = {"windows": {}, "ewma": annualize(ewma_variance(returns, ewma_lambda))}
+    for window in windows:
+        estimates = {"close_to_close": annualize(rolling_variance(returns, window))}
+        if has_ohlc:
+            rs_variance = rolling_mean(rogers_satchell, window)
+            k = 0.34 / (1.34 + (window + 1) / (window - 1))
+            estimates["parkinson"] = annualize(rolling_mean(parkinson, window))
+            estimates["garman_klass"] = annualize(np.maximum(rolling_mean(garman_klass, window), 0.0))
+            estimates["rogers_satchell"] = annualize(rs_variance)
+            estimates["yang_zhang"] = annualize(
+                rolling_variance(overnight, window) + k * rolling_variance(log_co, window) + (1 - k) * rs_variance
+            )
+        result["windows"][window] = estimates
+    return result
+
+
+def _to_json_list(values):
+    return [None if np.isnan(v) else round(float(v), 6) for v in values]
+
+
+def volatility_suite(df, windows=VOLATILITY_WINDOWS, ewma_lambda=EWMA_LAMBDA, include_series=True):
+    """
+    Realized volatility estimators for a price DataFrame, ready for the API.
+    
+    Args:
+        df: DataFrame with close (and ideally open/high/low) columns, lower or title case
+        windows: Rolling window lengths in bars
+        ewma_lambda: EWMA decay factor
+        include_series: Include full series aligned with the DataFrame rows
+    
+    Returns:
+        dict: Latest annualized value per window and estimator, plus optional series
+    """
+    def column(name):
+        for candidate in (name, name.capitalize()):
+            if candidate in df.columns:
+                return pd.to_numeric(df[candidate], errors="coerce").to_numpy(dtype=float)
+        return None
+    
+    close = column("close")
+    if close is None:
+        raise ValueError("DataFrame must have 'close' or 'Close' column")
+    vol = realized_volatility(
+        close, column("open"), column("high"), column("low"),
+        windows=windows, ewma_lambda=ewma_lambda
+    )
+    
+    def latest(values):
+        finite = values[np.isfinite(values)]
+        return round(float(finite[-1]), 6) if len(finite) else None
+    
+    result = {
+        "windows": list(windows),
+        "ewma_lambda": ewma_lambda,
+        "annualization": TRADING_DAYS,
+        "latest": {
+            str(window): {name: latest(values) for name, values in estimates.items()}
+            for window, estimates in vol["windows"].items()
+        }
+    }
+    result["latest"]["ewma"] = latest(vol["ewma"])
+    if include_series:
+        result["series"] = {
+            str(window): {name: _to_json_list(values) for name, values in estimates.items()}
+            for window, estimates in vol["windows"].items()
+        }
+        result["series"]["ewma"] = _to_json_list(vol["ewma"])
+    return result
+
+
 def analyze_volatility(ticker, date_from=None, date_to=None):
     """Main function to analyze stock volatility."""
     try:
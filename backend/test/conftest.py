@@ -107,4 +107,26 @@ def mock_get_yfinance_data():
 def mock_update_mongodb():
     with patch('app.services.yfinance_sync.YFinanceSync.update_mongodb', 
                return_value=True):
-        yield 
\ No newline at end of file
+        yield 
+
+# Disable the prepared frame cache so tests that mock the data loaders see every call
+@pytest.fixture(autouse=True)
+def disable_frame_cache():
+    from app.stock_analysis_tools.frame_cache import prepared_frame_cache
+    with patch.object(prepared_frame_cache, 'enabled', False):
+        yield
+
+# Keep the backtest result store off the real database; store tests patch their own client
+@pytest.fixture(autouse=True)
+def mock_backtest_store_client():
+    with patch('app.stock_analysis_tools.backtest_store.get_mongo_client', return_value=MagicMock()):
+        yield
+
+
+# Keep sync watermarks off the real database; tests that need a state patch get_sync_state
+@pytest.fixture(autouse=True)
+def mock_sync_state_db():
+    mock_db = MagicMock()
+    mock_db.client.__getitem__.return_value.__getitem__.return_value.find_one.return_value = None
+    with patch('app.services.yfinance_sync.db', mock_db):
+        yield mock_db
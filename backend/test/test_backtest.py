@@ -0,0 +1,281 @@
+import os
+import sys
+import time
+import pytest
+import numpy as np
+import pandas as pd
+
+# Set testing environment variable
+os.environ['TESTING'] = 'True'
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.stock_analysis_tools.backtest import (
+    STRATEGIES,
+    relative_strength_index,
+    run_backtest,
+    performance_metrics,
+    run_strategy_backtest,
+    run_portfolio_backtest,
+    rebalance_starts,
+    rebalanced_sleeves,
+    _signals
+)
+
+
+def create_bars(close, spread=0.0):
+    """OHLCV arrays where open equals close and high/low are close +/- spread"""
+    close = np.asarray(close, dtype=float)
+    return {
+        "open": close.copy(),
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": np.full(len(close), 1000.0)
+    }
+
+
+def create_random_bars(n_days=500, seed=0):
+    """Random-walk OHLCV data"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n_days)))
+    open_ = close * np.exp(rng.normal(0, 0.005, n_days))
+    return {
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n_days)),
+        "low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n_days)),
+        "close": close,
+        "volume": rng.uniform(1e5, 1e6, n_days)
+    }
+
+
+def business_dates(n_days):
+    return pd.bdate_range("2022-01-03", periods=n_days).values
+
+
+def test_rsi_matches_wilder_recursion():
+    close = create_random_bars(100)["close"]
+    rsi = relative_strength_index(close, 14)
+    assert np.isnan(rsi[:14]).all()
+
+    change = np.diff(close)
+    gain, loss = np.maximum(change, 0)[:14].mean(), np.maximum(-change, 0)[:14].mean()
+    expected = [100 - 100 / (1 + gain / loss)]
+    for c in change[14:]:
+        gain = (gain * 13 + max(c, 0)) / 14
+        loss = (loss * 13 + max(-c, 0)) / 14
+        expected.append(100 - 100 / (1 + gain / loss))
+    assert np.allclose(rsi[14:], expected)
+
+
+def test_signal_exit_and_equity():
+    close = [10, 10, 11, 12, 12, 13]
+    data = create_bars(close)
+    entries = np.array([0, 1, 0, 0, 0, 0])
+    exits = np.array([0, 0, 0, 1, 0, 0], dtype=bool)
+    trades, equity = run_backtest(business_dates(6), data, _signals(6, entries, exits), 1000, 1.0, 0, 0)
+
+    assert len(trades) == 1
+    trade = trades[0]
+    assert (trade["entry_bar"], trade["exit_bar"], trade["reason"]) == (1, 3, "signal")
+    assert trade["shares"] == 100 and trade["profit"] == 200
+    # Marked to market each bar, flat after the exit
+    assert equity.tolist() == [1000, 1000, 1100, 1200, 1200, 1200]
+
+
+def test_stop_loss_and_gaps():
+    # Long from 100 with a 5% stop: bar 2 trades down to 94 intraday
+    data = create_bars([100, 100, 97, 98])
+    data["low"][2] = 94
+    signals = _signals(4, [1, 0, 0, 0])
+    trades, _ = run_backtest(business_dates(4), data, signals, 10000, 1.0, 0.05, 0)
+    assert trades[0]["exit_bar"] == 2 and trades[0]["exit_price"] == 95 and trades[0]["reason"] == "stop_loss"
+
+    # Gapping through the stop fills at the open
+    data["open"][2] = 90
+    trades, _ = run_backtest(business_dates(4), data, signals, 10000, 1.0, 0.05, 0)
+    assert trades[0]["exit_price"] == 90
+
+    # Stop wins when stop and target are both inside one bar
+    data = create_bars([100, 100, 100])
+    data["high"][1], data["low"][1] = 120, 80
+    trades, _ = run_backtest(business_dates(3), data, _signals(3, [1, 0, 0]), 10000, 1.0, 0.05, 0.1)
+    assert trades[0]["reason"] == "stop_loss"
+
+
+def test_short_take_profit_and_max_hold():
+    data = create_bars([50, 50, 48, 47, 46, 45])
+    trades, _ = run_backtest(business_dates(6), data, _signals(6, [-1, 0, 0, 0, 0, 0]), 5000, 1.0, 0, 0.05)
+    # The target (47.5) is first reached by bar 3 opening below it
+    assert trades[0]["reason"] == "take_profit" and trades[0]["exit_price"] == 47
+    assert trades[0]["exit_bar"] == 3 and trades[0]["profit"] == 100 * 3
+
+    trades, _ = run_backtest(business_dates(6), data, _signals(6, [-1, 0, 0, 0, 0, 0], max_hold=2), 5000, 1.0, 0, 0)
+    assert trades[0]["exit_bar"] == 2 and trades[0]["reason"] == "max_hold"
+
+    # A zero holding limit still applies rather than holding to the end of the data
+    trades, _ = run_backtest(business_dates(6), data, _signals(6, [0, -1, 0, 0, 0, 0], max_hold=0), 5000, 1.0, 0, 0)
+    assert trades[0]["exit_bar"] == 1 and trades[0]["reason"] == "max_hold"
+
+
+def test_gap_and_go_trades_open_to_close():
+    data = create_bars([100, 100, 100])
+    data["open"][1], data["close"][1] = 103, 105
+    data["high"][1], data["low"][1] = 106, 102
+    result = run_strategy_backtest(business_dates(3), data, "gapAndGo", {"gapSize": 2}, 10000, 1.0, 0, 0)
+    buy, sell = result["trades"]
+    assert (buy["type"], buy["price"], sell["type"], sell["price"]) == ("BUY", 103, "SELL", 105)
+    assert buy["date"] == sell["date"]
+
+
+def test_metrics():
+    equity = np.array([100.0, 110.0, 99.0, 121.0])
+    trades = [{"profit": 30.0}, {"profit": -10.0}, {"profit": 0.0}]
+    metrics = performance_metrics(equity, trades, 100.0)
+    assert np.isclose(metrics["maxDrawdown"], 10.0)
+    assert np.isclose(metrics["totalReturn"], 21.0)
+    assert metrics["profitFactor"] == 3.0
+    assert np.isclose(metrics["winRate"], 100 / 3)
+
+    returns = np.array([0.0, 0.1, -0.1, 121 / 99 - 1])
+    assert np.isclose(metrics["sharpeRatio"], returns.mean() / returns.std(ddof=1) * np.sqrt(252))
+
+    assert performance_metrics(equity, [{"profit": 5.0}], 100.0)["profitFactor"] is None
+    flat = performance_metrics(np.full(5, 100.0), [], 100.0)
+    assert flat["sharpeRatio"] == 0.0 and flat["profitFactor"] == 0.0 and flat["totalTrades"] == 0
+
+
+def test_all_strategies_run():
+    data = create_random_bars(2000)
+    dates = business_dates(2000)
+    params = {
+        "movingAverageCrossover": {"fastPeriod": 10, "slowPeriod": 30},
+        "bollingerBreakout": {"period": 20, "stdDev": 1.5},
+        "rsiOversold": {"period": 14, "oversoldLevel": 35, "overboughtLevel": 65},
+        "volumeBreakout": {"volumeMultiplier": 1.5, "lookbackPeriod": 10},
+        "gapAndGo": {"gapSize": 0.5, "gapDirection": "both"},
+        "streakReversal": {"direction": "down", "streakDays": 3, "holdDays": 5},
+        "thresholdReversal": {"threshold": 2, "direction": "up", "holdDays": 3}
+    }
+    for strategy_type in STRATEGIES:
+        started = time.perf_counter()
+        result = run_strategy_backtest(dates, data, strategy_type, params[strategy_type], 10000, 0.5, 0.03, 0.06)
+        assert time.perf_counter() - started < 1.0
+        assert result["totalTrades"] > 0, strategy_type
+        assert len(result["equityCurve"]) == 2000
+        assert len(result["trades"]) == 2 * result["totalTrades"]
+        # Final equity equals the starting capital plus all realized profits
+        realized = sum(t["profit"] for t in result["trades"])
+        assert np.isclose(result["finalCapital"], 10000 + realized)
+        # Positions never overlap
+        bars = [t["date"] for t in result["trades"]]
+        assert bars == sorted(bars)
+
+
+def test_unknown_strategy():
+    data = create_random_bars(50)
+    with pytest.raises(ValueError):
+        run_strategy_backtest(business_dates(50), data, "bogus")
+
+
+@pytest.mark.parametrize("strategy_type, params", [
+    ("movingAverageCrossover", {"fastPeriod": 0}),
+    ("bollingerBreakout", {"period": 1}),
+    ("rsiOversold", {"period": 0}),
+    ("volumeBreakout", {"lookbackPeriod": 0}),
+    ("streakReversal", {"streakDays": 0}),
+    ("thresholdReversal", {"holdDays": 0})
+])
+def test_invalid_strategy_params(strategy_type, params):
+    data = create_random_bars(50)
+    with pytest.raises(ValueError):
+        run_strategy_backtest(business_dates(50), data, strategy_type, params)
+
+
+def create_panels(tickers=3, n_days=300, seed=0):
+    """Aligned (dates x tickers) OHLCV panels from independent random walks"""
+    bars = [create_random_bars(n_days, seed + j) for j in range(tickers)]
+    return {field: np.column_stack([b[field] for b in bars]) for field in bars[0]}
+
+
+def test_rebalance_starts():
+    dates = np.arange("2024-01-29", "2024-03-05", dtype="datetime64[D]")
+    weekly = rebalance_starts(dates, "weekly")
+    assert all(dates[i].astype(object).weekday() == 0 for i in weekly[1:])
+    assert [str(dates[i]) for i in rebalance_starts(dates, "monthly")] == ["2024-01-29", "2024-02-01", "2024-03-01"]
+    assert rebalance_starts(dates, "quarterly").tolist() == [0]
+    assert rebalance_starts(dates, "none").tolist() == [0]
+    with pytest.raises(ValueError):
+        rebalance_starts(dates, "daily")
+
+
+def test_rebalanced_sleeves_match_loop():
+    rng = np.random.default_rng(3)
+    growth = np.cumprod(1 + rng.normal(0, 0.01, size=(60, 3)), axis=0)
+    weights = np.array([0.5, 0.3, 0.2])
+    starts = np.array([0, 20, 40])
+    sleeves, _ = rebalanced_sleeves(growth, weights, starts, 1000.0)
+
+    # Units of each sleeve held; reset to the target weights at each period start's close
+    values = np.empty_like(growth)
+    held = 1000.0 * weights / growth[0]
+    for t in range(len(growth)):
+        if t in starts[1:]:
+            held = (held * growth[t]).sum() * weights / growth[t]
+        values[t] = held * growth[t]
+    assert np.allclose(sleeves, values)
+
+
+def test_portfolio_of_one_matches_single_backtest():
+    data = create_random_bars(300)
+    dates = business_dates(300)
+    panels = {field: values[:, None] for field, values in data.items()}
+    params = {"fastPeriod": 10, "slowPeriod": 30}
+    result = run_portfolio_backtest(dates, panels, ["AAA"], "movingAverageCrossover", params,
+                                    10000, 1.0, 0.03, 0.06, rebalance="monthly")
+
+    signals = STRATEGIES["movingAverageCrossover"](data, params)
+    trades, equity = run_backtest(dates, data, signals, 10000, 1.0, 0.03, 0.06, fractional=True)
+    assert np.allclose([p["value"] for p in result["equityCurve"]], equity)
+    assert result["totalTrades"] == len(trades)
+    assert np.allclose([t["profit"] for t in result["trades"][1::2]], [t["profit"] for t in trades])
+
+
+def test_portfolio_accounting():
+    panels = create_panels(3, 500)
+    # The third ticker has no bars for its first 100 dates and a gap later on
+    for panel in panels.values():
+        panel[:100, 2] = np.nan
+        panel[300:310, 2] = np.nan
+    dates = business_dates(500)
+    result = run_portfolio_backtest(
+        dates, panels, ["AAA", "BBB", "CCC"], "thresholdReversal", {"threshold": 1.5, "holdDays": 4},
+        10000, 0.8, 0.03, 0.06, weights={"AAA": 2, "BBB": 1, "CCC": 1}, rebalance="weekly"
+    )
+
+    assert result["weights"] == {"AAA": 0.5, "BBB": 0.25, "CCC": 0.25}
+    assert len(result["equityCurve"]) == 500 and result["totalTrades"] > 0
+    assert {row["ticker"] for row in result["trades"]} == {"AAA", "BBB", "CCC"}
+    assert min(row["date"] for row in result["trades"] if row["ticker"] == "CCC") >= str(dates[100])[:10]
+    # Rebalancing moves money between sleeves; all gains and losses come from trades
+    realized = sum(row["profit"] for row in result["trades"])
+    assert np.isclose(result["finalCapital"], 10000 + realized)
+    assert np.isclose(sum(s["finalValue"] for s in result["symbols"]), result["finalCapital"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    test_rsi_matches_wilder_recursion()
+    test_signal_exit_and_equity()
+    test_stop_loss_and_gaps()
+    test_short_take_profit_and_max_hold()
+    test_gap_and_go_trades_open_to_close()
+    test_metrics()
+    test_all_strategies_run()
+    test_unknown_strategy()
+    test_rebalance_starts()
+    test_rebalanced_sleeves_match_loop()
+    test_portfolio_of_one_matches_single_backtest()
+    test_portfolio_accounting()
+    print("All backtest tests passed!")
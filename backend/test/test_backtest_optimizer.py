@@ -0,0 +1,149 @@
+import os
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+# Set testing environment variable
+os.environ['TESTING'] = 'True'
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.stock_analysis_tools.backtest import run_strategy_backtest
+from app.stock_analysis_tools.backtest_optimizer import (
+    SharedPricePanel,
+    expand_grid,
+    grid_size,
+    walk_forward_splits,
+    sweep_chunks,
+    evaluate_chunk,
+    rank_results,
+    walk_forward_summary,
+    objective_score
+)
+
+
+def create_columns(tickers=("AAA", "BBB"), n_days=400, seed=0):
+    """load_price_columns-style random-walk data, one length per ticker"""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for i, ticker in enumerate(tickers):
+        n = n_days - 50 * i
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+        open_ = close * np.exp(rng.normal(0, 0.005, n))
+        columns[ticker] = {
+            "date": pd.bdate_range("2020-01-01", periods=n).values,
+            "open": open_,
+            "high": np.maximum(open_, close) * 1.005,
+            "low": np.minimum(open_, close) * 0.995,
+            "close": close,
+            "volume": rng.uniform(1e5, 1e6, n)
+        }
+    return columns
+
+
+def test_shared_panel_round_trip():
+    columns = create_columns()
+    panel = SharedPricePanel.create(columns)
+    try:
+        attached = SharedPricePanel.attach(panel.spec())
+        bbb = attached.columns("BBB")
+        assert np.array_equal(bbb["close"], columns["BBB"]["close"])
+        assert np.array_equal(bbb["volume"], columns["BBB"]["volume"])
+        del bbb
+        attached.close()
+    finally:
+        panel.close()
+
+
+def test_grid_and_splits():
+    grid = expand_grid({"fastPeriod": [5, 10], "slowPeriod": [50, 100, 200], "note": "x"})
+    assert len(grid) == 6
+    assert grid[0] == {"fastPeriod": 5, "slowPeriod": 50, "note": "x"}
+    assert expand_grid({}) == [{}]
+    assert grid_size({"fastPeriod": [5, 10], "slowPeriod": [50, 100, 200], "note": "x"}) == 6
+    assert grid_size({"a": list(range(150)), "b": list(range(150)), "c": list(range(150))}) == 3375000
+    assert grid_size(None) == 1
+
+    assert walk_forward_splits(10, 4, 2) == [(0, 4, 6), (2, 6, 8), (4, 8, 10)]
+    assert walk_forward_splits(10, 4, 2, anchored=True)[-1] == (0, 8, 10)
+    assert walk_forward_splits(10, 4, 3, step=1) == [(0, 4, 7), (1, 5, 8), (2, 6, 9), (3, 7, 10)]
+    with pytest.raises(ValueError):
+        walk_forward_splits(10, 1, 2)
+
+    chunks = sweep_chunks(list(range(10)), n_workers=2, chunks_per_worker=2)
+    assert sum(chunks, []) == list(range(10)) and len(chunks) == 4
+
+
+def test_sweep_matches_single_backtests():
+    columns = create_columns()
+    grid = expand_grid({"fastPeriod": [5, 10], "slowPeriod": [30, 60]})
+    exit_pairs = [(0.02, 0.05), (0.0, 0.0)]
+    tasks = [(ticker, params) for ticker in columns for params in grid]
+
+    panel = SharedPricePanel.create(columns)
+    try:
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            futures = [
+                pool.submit(evaluate_chunk, panel.spec(), chunk, "movingAverageCrossover", exit_pairs, 10000, 1.0)
+                for chunk in sweep_chunks(tasks, 2)
+            ]
+            results = [result for future in futures for result in future.result()]
+    finally:
+        panel.close()
+
+    assert len(results) == len(tasks) * len(exit_pairs)
+    for result in results:
+        data = {field: values for field, values in columns[result["ticker"]].items() if field != "date"}
+        expected = run_strategy_backtest(
+            columns[result["ticker"]]["date"], data, "movingAverageCrossover", result["params"],
+            10000, 1.0, result["stop_loss"], result["take_profit"]
+        )
+        assert np.isclose(result["metrics"]["totalReturn"], expected["totalReturn"])
+        assert result["metrics"]["totalTrades"] == expected["totalTrades"]
+
+    best = rank_results(results, "totalReturn", top_n=3)
+    assert set(best) == {"AAA", "BBB"} and len(best["AAA"]) == 3
+    returns = [r["metrics"]["totalReturn"] for r in best["AAA"]]
+    assert returns == sorted(returns, reverse=True)
+
+
+def test_walk_forward_summary():
+    columns = create_columns(tickers=("AAA",), n_days=300)
+    grid = expand_grid({"threshold": [1, 2, 3], "holdDays": [2, 5]})
+    panel = SharedPricePanel.create(columns)
+    try:
+        results = evaluate_chunk(
+            panel.spec(), [("AAA", params) for params in grid], "thresholdReversal", [(0.05, 0.1)],
+            walk_forward={"train_bars": 100, "test_bars": 50}
+        )
+    finally:
+        panel.close()
+
+    assert all(len(r["splits"]) == 4 for r in results)
+    summary = walk_forward_summary(results, "sharpeRatio")["AAA"]
+    assert len(summary["windows"]) == 4
+    for k, window in enumerate(summary["windows"]):
+        # The chosen combination has the best training score of the window
+        best_train = max(objective_score(r["splits"][k]["train"]) for r in results)
+        assert objective_score(window["train"]) == best_train
+    expected = 100 * (np.prod([1 + w["test"]["totalReturn"] / 100 for w in summary["windows"]]) - 1)
+    assert np.isclose(summary["outOfSampleReturn"], expected)
+
+
+def test_objective_score():
+    assert objective_score({"maxDrawdown": 12.0}, "maxDrawdown") == -12.0
+    assert objective_score({"profitFactor": None}, "profitFactor") == np.inf
+    assert objective_score({"sharpeRatio": 1.5}) == 1.5
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    test_shared_panel_round_trip()
+    test_grid_and_splits()
+    test_sweep_matches_single_backtests()
+    test_walk_forward_summary()
+    test_objective_score()
+    print("All backtest optimizer tests passed!")
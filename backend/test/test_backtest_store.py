@@ -0,0 +1,180 @@
+import os
+import sys
+import zlib
+import json
+from unittest.mock import MagicMock, patch
+
+# Set testing environment variable
+os.environ['TESTING'] = 'True'
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.stock_analysis_tools.backtest_store import BacktestResultStore, MAX_PAYLOAD_BYTES
+
+
+INPUTS = {
+    "strategy_type": "movingAverageCrossover",
+    "strategy_params": {"fastPeriod": 10, "slowPeriod": 30},
+    "tickers": ["AAPL"],
+    "portfolio": False,
+    "start_date": "2023-01-01",
+    "end_date": "2023-12-31",
+    "initial_capital": 10000.0,
+    "position_size": 1.0,
+    "stop_loss": 0.02,
+    "take_profit": 0.05,
+    "weights": None,
+    "rebalance": None
+}
+
+RESULT = {
+    "success": True,
+    "ticker": "AAPL",
+    "totalReturn": 12.5,
+    "finalCapital": 11250.0,
+    "winRate": 60.0,
+    "profitFactor": None,
+    "maxDrawdown": 4.2,
+    "sharpeRatio": 1.1,
+    "totalTrades": 5,
+    "equityCurve": [{"date": "2023-01-03", "value": 10000.0}, {"date": "2023-01-04", "value": 10100.0}],
+    "trades": []
+}
+
+
+def create_store():
+    """A store whose MongoDB client is a MagicMock; returns (store, collection, sync_state)"""
+    client = MagicMock()
+    collection = MagicMock()
+    sync_state = MagicMock()
+    client.__getitem__.return_value.__getitem__.side_effect = (
+        lambda name: sync_state if name == "sync_state" else collection
+    )
+    patcher = patch('app.stock_analysis_tools.backtest_store.get_mongo_client', return_value=client)
+    patcher.start()
+    return BacktestResultStore(), collection, sync_state, patcher
+
+
+def test_make_key():
+    key = BacktestResultStore.make_key(INPUTS, {"AAPL": 3})
+    # Independent of dict ordering
+    reordered = dict(reversed(list(INPUTS.items())))
+    assert BacktestResultStore.make_key(reordered, {"AAPL": 3}) == key
+    # New data or different settings give a new key
+    assert BacktestResultStore.make_key(INPUTS, {"AAPL": 4}) != key
+    assert BacktestResultStore.make_key(dict(INPUTS, stop_loss=0.03), {"AAPL": 3}) != key
+
+
+def test_data_watermarks():
+    store, _, sync_state, patcher = create_store()
+    try:
+        sync_state.find.return_value = [{"_id": "AAPL", "data_version": 7}]
+        assert store.data_watermarks(["msft", "AAPL"]) == {"AAPL": 7, "MSFT": 0}
+        assert sync_state.find.call_args[0][0] == {"_id": {"$in": ["AAPL", "MSFT"]}}
+    finally:
+        patcher.stop()
+
+
+def test_put_and_get_round_trip():
+    store, collection, _, patcher = create_store()
+    try:
+        assert store.put("run1", INPUTS, {"AAPL": 0}, RESULT, "alice") is True
+        (query, update), kwargs = collection.update_one.call_args
+        assert query == {"_id": "run1"} and kwargs["upsert"] is True
+        # Storing the key again adds the user instead of replacing the others
+        document = update["$setOnInsert"]
+        assert "users" not in document and update["$addToSet"] == {"users": "alice"}
+        assert document["tickers"] == ["AAPL"]
+        assert document["metrics"]["totalReturn"] == 12.5 and document["metrics"]["profitFactor"] is None
+        assert json.loads(zlib.decompress(document["payload"])) == RESULT
+
+        # Reads are scoped to the user's runs and do not change them
+        collection.update_one.reset_mock()
+        collection.find_one.return_value = document
+        assert store.get("run1", "bob") == RESULT
+        assert collection.find_one.call_args[0][0] == {"_id": "run1", "users": "bob"}
+        collection.update_one.assert_not_called()
+
+        # A backtest request that reproduces the run records the user
+        collection.find_one_and_update.return_value = document
+        assert store.claim("run1", "bob") == RESULT
+        assert collection.find_one_and_update.call_args[0][1]["$addToSet"] == {"users": "bob"}
+
+        collection.find_one.return_value = None
+        assert store.get("missing") is None
+    finally:
+        patcher.stop()
+
+
+def test_put_skips_oversized_results():
+    store, collection, _, patcher = create_store()
+    try:
+        with patch('app.stock_analysis_tools.backtest_store.zlib.compress', return_value=b"x" * (MAX_PAYLOAD_BYTES + 1)):
+            assert store.put("run1", INPUTS, {"AAPL": 0}, RESULT) is False
+        collection.update_one.assert_not_called()
+    finally:
+        patcher.stop()
+
+
+def test_invalidate_ticker():
+    store, collection, sync_state, patcher = create_store()
+    try:
+        collection.update_many.return_value.modified_count = 2
+        assert store.invalidate_ticker("aapl") == 2
+        sync_state.update_one.assert_called_once_with({"_id": "AAPL"}, {"$inc": {"data_version": 1}}, upsert=True)
+        query, update = collection.update_many.call_args[0]
+        assert query == {"tickers": "AAPL", "stale": {"$ne": True}}
+        assert update["$set"]["stale"] is True
+        # Runs are kept as history
+        collection.delete_many.assert_not_called()
+    finally:
+        patcher.stop()
+
+
+def test_list_runs_and_indexes():
+    store, collection, _, patcher = create_store()
+    try:
+        collection.find.return_value.sort.return_value.limit.return_value = [
+            {"_id": "a", "strategy": "gapAndGo", "stale": True}
+        ]
+        runs = store.list_runs("alice", "aapl")
+        assert runs[0]["stale"] is True
+        assert collection.find.call_args[0][0] == {"users": "alice", "tickers": "AAPL"}
+
+        store.list_runs("alice", include_stale=False)
+        assert collection.find.call_args[0][0] == {"stale": {"$ne": True}, "users": "alice"}
+
+        # Indexes are created once, on first use
+        indexed = [call[0][0] for call in collection.create_index.call_args_list]
+        assert indexed == ["tickers", "users", [("created_at", -1)]]
+    finally:
+        patcher.stop()
+
+
+def test_compare_keeps_requested_order():
+    store, collection, _, patcher = create_store()
+    try:
+        payload = zlib.compress(json.dumps(RESULT).encode())
+        collection.find.return_value = [
+            {"_id": "b", "strategy": "rsiOversold", "metrics": {"totalReturn": 1.0}, "payload": payload},
+            {"_id": "a", "strategy": "gapAndGo", "metrics": {"totalReturn": 2.0}, "payload": payload}
+        ]
+        runs = store.compare(["a", "missing", "b"], include_curves=True, username="alice")
+        assert [run["run_id"] for run in runs] == ["a", "b"]
+        assert collection.find.call_args[0][0] == {"_id": {"$in": ["a", "missing", "b"]}, "users": "alice"}
+        assert runs[0]["equityCurve"] == RESULT["equityCurve"]
+    finally:
+        patcher.stop()
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    test_make_key()
+    test_data_watermarks()
+    test_put_and_get_round_trip()
+    test_put_skips_oversized_results()
+    test_invalidate_ticker()
+    test_list_runs_and_indexes()
+    test_compare_keeps_requested_order()
+    print("All backtest store tests passed!")
@@ -0,0 +1,167 @@
+import os
+import sys
+import pytest
+import pandas as pd
+import numpy as np
+from unittest.mock import patch, MagicMock
+
+# Set testing environment variable
+os.environ['TESTING'] = 'True'
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yfinance.exceptions import YFRateLimitError
+from app.services import bulk_sync
+from app.services.yfinance_sync import YFinanceSync
+
+
+def make_download(symbols, periods=5, missing=()):
+    """Create a frame shaped like yf.download(..., group_by='ticker')"""
+    dates = pd.date_range(start='2024-01-02', periods=periods, freq='B', name='Date')
+    frames = {}
+    for i, symbol in enumerate(symbols):
+        values = np.nan if symbol in missing else 100.0 + i
+        frames[symbol] = pd.DataFrame({
+            'Open': values, 'High': values, 'Low': values, 'Close': values,
+            'Adj Close': values, 'Volume': 1000.0
+        }, index=dates)
+    return pd.concat(frames, axis=1)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff_sleep():
+    """Tickers without data are retried with backoff; don't actually wait"""
+    with patch.object(bulk_sync.time, 'sleep') as sleep:
+        yield sleep
+
+
+@pytest.fixture
+def prices_collection():
+    collection = MagicMock()
+    with patch.object(bulk_sync, 'db') as mock_db, \
+         patch.object(YFinanceSync, 'save_sync_state') as save_state:
+        mock_db.client.__getitem__.return_value.__getitem__.return_value = collection
+        collection.save_state = save_state
+        yield collection
+
+
+def test_download_chunk_splits_tickers():
+    data = make_download(['AAPL', 'AACT-U', 'DEAD'], missing=('DEAD',))
+    with patch.object(bulk_sync.yf, 'download', return_value=data) as download:
+        frames = bulk_sync.download_chunk(['aapl', 'AACT_U', 'DEAD'], '2024-01-02', '2024-01-08')
+
+    assert download.call_args_list[0].args[0] == ['AAPL', 'AACT-U', 'DEAD']
+    assert download.call_args.kwargs['end'] == '2024-01-09'
+    # Only the ticker without data is retried
+    assert all(call.args[0] == ['DEAD'] for call in download.call_args_list[1:])
+    assert download.call_count == bulk_sync.BULK_SYNC_MAX_RETRIES + 1
+    assert set(frames) == {'AAPL', 'AACT_U'}
+    assert {'date', 'open', 'high', 'low', 'close', 'volume', 'ticker'} <= set(frames['AACT_U'].columns)
+    assert (frames['AACT_U']['ticker'] == 'AACT_U').all()
+
+
+def test_download_chunk_backs_off_on_rate_limit():
+    data = make_download(['AAPL'])
+    responses = [Exception("Too Many Requests. Rate limited."), data]
+
+    def fake_download(*args, **kwargs):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    with patch.object(bulk_sync.yf, 'download', side_effect=fake_download), \
+         patch.object(bulk_sync.time, 'sleep') as sleep:
+        frames = bulk_sync.download_chunk(['AAPL'], '2024-01-02', '2024-01-08')
+
+    assert sleep.call_count == 1
+    assert len(frames['AAPL']) == 5
+
+    with patch.object(bulk_sync.yf, 'download', side_effect=Exception("Rate limit")), \
+         patch.object(bulk_sync.time, 'sleep'):
+        with pytest.raises(RuntimeError):
+            bulk_sync.download_chunk(['AAPL'], '2024-01-02', '2024-01-08', max_retries=2)
+
+
+def test_download_chunk_retries_symbols_yfinance_drops():
+    """yf.download logs a rate limited symbol and returns NaN columns for it instead of raising"""
+    attempts = {}
+
+    class FakeTicker:
+        def __init__(self, symbol):
+            self.symbol = symbol
+            self._price_history = None
+
+        def history(self, **kwargs):
+            attempts[self.symbol] = attempts.get(self.symbol, 0) + 1
+            if self.symbol == 'MSFT' and attempts[self.symbol] == 1:
+                raise YFRateLimitError()
+            dates = pd.date_range(start='2024-01-02', periods=5, freq='B', name='Date')
+            return pd.DataFrame({
+                'Open': 100.0, 'High': 101.0, 'Low': 99.0, 'Close': 100.5,
+                'Adj Close': 100.5, 'Volume': 1000
+            }, index=dates)
+
+    # Runs the installed yf.download with only the per-symbol HTTP fetch replaced
+    with patch('yfinance.multi.Ticker', FakeTicker):
+        frames = bulk_sync.download_chunk(['AAPL', 'MSFT'], '2024-01-02', '2024-01-08')
+
+    assert attempts == {'AAPL': 1, 'MSFT': 2}
+    assert set(frames) == {'AAPL', 'MSFT'}
+    assert len(frames['MSFT']) == 5
+
+
+def test_run_bulk_sync_reports_outcomes(prices_collection):
+    tickers = ['AAPL', 'MSFT', 'DEAD', 'TSLA', 'NVDA']
+
+    def fake_download(symbols, **kwargs):
+        return make_download(symbols, missing=('DEAD',))
+
+    job = bulk_sync.create_job(tickers, '2024-01-02', '2024-01-08', chunk_size=2)
+    with patch.object(bulk_sync.yf, 'download', side_effect=fake_download):
+        bulk_sync.run_bulk_sync(job, max_workers=2)
+
+    summary = job.to_dict(include_results=True)
+    assert summary['status'] == 'completed'
+    assert summary['chunks_total'] == 3
+    assert summary['chunks_done'] == 3
+    assert summary['counts'] == {'updated': 4, 'no_data': 1}
+    assert summary['results']['AAPL'] == {'status': 'updated', 'rows': 5}
+
+    # Every chunk is written unordered in one call
+    assert prices_collection.bulk_write.call_count == 3
+    assert all(call.kwargs['ordered'] is False for call in prices_collection.bulk_write.call_args_list)
+    assert prices_collection.save_state.call_count == 4
+
+
+def test_failed_chunk_marks_its_tickers(prices_collection):
+    def fake_download(symbols, **kwargs):
+        if 'MSFT' in symbols:
+            raise ValueError("boom")
+        return make_download(symbols)
+
+    job = bulk_sync.create_job(['AAPL', 'MSFT'], '2024-01-02', '2024-01-08', chunk_size=1)
+    with patch.object(bulk_sync.yf, 'download', side_effect=fake_download):
+        bulk_sync.run_bulk_sync(job, max_workers=1)
+
+    results = job.to_dict(include_results=True)['results']
+    assert results['AAPL']['status'] == 'updated'
+    assert results['MSFT'] == {'status': 'error', 'error': 'boom'}
+
+
+def test_create_job_defaults():
+    with patch.object(bulk_sync, 'load_universe', return_value=['A', 'B', 'a']):
+        job = bulk_sync.create_job(end_date='2024-06-30')
+
+    assert job.tickers == ['A', 'B']
+    assert job.end_date == '2024-06-30'
+    assert job.start_date == (pd.Timestamp('2024-06-30') - pd.Timedelta(days=bulk_sync.BULK_SYNC_DEFAULT_DAYS)).strftime('%Y-%m-%d')
+    assert job.explicit_start is False
+
+    with pytest.raises(ValueError):
+        bulk_sync.create_job(['AAPL'], '2024-07-01', '2024-06-30')
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
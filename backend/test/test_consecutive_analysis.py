@@ -350,6 +350,69 @@ def test_edge_cases():
     
     logger.info("=== Edge case tests passed ===")
 
+def test_compute_streaks():
+    """Streak lengths should reset on every non-target day"""
+    flags = [True, True, False, True, True, True, False, False, True]
+    streaks = consecutive_analysis.compute_streaks(flags)
+    assert streaks.tolist() == [1, 2, 0, 1, 2, 3, 0, 0, 1]
+    assert consecutive_analysis.compute_streaks([]).tolist() == []
+
+def test_follow_on_days_truncated_at_end():
+    """Streaks near the end of the data should only get the days that exist"""
+    df = pd.DataFrame({
+        'date': [f"2023-01-0{i}" for i in range(1, 7)],
+        'is_target_day': [False, True, True, True, False, True],
+        'daily_return': [0.0, -0.01, -0.02, -0.03, 0.01, -0.04]
+    })
+    
+    moves = consecutive_analysis.analyze_consecutive_patterns(df, min_days=2, max_days=3)
+    
+    assert [seq["end_date"] for seq in moves[2]] == ["2023-01-03"]
+    assert [day["date"] for day in moves[2][0]["next_5_days"]] == ["2023-01-04", "2023-01-05", "2023-01-06"]
+    assert moves[3][0]["next_day_return"] == 0.01
+    assert moves[3][0]["next_day_same_direction"] is False
+    assert len(moves[3][0]["next_5_days"]) == 2
+
+def test_scan_matches_single_ticker_analysis():
+    """The batched scanner should agree with the per-ticker analysis"""
+    rng = np.random.default_rng(21)
+    dates = pd.date_range(start='2020-01-01', periods=300)
+    columns = {}
+    for ticker in ["AAA", "BBB", "CCC"]:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 300)))
+        columns[ticker] = {"date": dates.values.astype("datetime64[ms]"), "close": close}
+    # Force every ticker to end on a 3-day down streak
+    for ticker_columns in columns.values():
+        ticker_columns["close"][-4:] = [200.0, 199.0, 198.0, 197.0]
+    
+    with patch.object(consecutive_analysis, 'load_price_columns', return_value=columns):
+        scan = consecutive_analysis.scan_consecutive_moves(
+            ["aaa", "bbb", "ccc"], direction="down", min_days=2, max_days=10, min_occurrences=1
+        )
+    
+    assert scan["tickers_scanned"] == 3
+    assert {entry["ticker"] for entry in scan["results"]} == {"AAA", "BBB", "CCC"}
+    probabilities = [entry["next_day_probability"] for entry in scan["results"]]
+    assert probabilities == sorted(probabilities, reverse=True)
+    
+    for entry in scan["results"]:
+        ticker_columns = columns[entry["ticker"]]
+        df = pd.DataFrame({'close': ticker_columns["close"]}, index=dates)
+        df['is_target_day'] = df['close'] < df['close'].shift(1)
+        df['daily_return'] = df['close'].pct_change()
+        df = df.dropna()
+        df['date'] = df.index.strftime("%Y-%m-%d")
+        
+        moves = consecutive_analysis.analyze_consecutive_patterns(df, min_days=3, max_days=3)
+        expected = consecutive_analysis.calculate_continuation_probabilities(moves)[3]
+        
+        assert entry["current_streak"] == 3
+        assert entry["count"] == expected["count"]
+        assert entry["next_day_probability"] == pytest.approx(expected["next_day_probability"])
+        assert entry["avg_next_day_return"] == pytest.approx(expected["avg_next_day_return"])
+        for got, want in zip(entry["next_days_probabilities"], expected["next_days_probabilities"]):
+            assert got["probability"] == pytest.approx(want["probability"])
+
 # Allow running the test module directly
 if __name__ == "__main__":
     logger.info("Running consecutive analysis tests")
@@ -358,6 +421,9 @@ if __name__ == "__main__":
         # Run the simpler tests first (those not requiring API access)
         test_consecutive_analysis_directly()
         test_edge_cases()
+        test_compute_streaks()
+        test_follow_on_days_truncated_at_end()
+        test_scan_matches_single_ticker_analysis()
         
         # Now run the API test
         test_consecutive_endpoint()
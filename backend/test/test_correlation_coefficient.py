@@ -0,0 +1,163 @@
+import os
+import sys
+import time
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+
+# Set testing environment variable
+os.environ['TESTING'] = 'True'
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.stock_analysis_tools.correlation_coefficient import (
+    panel_log_returns,
+    correlation_from_returns,
+    ledoit_wolf_intensity,
+    compute_correlation_matrix,
+    rolling_covariances,
+    ewma_covariances,
+    covariance_to_correlation,
+    correlation_series
+)
+
+
+def create_price_panel(n_days=252, n_tickers=5, seed=0):
+    """Correlated random-walk closes, (days x tickers)"""
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.01, size=(n_days, 1))
+    returns = market + rng.normal(0, 0.01, size=(n_days, n_tickers))
+    return 100 * np.exp(np.cumsum(returns, axis=0))
+
+
+def test_correlation_matches_pandas():
+    panel = create_price_panel()
+    returns, keep, _ = panel_log_returns(panel)
+    assert keep.all()
+    assert returns.shape == (251, 5)
+
+    expected = pd.DataFrame(np.diff(np.log(panel), axis=0)).corr().values
+    assert np.allclose(correlation_from_returns(returns), expected)
+
+
+def test_panel_log_returns_drops_sparse_tickers_and_gaps():
+    panel = create_price_panel(n_days=100, n_tickers=3)
+    panel[:60, 2] = np.nan  # short history
+    panel[10, 0] = np.nan   # one missing bar
+
+    returns, keep, rows = panel_log_returns(panel, min_coverage=0.9)
+    assert keep.tolist() == [True, True, False]
+    # The gap removes the two returns that touch the missing bar
+    assert returns.shape == (97, 2)
+    assert rows.sum() == 97 and not rows[9] and not rows[10]
+    assert not np.isnan(returns).any()
+
+
+def test_shrinkage():
+    returns, _, _ = panel_log_returns(create_price_panel(n_days=60, n_tickers=20))
+    raw = correlation_from_returns(returns)
+    half = correlation_from_returns(returns, shrinkage=0.5)
+    off_diagonal = ~np.eye(20, dtype=bool)
+    assert np.allclose(half[off_diagonal], raw[off_diagonal] * 0.5)
+    assert np.allclose(np.diag(half), 1.0)
+
+    standardized = (returns - returns.mean(axis=0)) / returns.std(axis=0)
+    intensity = ledoit_wolf_intensity(standardized)
+    assert 0 < intensity < 1
+    auto = correlation_from_returns(returns, shrinkage="auto")
+    assert np.allclose(auto[off_diagonal], raw[off_diagonal] * (1 - intensity))
+
+    with pytest.raises(ValueError):
+        correlation_from_returns(returns, shrinkage=1.5)
+
+
+def test_constant_series_gives_nan():
+    returns, _, _ = panel_log_returns(create_price_panel(n_days=50, n_tickers=3))
+    returns[:, 1] = 0.0
+    corr = correlation_from_returns(returns)
+    assert np.isnan(corr[1]).all() and np.isnan(corr[:, 1]).all()
+    assert corr[0, 0] == 1.0 and not np.isnan(corr[0, 2])
+
+
+@patch('app.stock_analysis_tools.correlation_coefficient.load_price_panel')
+def test_compute_correlation_matrix(mock_load_panel):
+    panel = create_price_panel(n_days=252, n_tickers=500)
+    tickers = [f"T{i}" for i in range(500)]
+    dates = np.datetime64("2023-01-01") + np.arange(252)
+    mock_load_panel.return_value = (dates, tickers, panel)
+
+    started = time.perf_counter()
+    matrix, result_tickers = compute_correlation_matrix(tickers, 252)
+    elapsed = time.perf_counter() - started
+
+    mock_load_panel.assert_called_once_with(tickers, lookback_days=252)
+    assert result_tickers == tickers
+    assert matrix.shape == (500, 500)
+    assert np.allclose(matrix, matrix.T)
+    assert elapsed < 1.0
+
+    # No data at all
+    mock_load_panel.return_value = (dates[:0], [], np.empty((0, 0)))
+    matrix, result_tickers = compute_correlation_matrix(["A", "B"], 30)
+    assert matrix.shape == (2, 2) and np.isnan(matrix).all()
+
+
+def test_rolling_covariances_match_pandas():
+    returns, _, _ = panel_log_returns(create_price_panel(n_days=600, n_tickers=4))
+    frame = pd.DataFrame(returns)
+    expected_cov = frame.rolling(20).cov().values.reshape(-1, 4, 4)
+    expected_corr = frame.rolling(20).corr().values.reshape(-1, 4, 4)
+
+    updates = list(rolling_covariances(returns, 20))
+    assert [row for row, _ in updates] == list(range(19, len(returns)))
+    for row, cov in updates:
+        assert np.allclose(cov, expected_cov[row])
+        assert np.allclose(covariance_to_correlation(cov), expected_corr[row])
+
+
+def test_ewma_covariances_match_pandas():
+    returns, _, _ = panel_log_returns(create_price_panel(n_days=200, n_tickers=3))
+    expected = pd.DataFrame(returns).ewm(halflife=10, adjust=False).cov(bias=True).values.reshape(-1, 3, 3)
+
+    updates = list(ewma_covariances(returns, halflife=10, min_periods=5))
+    assert updates[0][0] == 4
+    for row, cov in updates:
+        assert np.allclose(cov, expected[row])
+
+
+def test_correlation_series():
+    returns, _, _ = panel_log_returns(create_price_panel(n_days=101, n_tickers=3))
+    dates = np.arange("2024-01-01", "2024-04-10", dtype="datetime64[D]")[:100]
+    tickers = ["AAA", "BBB", "CCC"]
+
+    items = list(correlation_series(dates, tickers, returns, window=10, step=5))
+    assert len(items) == 19
+    assert items[0]["date"] == "2024-01-10"
+    assert len(items[0]["matrix"]) == 3 and items[0]["matrix"][1][1] == 1.0
+
+    pairs = list(correlation_series(dates, tickers, returns, method="ewma", window=10,
+                                    pairs=[("aaa", "CCC")], covariance=True))
+    assert set(pairs[0]["pairs"]) == {"AAA/CCC"}
+
+    # Bad arguments fail before anything is streamed
+    with pytest.raises(ValueError):
+        correlation_series(dates, tickers, returns, pairs=[("AAA", "ZZZ")])
+    with pytest.raises(ValueError):
+        correlation_series(dates, tickers, returns, method="bogus")
+    with pytest.raises(ValueError):
+        correlation_series(dates, tickers, returns, method="ewma", halflife=0)
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    test_correlation_matches_pandas()
+    test_panel_log_returns_drops_sparse_tickers_and_gaps()
+    test_shrinkage()
+    test_constant_series_gives_nan()
+    test_compute_correlation_matrix()
+    test_rolling_covariances_match_pandas()
+    test_ewma_covariances_match_pandas()
+    test_correlation_series()
+    print("All correlation coefficient tests passed!")
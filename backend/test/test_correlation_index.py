@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import pytest
+import numpy as np
+from unittest.mock import patch
+
+# Set testing environment variable
+os.environ['TESTING'] = 'True'
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.stock_analysis_tools.correlation_coefficient import correlation_from_returns
+from app.stock_analysis_tools.correlation_index import (
+    CorrelationIndex,
+    CorrelationIndexCache,
+    correlation_distance
+)
+
+
+def create_block_correlations(n_groups=3, per_group=4, seed=0):
+    """Correlation matrix of returns driven by one factor per group"""
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.01, size=(500, n_groups))
+    returns = np.repeat(factors, per_group, axis=1) + rng.normal(0, 0.005, size=(500, n_groups * per_group))
+    tickers = [f"G{g}T{i}" for g in range(n_groups) for i in range(per_group)]
+    return tickers, correlation_from_returns(returns)
+
+
+def test_correlation_distance():
+    distance = correlation_distance(np.array([[1.0, -1.0, np.nan], [-1.0, 1.0, 0.5], [np.nan, 0.5, 1.0]]))
+    assert distance[0, 1] == 1.0
+    assert np.isclose(distance[0, 2], np.sqrt(0.5))
+    assert np.isclose(distance[1, 2], 0.5)
+    assert np.all(np.diag(distance) == 0)
+
+
+def test_neighbors_match_sorting():
+    tickers, matrix = create_block_correlations()
+    index = CorrelationIndex(tickers, matrix)
+
+    most = index.neighbors("g1t0", k=3)
+    assert [n["ticker"] for n in most] == sorted(["G1T1", "G1T2", "G1T3"], key=lambda t: -matrix[4, tickers.index(t)])
+    assert most[0]["correlation"] >= most[1]["correlation"] >= most[2]["correlation"]
+
+    least = index.neighbors("G1T0", k=2, least=True)
+    expected = [tickers[j] for j in np.argsort(matrix[4]) if j != 4][:2]
+    assert [n["ticker"] for n in least] == expected
+
+    # k larger than the universe returns every other ticker
+    assert len(index.neighbors("G0T0", k=100)) == len(tickers) - 1
+
+    with pytest.raises(KeyError):
+        index.neighbors("NOPE")
+
+
+def test_cluster_order_groups_blocks():
+    tickers, matrix = create_block_correlations()
+    shuffled = np.random.default_rng(1).permutation(len(tickers))
+    index = CorrelationIndex([tickers[i] for i in shuffled], matrix[np.ix_(shuffled, shuffled)])
+
+    result = index.clusters(n_clusters=3)
+    groups = [t[:2] for t in result["tickers"]]
+    # Each group is contiguous in the leaf order
+    assert sum(a != b for a, b in zip(groups, groups[1:])) == 2
+    assert len(set(result["clusters"])) == 3
+    assert len(result["matrix"]) == len(tickers)
+    assert result["matrix"][0][0] == 1.0
+
+
+def test_cache_ttl_and_lru():
+    tickers, matrix = create_block_correlations()
+    cache = CorrelationIndexCache(max_entries=2, ttl_seconds=60)
+
+    assert cache.make_id(["b", "A"], 30) == cache.make_id(["A", "B"], 30)
+    assert cache.make_id(["A", "B"], 30) != cache.make_id(["A", "B"], 60)
+
+    for name in ("one", "two", "three"):
+        cache.put(name, CorrelationIndex(tickers, matrix))
+    assert cache.get("one") is None
+    assert cache.get("three") is not None
+
+    cache.get("two").built_at -= 120
+    assert cache.get("two") is None
+
+
+@patch('app.stock_analysis_tools.correlation_index.compute_correlation_matrix')
+def test_get_or_build_reuses_index(mock_compute):
+    tickers, matrix = create_block_correlations(n_groups=20, per_group=25)
+    mock_compute.return_value = (matrix, tickers)
+    cache = CorrelationIndexCache()
+
+    index_id, index, cached = cache.get_or_build(tickers, 252)
+    assert not cached
+    index_id_again, index_again, cached = cache.get_or_build(tickers[::-1], 252)
+    assert cached and index_again is index and index_id_again == index_id
+    assert mock_compute.call_count == 1
+
+    # Queries against the 500-ticker index only read the precomputed matrix
+    started = time.perf_counter()
+    for ticker in tickers[:100]:
+        index.neighbors(ticker, k=10)
+    assert (time.perf_counter() - started) / 100 < 0.005
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    test_correlation_distance()
+    test_neighbors_match_sorting()
+    test_cluster_order_groups_blocks()
+    test_cache_ttl_and_lru()
+    test_get_or_build_reuses_index()
+    print("All correlation index tests passed!")
@@ -12,9 +12,14 @@ os.environ['TESTING'] = 'True'
 # Add the parent directory to the path so we can import from app
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from app.stock_analysis_tools import data_utils
 from app.stock_analysis_tools.data_utils import (
     connect_to_mongodb,
+    get_collection,
     get_ticker_data,
+    load_price_columns,
+    load_price_panel,
+    load_price_panels,
     read_and_prepare_data
 )
 
@@ -40,30 +45,15 @@ def create_mock_mongodb_data(ticker="AAPL"):
     
     return documents
 
-class MockCursor:
-    """Mock MongoDB cursor that behaves more like the real thing"""
-    def __init__(self, documents):
-        self.documents = documents
-        self.current_index = 0
-    
-    def __iter__(self):
-        self.current_index = 0
-        return self
-    
-    def __next__(self):
-        if self.current_index < len(self.documents):
-            doc = self.documents[self.current_index]
-            self.current_index += 1
-            return doc
-        raise StopIteration
-    
-    def sort(self, *args, **kwargs):
-        # Just return self for chaining
-        return self
-    
-    def limit(self, *args, **kwargs):
-        # Just return self for chaining
-        return self
+def group_mock_documents(documents, fields=("open", "high", "low", "close", "volume")):
+    """Mimic the $group output of load_price_columns: one document of column arrays per ticker"""
+    grouped = {}
+    for doc in documents:
+        group = grouped.setdefault(doc["ticker"], {"_id": doc["ticker"], "date": []})
+        group["date"].append(int(pd.Timestamp(doc["date"]).value // 1_000_000))
+        for field in fields:
+            group.setdefault(field, []).append(doc.get(field))
+    return list(grouped.values())
 
 @patch('app.stock_analysis_tools.data_utils.MongoClient')
 def test_connect_to_mongodb(mock_client):
@@ -86,11 +76,11 @@ def test_get_ticker_data():
     """Test getting ticker data from MongoDB"""
     # Create test data
     mock_documents = create_mock_mongodb_data("AAPL")
-    mock_cursor = MockCursor(mock_documents)
+    grouped_documents = group_mock_documents(mock_documents)
     
     # Create mock collection
     mock_collection = MagicMock()
-    mock_collection.find.return_value = mock_cursor
+    mock_collection.aggregate.return_value = grouped_documents
     
     # Create mock db
     mock_db = MagicMock()
@@ -101,8 +91,11 @@ def test_get_ticker_data():
     mock_client = MagicMock()
     mock_client.__getitem__.return_value = mock_db
     
-    # Patch the connect_to_mongodb function
-    with patch('app.stock_analysis_tools.data_utils.connect_to_mongodb', return_value=mock_client):
+    # Start with no cached collection checks
+    data_utils._verified_collections.clear()
+    
+    # Patch the shared client accessor
+    with patch('app.stock_analysis_tools.data_utils.get_mongo_client', return_value=mock_client):
         # Test basic functionality
         result = get_ticker_data("AAPL")
         
@@ -112,12 +105,19 @@ def test_get_ticker_data():
         assert "close" in result.columns
         assert len(result) == 50
         
-        # Check that find was called with correct query
-        mock_collection.find.assert_called_with({"ticker": "AAPL"})
+        assert isinstance(result.index, pd.DatetimeIndex)
+        assert result.index.is_monotonic_increasing
+        np.testing.assert_allclose(result["close"].values, [d["close"] for d in mock_documents])
+        
+        # Check that the pipeline matched the ticker and projected only price fields
+        pipeline = mock_collection.aggregate.call_args[0][0]
+        assert pipeline[0]["$match"] == {"ticker": "AAPL"}
+        group_stage = pipeline[-1]["$group"]
+        assert set(group_stage) == {"_id", "date", "open", "high", "low", "close", "volume"}
         
         # Test with date filters
-        mock_collection.find.reset_mock()
-        mock_collection.find.return_value = mock_cursor
+        mock_collection.aggregate.reset_mock()
+        mock_collection.aggregate.return_value = grouped_documents
         
         result = get_ticker_data("AAPL", date_from="2020-01-01", date_to="2020-12-31")
         
@@ -126,23 +126,122 @@ def test_get_ticker_data():
         assert not result.empty
         
         # Check call arguments for date filter query
-        call_args = mock_collection.find.call_args[0][0]
+        call_args = mock_collection.aggregate.call_args[0][0][0]["$match"]
         assert "ticker" in call_args
         assert "date" in call_args
         assert "$gte" in call_args["date"]
         assert "$lte" in call_args["date"]
         
-        # Test collection not found
+        # Test collection not found (the existence check is cached per collection)
+        data_utils._verified_collections.clear()
         mock_db.list_collection_names.return_value = []
         with pytest.raises(ValueError, match="Collection .* not found"):
             get_ticker_data("AAPL")
         
         # Test no data found
         mock_db.list_collection_names.return_value = ["prices"]
-        mock_collection.find.return_value = MockCursor([])
+        mock_collection.aggregate.return_value = []
         with pytest.raises(ValueError, match="No data found"):
             get_ticker_data("AAPL")
 
+def test_load_price_columns():
+    """Columns for several tickers come back as aligned NumPy arrays"""
+    documents = create_mock_mongodb_data("AAPL") + create_mock_mongodb_data("MSFT")
+    documents[3]["close"] = None
+    documents = documents[::-1]  # Arrays are re-sorted by date after decoding
+    
+    mock_collection = MagicMock()
+    mock_collection.aggregate.return_value = group_mock_documents(documents, fields=("close", "volume"))
+    
+    with patch('app.stock_analysis_tools.data_utils.get_collection', return_value=mock_collection):
+        columns = load_price_columns(["aapl", "msft"], date_from="2020-01-01", fields=("close", "volume"))
+    
+    pipeline = mock_collection.aggregate.call_args[0][0]
+    assert pipeline[0]["$match"]["ticker"] == {"$in": ["AAPL", "MSFT"]}
+    assert set(columns) == {"AAPL", "MSFT"}
+    
+    aapl = columns["AAPL"]
+    assert aapl["date"].dtype == np.dtype("datetime64[ms]")
+    assert np.all(np.diff(aapl["date"].astype(np.int64)) > 0)
+    assert aapl["close"].dtype == np.float64
+    assert aapl["volume"].dtype == np.int64
+    assert np.isnan(aapl["close"]).sum() == 1
+    assert len(aapl["close"]) == len(aapl["date"]) == 50
+    
+    # A limit or skip is only meaningful for a single ticker
+    with pytest.raises(ValueError):
+        load_price_columns(["AAPL", "MSFT"], limit=10)
+    with pytest.raises(ValueError):
+        load_price_columns(["AAPL", "MSFT"], skip=10)
+    
+    mock_collection.aggregate.return_value = []
+    with patch('app.stock_analysis_tools.data_utils.get_collection', return_value=mock_collection):
+        load_price_columns("AAPL", limit=10, skip=20)
+    pipeline = mock_collection.aggregate.call_args[0][0]
+    assert pipeline[2:4] == [{"$skip": 20}, {"$limit": 10}]
+    
+    with pytest.raises(ValueError, match="Invalid date_from"):
+        load_price_columns("AAPL", date_from="01/02/2020")
+
+def test_load_price_panel():
+    """Tickers are aligned on the union of their dates, with NaN where a bar is missing"""
+    documents = create_mock_mongodb_data("AAPL") + create_mock_mongodb_data("MSFT")[5:]
+    
+    mock_collection = MagicMock()
+    mock_collection.aggregate.return_value = group_mock_documents(documents, fields=("close",))
+    mock_collection.find_one.return_value = {"date": datetime(2020, 2, 19)}
+    
+    with patch('app.stock_analysis_tools.data_utils.get_collection', return_value=mock_collection):
+        dates, tickers, panel = load_price_panel(["msft", "AAPL", "NVDA"], lookback_days=48)
+    
+    # One query for all tickers, limited to the lookback window before the latest bar
+    assert mock_collection.aggregate.call_count == 1
+    match = mock_collection.aggregate.call_args[0][0][0]["$match"]
+    assert match["ticker"] == {"$in": ["MSFT", "AAPL", "NVDA"]}
+    assert match["date"]["$gte"] < datetime(2020, 1, 3)
+    
+    assert tickers == ["MSFT", "AAPL"]
+    assert panel.shape == (48, 2) and len(dates) == 48
+    assert np.isnan(panel[:3, 0]).all() and not np.isnan(panel[3:, 0]).any()
+    assert not np.isnan(panel[:, 1]).any()
+    
+    mock_collection.find_one.return_value = None
+    with patch('app.stock_analysis_tools.data_utils.get_collection', return_value=mock_collection):
+        dates, tickers, panel = load_price_panel(["ZZZ"], lookback_days=10)
+    assert tickers == [] and panel.size == 0
+
+def test_load_price_panels():
+    """Several fields share one query and one date alignment"""
+    documents = create_mock_mongodb_data("AAPL") + create_mock_mongodb_data("MSFT")[5:]
+    
+    mock_collection = MagicMock()
+    mock_collection.aggregate.return_value = group_mock_documents(documents, fields=("open", "close"))
+    
+    with patch('app.stock_analysis_tools.data_utils.get_collection', return_value=mock_collection):
+        dates, tickers, panels = load_price_panels(["AAPL", "MSFT"], fields=("open", "close"))
+    
+    assert mock_collection.aggregate.call_count == 1
+    assert tickers == ["AAPL", "MSFT"]
+    assert set(panels) == {"open", "close"}
+    assert panels["open"].shape == panels["close"].shape == (len(dates), 2)
+    assert np.array_equal(np.isnan(panels["open"]), np.isnan(panels["close"]))
+    assert np.isnan(panels["close"][:5, 1]).all()
+
+def test_get_collection_checks_once():
+    """The shared client is reused and the collection check runs only once"""
+    mock_db = MagicMock()
+    mock_db.list_collection_names.return_value = ["prices"]
+    mock_client = MagicMock()
+    mock_client.__getitem__.return_value = mock_db
+    
+    data_utils._verified_collections.clear()
+    with patch('app.stock_analysis_tools.data_utils.get_mongo_client', return_value=mock_client):
+        for _ in range(5):
+            get_collection("market", "prices")
+    
+    assert mock_db.list_collection_names.call_count == 1
+    mock_client.close.assert_not_called()
+
 @patch('app.stock_analysis_tools.data_utils.get_ticker_data')
 @patch('app.stock_analysis_tools.data_utils.os.path.exists')
 @patch('builtins.open', new_callable=mock_open)
@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch
+
+# Set testing environment variable
+os.environ['TESTING'] = 'True'
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import executor
+
+
+def test_parse_endpoint_limits():
+    limits = executor.parse_endpoint_limits("hurst=2, price-distribution=1,bad,volatility=x")
+    assert limits == {"hurst": 2, "price-distribution": 1}
+    assert executor.parse_endpoint_limits("") == {}
+
+
+def test_run_blocking_uses_worker_thread():
+    main_thread = threading.get_ident()
+
+    async def run():
+        return await executor.run_blocking(threading.get_ident)
+
+    assert asyncio.run(run()) != main_thread
+
+
+def test_run_cpu_falls_back_to_threads():
+    async def run():
+        return await executor.run_cpu(sum, [1, 2, 3])
+
+    with patch.object(executor, 'ANALYSIS_PROCESS_WORKERS', 0):
+        assert asyncio.run(run()) == 6
+
+
+def test_blocking_call_does_not_stall_loop():
+    async def run():
+        started = time.perf_counter()
+        slow = asyncio.ensure_future(executor.run_blocking(time.sleep, 0.3))
+        await asyncio.sleep(0.01)
+        # The loop is still responsive while the blocking call runs
+        elapsed = time.perf_counter() - started
+        await slow
+        return elapsed
+
+    assert asyncio.run(run()) < 0.2
+
+
+def test_limit_concurrency_caps_handlers():
+    active = 0
+    peak = 0
+
+    @executor.limit_concurrency("test-endpoint")
+    async def handler(value):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return value
+
+    async def run():
+        return await asyncio.gather(*(handler(i) for i in range(6)))
+
+    with patch.dict(executor.ENDPOINT_LIMITS, {"test-endpoint": 2}):
+        assert asyncio.run(run()) == list(range(6))
+    assert peak == 2
+
+
+def test_limit_stream_holds_slot_until_body_finishes():
+    active = 0
+    peak = 0
+    closed = []
+
+    async def body(value):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        try:
+            for i in range(3):
+                await asyncio.sleep(0.01)
+                yield (value, i)
+        finally:
+            active -= 1
+            closed.append(value)
+
+    async def consume(value, stop_after=None):
+        items = []
+        stream = executor.limit_stream("test-stream", body(value))
+        async for item in stream:
+            items.append(item)
+            if len(items) == stop_after:
+                # A client disconnect closes the stream early
+                await stream.aclose()
+                break
+        return items
+
+    async def run():
+        return await asyncio.gather(*(consume(i, stop_after=1 if i == 0 else None) for i in range(4)))
+
+    with patch.dict(executor.ENDPOINT_LIMITS, {"test-stream": 1}):
+        results = asyncio.run(run())
+    assert peak == 1
+    assert results[0] == [(0, 0)] and results[1] == [(1, 0), (1, 1), (1, 2)]
+    assert sorted(closed) == [0, 1, 2, 3]
@@ -0,0 +1,126 @@
+import os
+import sys
+import pytest
+import pandas as pd
+import numpy as np
+from unittest.mock import patch
+
+# Set testing environment variable
+os.environ['TESTING'] = 'True'
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.stock_analysis_tools.frame_cache import PreparedFrameCache
+from app.stock_analysis_tools.data_utils import read_and_prepare_data
+
+
+def create_price_frame(start='2020-01-01', periods=120):
+    """Create a raw price frame like get_ticker_data returns"""
+    dates = pd.date_range(start=start, periods=periods, name='date')
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, periods)))
+    return pd.DataFrame({
+        'open': close,
+        'high': close * 1.01,
+        'low': close * 0.99,
+        'close': close,
+        'volume': np.arange(periods) + 1000
+    }, index=dates)
+
+
+def fake_get_ticker_data(raw):
+    """Return a get_ticker_data replacement that filters the raw frame by date"""
+    def loader(ticker, date_from=None, date_to=None, **kwargs):
+        df = raw
+        if date_from:
+            df = df[df.index >= pd.Timestamp(date_from)]
+        if date_to:
+            df = df[df.index <= pd.Timestamp(date_to)]
+        return df.copy()
+    return loader
+
+
+def test_exact_hit_returns_copy():
+    cache = PreparedFrameCache(max_entries=4, max_bytes=10 * 1024 * 1024)
+    df = create_price_frame()
+    cache.put('aapl', '2020-01-01', '2020-03-01', True, df)
+
+    cached = cache.get('AAPL', '2020-01-01', '2020-03-01', True)
+    assert cached is not None
+    pd.testing.assert_frame_equal(cached, df)
+
+    # Mutating the returned frame must not affect the cached entry
+    cached['close'] = 0
+    assert cache.get('AAPL', '2020-01-01', '2020-03-01', True)['close'].iloc[0] != 0
+    assert cache.stats()['hits'] == 2
+
+
+def test_calc_returns_is_part_of_key():
+    cache = PreparedFrameCache(max_entries=4, max_bytes=10 * 1024 * 1024)
+    cache.put('AAPL', None, None, True, create_price_frame())
+    assert cache.get('AAPL', None, None, False) is None
+    assert cache.stats()['misses'] == 1
+
+
+def test_subrange_matches_fresh_load():
+    raw = create_price_frame()
+    cache = PreparedFrameCache(max_entries=4, max_bytes=10 * 1024 * 1024)
+
+    with patch('app.stock_analysis_tools.data_utils.get_ticker_data', side_effect=fake_get_ticker_data(raw)), \
+         patch('app.stock_analysis_tools.data_utils.prepared_frame_cache', cache):
+        full = read_and_prepare_data('AAPL', '2020-01-01', '2020-04-29')
+        assert cache.stats()['entries'] == 1
+
+        sliced = read_and_prepare_data('AAPL', '2020-02-01', '2020-03-15')
+        assert cache.stats()['slice_hits'] == 1
+
+        # Compare against a fresh load of the same sub-range
+        cache.enabled = False
+        fresh = read_and_prepare_data('AAPL', '2020-02-01', '2020-03-15')
+
+    assert len(full) == 119
+    pd.testing.assert_frame_equal(sliced, fresh)
+
+
+def test_short_slice_is_a_miss():
+    cache = PreparedFrameCache(max_entries=4, max_bytes=10 * 1024 * 1024)
+    cache.put('AAPL', None, None, True, create_price_frame())
+    assert cache.get('AAPL', '2020-02-01', '2020-02-05', True) is None
+    assert cache.get('AAPL', '2020-02-01', '2020-03-01', True) is not None
+
+
+def test_lru_eviction_and_memory_cap():
+    df = create_price_frame()
+    size = int(df.memory_usage(index=True).sum())
+
+    cache = PreparedFrameCache(max_entries=2, max_bytes=10 * 1024 * 1024)
+    cache.put('AAPL', None, None, True, df)
+    cache.put('MSFT', None, None, True, df)
+    cache.get('AAPL')
+    cache.put('TSLA', None, None, True, df)
+    assert cache.stats()['tickers'] == ['AAPL', 'TSLA']
+    assert cache.stats()['evictions'] == 1
+
+    cache = PreparedFrameCache(max_entries=10, max_bytes=size * 2)
+    for ticker in ['AAPL', 'MSFT', 'TSLA']:
+        cache.put(ticker, None, None, True, df)
+    assert cache.stats()['entries'] == 2
+    assert cache.stats()['bytes'] <= size * 2
+
+
+def test_invalidate_drops_ticker_entries():
+    cache = PreparedFrameCache(max_entries=8, max_bytes=10 * 1024 * 1024)
+    df = create_price_frame()
+    cache.put('AAPL', None, None, True, df)
+    cache.put('AAPL', '2020-01-01', '2020-03-01', False, df)
+    cache.put('MSFT', None, None, True, df)
+
+    assert cache.invalidate('aapl') == 2
+    assert cache.get('AAPL') is None
+    assert cache.get('MSFT') is not None
+    assert cache.stats()['invalidations'] == 2
+
+
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])
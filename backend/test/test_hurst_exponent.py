@@ -15,6 +15,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.stock_analysis_tools.hurst_exponent import (
     calculate_hurst_exponent,
     calculate_rs,
+    rescaled_range,
+    hurst_rs_analysis,
     interpret_hurst,
     calculate_hurst_by_window,
     analyze_hurst_exponent
@@ -85,6 +87,35 @@ def test_calculate_rs():
     rs_nan = calculate_rs(data_with_nan, 5)
     assert np.isnan(rs_nan), "R/S for data with NaN should be NaN"
 
+def test_rescaled_range_averages_chunks():
+    """The vectorized R/S should average the per-chunk values"""
+    rng = np.random.default_rng(3)
+    returns = rng.normal(0, 0.01, 103)
+    lags = [4, 10, 25]
+    
+    rs_values = rescaled_range(returns, lags)
+    
+    for lag, rs in zip(lags, rs_values):
+        chunk_rs = []
+        for start in range(0, len(returns) - lag + 1, lag):
+            chunk = returns[start:start + lag]
+            cumsum = np.cumsum(chunk - chunk.mean())
+            chunk_rs.append((cumsum.max() - cumsum.min()) / chunk.std())
+        assert rs == pytest.approx(np.mean(chunk_rs))
+
+def test_hurst_confidence_interval():
+    """The confidence interval should bracket the estimate"""
+    rng = np.random.default_rng(11)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 5000)))
+    
+    result = hurst_rs_analysis(prices)
+    h, (low, high) = calculate_hurst_exponent(prices, return_ci=True)
+    
+    assert h == pytest.approx(result["hurst"])
+    assert low < h < high
+    assert result["stderr"] > 0
+    assert 0.4 < h < 0.65, f"Expected H near 0.5 for a random walk, got {h}"
+
 def test_interpret_hurst():
     """Test the Hurst exponent interpretation function"""
     # Test trending interpretation
@@ -150,6 +181,45 @@ def test_calculate_hurst_by_window():
     indices_small, hurst_values_small = calculate_hurst_by_window(small_data, window_size=5, step=2)
     assert len(indices_small) >= 0, "Should handle small data gracefully"
 
+def test_rolling_hurst_matches_single_windows():
+    """Shared chunk statistics should give the per-window estimates"""
+    rng = np.random.default_rng(5)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 400)))
+    
+    indices, hurst_values = calculate_hurst_by_window(prices, window_size=150, step=1)
+    
+    assert indices == list(range(149, 400))
+    expected = [calculate_hurst_exponent(prices[i - 149:i + 1]) for i in indices]
+    np.testing.assert_allclose(hurst_values, expected)
+
+def test_rolling_hurst_executor_blocks():
+    """Splitting windows across an executor should not change the result"""
+    from concurrent.futures import ThreadPoolExecutor
+    rng = np.random.default_rng(9)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 600)))
+    
+    serial = calculate_hurst_by_window(prices, window_size=120, step=1)
+    with patch('app.stock_analysis_tools.hurst_exponent.ROLLING_PARALLEL_MIN_WINDOWS', 100), \
+         ThreadPoolExecutor(max_workers=2) as executor:
+        parallel = calculate_hurst_by_window(prices, window_size=120, step=1, executor=executor)
+    
+    assert parallel[0] == serial[0]
+    np.testing.assert_allclose(parallel[1], serial[1])
+
+def test_rolling_hurst_confidence_intervals():
+    """Rolling intervals should match hurst_rs_analysis on each window"""
+    rng = np.random.default_rng(7)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 300)))
+    
+    indices, hurst_values, ci_low, ci_high = calculate_hurst_by_window(
+        prices, window_size=150, step=10, return_ci=True, confidence=0.9
+    )
+    
+    results = [hurst_rs_analysis(prices[i - 149:i + 1], confidence=0.9) for i in indices]
+    np.testing.assert_allclose(hurst_values, [r["hurst"] for r in results])
+    np.testing.assert_allclose(ci_low, [r["ci_low"] for r in results])
+    np.testing.assert_allclose(ci_high, [r["ci_high"] for r in results])
+
 @pytest.mark.parametrize("ticker", ["AAPL", "MSFT"])
 @patch('app.stock_analysis_tools.hurst_exponent.read_and_prepare_data')
 def test_analyze_hurst_exponent(mock_read_data, ticker):
@@ -184,6 +254,13 @@ def test_analyze_hurst_exponent(mock_read_data, ticker):
     )
     assert df is not None, "Should return a DataFrame with date range"
     assert hurst is not None, "Should return a Hurst value with date range"
+    
+    # Test with the confidence interval
+    df, hurst, (ci_low, ci_high) = analyze_hurst_exponent(ticker, window_size=100, step=50, return_ci=True)
+    assert ci_low < hurst < ci_high
+    
+    # The headline estimate uses close prices, like the rolling windows
+    assert hurst == calculate_hurst_exponent(prices)
 
 @patch('app.stock_analysis_tools.hurst_exponent.read_and_prepare_data')
 def test_analyze_hurst_exponent_error_handling(mock_read_data):
@@ -204,6 +281,8 @@ if __name__ == "__main__":
     # Run tests directly
     test_calculate_hurst_exponent()
     test_calculate_rs()
+    test_rescaled_range_averages_chunks()
+    test_hurst_confidence_interval()
     test_interpret_hurst()
     test_calculate_hurst_by_window()
     print("All tests passed!") 
\ No newline at end of file
@@ -16,7 +16,10 @@ from app.stock_analysis_tools.next_day_stats import (
     calculate_returns,
     filter_moves,
     report_stats,
-    analyze_next_day_stats
+    analyze_next_day_stats,
+    MoveStats,
+    forward_returns,
+    next_day_stats_grid
 )
 
 # Create sample data for testing
@@ -229,6 +232,79 @@ def test_analyze_next_day_stats(mock_read_data):
     assert up_error is None
     assert down_error is None
 
+def test_move_stats():
+    """MoveStats should summarise and serialise a group of moves"""
+    df = pd.DataFrame({
+        'date': pd.date_range(start='2020-01-01', periods=4),
+        'Pct_Change': [0.12, 0.11, 0.15, 0.13],
+        'Forward_Return': [0.05, -0.03, 0.02, np.nan]
+    })
+    stats = MoveStats(df, "Test Moves", 10)
+    
+    result = stats.to_dict()
+    assert result["count"] == 3
+    assert result["mean"] == pytest.approx(0.04 / 3)
+    assert result["median"] == pytest.approx(0.02)
+    assert result["data"][0]["date"] == "2020-01-01"
+    assert "data" not in stats.to_dict(include_data=False)
+    
+    # The summary is only computed once
+    assert stats.summary is stats.summary
+
+@patch('app.stock_analysis_tools.next_day_stats.read_and_prepare_data')
+def test_analyze_next_day_stats_report_flag(mock_read_data, capsys):
+    """Row tables should only be printed when a report is requested"""
+    mock_read_data.return_value = create_test_data()
+    
+    analyze_next_day_stats("AAPL", 0.10, 10)
+    assert "Return Stats" not in capsys.readouterr().out
+    
+    analyze_next_day_stats("AAPL", 0.10, 10, report=True)
+    assert "Next-10-Day Return Stats:" in capsys.readouterr().out
+
+def test_forward_returns():
+    """Forward returns should be NaN past the end of the data"""
+    close = np.array([100.0, 110.0, 121.0, 133.1])
+    returns = forward_returns(close, [1, 2, 5])
+    np.testing.assert_allclose(returns[:3, 0], 0.1)
+    np.testing.assert_allclose(returns[:2, 1], 0.21)
+    assert np.isnan(returns[3, 0]) and np.isnan(returns[2:, 1]).all()
+    assert np.isnan(returns[:, 2]).all()
+
+def test_next_day_stats_grid_matches_single_threshold():
+    """Each grid cell should match calculate_returns + filter_moves for that pair"""
+    df = create_test_data()
+    thresholds = [0.03, 0.10]
+    horizons = [1, 5, 10]
+    
+    cells = next_day_stats_grid(df['close'].values, thresholds, horizons)
+    assert len(cells) == 2 * len(thresholds) * len(horizons)
+    
+    for cell in cells:
+        single = calculate_returns(df.reset_index(), 'close', cell["horizon"])
+        up, down = filter_moves(single, cell["threshold"])
+        moves = up if cell["direction"] == "up" else down
+        desc = moves["Forward_Return"].describe(percentiles=[0.25, 0.5, 0.75])
+        
+        assert cell["count"] == int(desc["count"])
+        assert cell["mean"] == pytest.approx(desc["mean"])
+        assert cell["std"] == pytest.approx(desc["std"])
+        assert cell["min"] == pytest.approx(desc["min"])
+        assert cell["max"] == pytest.approx(desc["max"])
+        assert cell["percentiles"]["p25"] == pytest.approx(desc["25%"])
+        assert cell["percentiles"]["p50"] == pytest.approx(desc["50%"])
+        assert cell["win_rate"] == pytest.approx((moves["Forward_Return"] > 0).mean())
+
+def test_next_day_stats_grid_empty_cells():
+    """Thresholds without moves should give empty cells"""
+    close = 100 + np.arange(30) * 0.01
+    cells = next_day_stats_grid(close, [0.5], [1], movement="up")
+    assert cells == [{
+        "direction": "up", "threshold": 0.5, "horizon": 1, "count": 0,
+        "mean": None, "std": None, "min": None, "max": None, "win_rate": None,
+        "percentiles": {"p5": None, "p25": None, "p50": None, "p75": None, "p95": None}
+    }]
+
 if __name__ == "__main__":
     # Run tests directly
     test_calculate_returns()
@@ -0,0 +1,106 @@
+import os
+import sys
+import gzip
+import asyncio
+import pytest
+import numpy as np
+
+# Set testing environment variable
+os.environ['TESTING'] = 'True'
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.packed_columns import (
+    PACKED_MEDIA_TYPE,
+    negotiate_format,
+    negotiate_compression,
+    pack_columns,
+    unpack_columns,
+    compress_chunks,
+    packed_response
+)
+
+
+def create_columns(n=1000):
+    """load_price_columns-style columns for one ticker"""
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    close[n // 2] = np.nan
+    return {
+        "date": np.arange(n).astype("datetime64[D]").astype("datetime64[ms]"),
+        "open": close * 0.99,
+        "high": close * 1.01,
+        "low": close * 0.98,
+        "close": close,
+        "volume": rng.integers(1000, 100000, n)
+    }
+
+
+def test_round_trip():
+    columns = create_columns()
+    body = b"".join(pack_columns(columns, {"ticker": "AAPL"}, chunk_bytes=1000))
+    header, decoded = unpack_columns(body)
+
+    assert header["ticker"] == "AAPL" and header["rows"] == 1000
+    assert [c["name"] for c in header["columns"]] == list(columns)
+    assert (8 + len(body) - 8 * 6 * 1000) % 8 == 0
+    assert decoded["date"].dtype == np.int64
+    assert np.array_equal(decoded["date"], columns["date"].astype(np.int64))
+    assert np.array_equal(decoded["close"], columns["close"], equal_nan=True)
+    assert np.array_equal(decoded["volume"], columns["volume"])
+    # About 8 bytes per value instead of a JSON object per bar
+    assert len(body) < 6 * 8 * 1000 + 512
+
+
+def test_empty_and_mismatched_columns():
+    header, decoded = unpack_columns(b"".join(pack_columns({"date": np.array([], dtype="datetime64[ms]")})))
+    assert header["rows"] == 0 and len(decoded["date"]) == 0
+
+    with pytest.raises(ValueError):
+        list(pack_columns({"date": np.arange(3), "close": np.arange(4.0)}))
+    with pytest.raises(ValueError):
+        unpack_columns(b"{}")
+
+
+def test_negotiation():
+    assert negotiate_format() == "json"
+    assert negotiate_format(accept=f"{PACKED_MEDIA_TYPE}, application/json;q=0.5") == "packed"
+    assert negotiate_format("json", accept=PACKED_MEDIA_TYPE) == "json"
+    with pytest.raises(ValueError):
+        negotiate_format("csv")
+
+    assert negotiate_compression(accept_encoding="gzip, deflate, br") == "gzip"
+    assert negotiate_compression(accept_encoding="br") is None
+    assert negotiate_compression("none", accept_encoding="gzip") is None
+    with pytest.raises(ValueError):
+        negotiate_compression("brotli")
+
+
+def test_gzip_stream():
+    columns = create_columns()
+    chunks = list(compress_chunks(pack_columns(columns, chunk_bytes=1000), "gzip"))
+    assert len(chunks) > 1
+    assert gzip.decompress(b"".join(chunks)) == b"".join(pack_columns(columns))
+
+
+def test_packed_response():
+    response = packed_response(create_columns(10), {"ticker": "AAPL"}, "gzip")
+    assert response.media_type == PACKED_MEDIA_TYPE
+    assert response.headers["content-encoding"] == "gzip"
+
+    async def read_body():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    header, decoded = unpack_columns(gzip.decompress(asyncio.run(read_body())))
+    assert header["rows"] == 10 and len(decoded["close"]) == 10
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    test_round_trip()
+    test_empty_and_mismatched_columns()
+    test_negotiation()
+    test_gzip_stream()
+    test_packed_response()
+    print("All packed columns tests passed!")
@@ -14,8 +14,17 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.stock_analysis_tools.probability_distribution import (
     load_prices_from_db,
     compute_distribution,
-    get_price_distribution_data
+    get_price_distribution_data,
+    gbm_parameters,
+    standard_normals,
+    simulate_gbm_paths,
+    touch_probabilities,
+    bootstrap_indices,
+    bootstrap_horizon_quantiles,
+    historical_log_returns
 )
+from app.stock_analysis_tools.kde import fft_kde, evaluate_kde
+from scipy.stats import gaussian_kde
 
 def create_mock_price_data():
     """Create realistic price data for testing"""
@@ -212,6 +221,125 @@ def test_edge_cases():
     x_neg_kde, y_neg_kde = compute_distribution(neg_prices, method="kde", grid_size=50, bw_method=1.0)
     assert len(x_neg_kde) > 0, "KDE should work with negative prices"
 
+def test_fft_kde_matches_gaussian_kde():
+    rng = np.random.default_rng(7)
+    samples = np.concatenate([rng.normal(0, 1, 3000), rng.normal(4, 0.5, 1000)])
+    xs = np.linspace(samples.min(), samples.max(), 400)
+    
+    for bw_method in (None, "silverman", 0.15):
+        exact = gaussian_kde(samples, bw_method=bw_method)(xs)
+        fast = fft_kde(samples, xs, bw_method)
+        assert np.max(np.abs(fast - exact)) < 1e-3 * exact.max()
+
+def test_compute_distribution_kde_methods_agree():
+    prices = create_mock_price_data()
+    x_fft, y_fft = compute_distribution(prices, method="kde", grid_size=200, kde_method="fft")
+    x_exact, y_exact = compute_distribution(prices, method="kde", grid_size=200, kde_method="exact")
+    
+    assert np.allclose(x_fft, x_exact)
+    assert np.max(np.abs(np.array(y_fft) - np.array(y_exact))) < 1e-3 * max(y_exact)
+    
+    with pytest.raises(ValueError):
+        evaluate_kde(prices, x_fft, kde_method="bogus")
+
+def test_analytic_matches_monte_carlo():
+    prices = create_mock_price_data()
+    x, y = compute_distribution(prices, method="analytic", horizon_days=20, grid_size=300)
+    
+    # The analytic density integrates to ~100% over its grid
+    assert abs(np.trapezoid(y, x) - 100) < 0.1
+    
+    # Sobol Monte Carlo end prices have the lognormal mean
+    drift, volatility = gbm_parameters(prices)
+    expected_mean = prices[-1] * np.exp(drift * 20 + 0.5 * volatility**2 * 20)
+    paths = simulate_gbm_paths(prices[-1], drift, volatility, 1, n_sims=4096, sampler="sobol", seed=1)
+    one_step = prices[-1] * np.exp(drift * 20 + volatility * np.sqrt(20) * standard_normals(4096, 1, "sobol", 1)[:, 0])
+    assert abs(one_step.mean() / expected_mean - 1) < 1e-3
+    assert paths.shape == (4096, 2)
+    
+    x_mc, y_mc = compute_distribution(prices, method="mc_kde", n_sims=4096, horizon_days=20,
+                                      grid_size=300, bw_method=None, sampler="sobol", seed=1)
+    assert abs(x_mc[np.argmax(y_mc)] / x[np.argmax(y)] - 1) < 0.01
+
+def test_samplers_are_reproducible():
+    for sampler in ("pseudo", "antithetic", "sobol"):
+        a = standard_normals(1000, 5, sampler, seed=3)
+        b = standard_normals(1000, 5, sampler, seed=3)
+        assert a.shape == (1000, 5)
+        assert np.array_equal(a, b)
+    
+    antithetic = standard_normals(1000, 1, "antithetic", seed=3)
+    assert abs(antithetic.mean()) < 1e-12
+    
+    with pytest.raises(ValueError):
+        standard_normals(10, 1, "bogus")
+
+def test_touch_probabilities():
+    paths = np.array([
+        [100, 105, 98, 101],
+        [100, 99, 96, 97],
+        [100, 102, 104, 110],
+        [100, 100, 100, 100],
+    ], dtype=float)
+    result = touch_probabilities(paths, [104, 97])
+    
+    assert result[0] == {"level": 104.0, "direction": "up", "touch": 0.5, "finish": 0.25}
+    assert result[1] == {"level": 97.0, "direction": "down", "touch": 0.25, "finish": 0.25}
+    
+    # Touch probability from simulated paths is never below the finish probability
+    prices = create_mock_price_data()
+    drift, volatility = gbm_parameters(prices)
+    sims = simulate_gbm_paths(prices[-1], drift, volatility, 30, n_sims=2000, seed=5)
+    assert sims.shape == (2000, 31)
+    for row in touch_probabilities(sims, [prices[-1] * 1.05, prices[-1] * 0.95]):
+        assert row["touch"] >= row["finish"] > 0
+
+def test_bootstrap_indices_are_contiguous_blocks():
+    indices = bootstrap_indices(50, horizon_days=12, n_sims=200, block_size=5, seed=0)
+    assert indices.shape == (200, 12)
+    assert indices.min() >= 0 and indices.max() < 50
+    
+    # Within each block of 5 the indices advance by one day
+    steps = np.diff(indices, axis=1)
+    assert np.all(steps[:, [0, 1, 2, 3, 5, 6, 7, 8, 10]] == 1)
+    
+    with pytest.raises(ValueError):
+        bootstrap_indices(50, horizon_days=0, n_sims=10)
+
+def test_bootstrap_distribution_and_quantiles():
+    prices = create_mock_price_data()
+    log_returns = historical_log_returns(prices)
+    assert np.allclose(log_returns, np.diff(np.log(prices)))
+    
+    x, y = compute_distribution(prices, method="bootstrap", n_sims=2000, horizon_days=10, grid_size=100, seed=1)
+    assert len(x) == len(y) == 100
+    assert np.all(y >= 0)
+    
+    quantiles = bootstrap_horizon_quantiles(prices, [21, 5, 5], n_sims=2000, seed=1)
+    assert [row["horizon"] for row in quantiles] == [5, 21]
+    for row in quantiles:
+        values = [row["percentiles"][key] for key in ("p5", "p25", "p50", "p75", "p95")]
+        assert values == sorted(values)
+        assert 0 <= row["prob_up"] <= 1
+    # Longer horizons spread further
+    assert (quantiles[1]["percentiles"]["p95"] - quantiles[1]["percentiles"]["p5"] >
+            quantiles[0]["percentiles"]["p95"] - quantiles[0]["percentiles"]["p5"])
+    
+    # A one-day, one-day-block bootstrap only produces historical one-day moves
+    one_day = bootstrap_horizon_quantiles(prices, [1], n_sims=500, block_size=1, seed=2,
+                                          percentiles=(0, 100))[0]["percentiles"]
+    assert one_day["p0"] >= prices[-1] * np.exp(log_returns.min()) - 1e-9
+    assert one_day["p100"] <= prices[-1] * np.exp(log_returns.max()) + 1e-9
+
+@patch('app.stock_analysis_tools.probability_distribution.load_log_returns_from_db')
+def test_get_price_distribution_data_bootstrap(mock_load_returns):
+    prices = create_mock_price_data()
+    mock_load_returns.return_value = (prices, historical_log_returns(prices))
+    
+    result = get_price_distribution_data("AAPL", method="bootstrap", n_sims=500, horizons=[5, 21], seed=3)
+    assert len(result["distribution"]["x"]) == 500
+    assert [row["horizon"] for row in result["horizon_quantiles"]] == [5, 21]
+
 if __name__ == "__main__":
     # Run tests directly
     test_load_prices_from_db()
@@ -220,4 +348,12 @@ if __name__ == "__main__":
     test_compute_distribution_monte_carlo()
     test_get_price_distribution_data()
     test_edge_cases()
+    test_fft_kde_matches_gaussian_kde()
+    test_compute_distribution_kde_methods_agree()
+    test_analytic_matches_monte_carlo()
+    test_samplers_are_reproducible()
+    test_touch_probabilities()
+    test_bootstrap_indices_are_contiguous_blocks()
+    test_bootstrap_distribution_and_quantiles()
+    test_get_price_distribution_data_bootstrap()
     print("All probability distribution tests passed!") 
\ No newline at end of file
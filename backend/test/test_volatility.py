@@ -14,7 +14,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.stock_analysis_tools.volatility import (
     calculate_returns,
     calculate_statistics,
-    analyze_volatility
+    analyze_volatility,
+    returns_density,
+    rolling_mean,
+    ewma_variance,
+    realized_volatility,
+    volatility_suite
 )
 
 # Create sample data for testing
@@ -144,9 +149,91 @@ def test_annualized_volatility():
     # Check that the annualization factor works as expected
     assert abs(annualized_vol / daily_std - (252 ** 0.5)) < 1e-10, "Annualization formula should be correct"
 
+def test_returns_density():
+    np.random.seed(42)
+    returns = pd.Series(np.random.normal(0, 0.02, 500))
+    
+    density = returns_density(returns, bandwidth=0.15, grid_size=200)
+    assert len(density["x"]) == len(density["y"]) == 200
+    assert density["x"][0] == returns.min() and density["x"][-1] == returns.max()
+    # The density integrates to roughly one over the sample range
+    assert abs(np.trapezoid(density["y"], density["x"]) - 1) < 0.05
+    
+    assert returns_density(pd.Series([0.01])) is None, "A single return has no density"
+
+def create_ohlc_data(n=300, seed=1):
+    """Random OHLC bars with consistent highs and lows"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+    open_ = np.concatenate([[100], close[:-1]]) * np.exp(rng.normal(0, 0.005, n))
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, 0.007, n)))
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, 0.007, n)))
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close})
+
+def test_rolling_mean_handles_gaps():
+    values = np.arange(10, dtype=float)
+    values[5] = np.nan
+    result = rolling_mean(values, 3)
+    assert np.isnan(result[:2]).all()
+    assert result[2] == 1.0 and result[4] == 3.0
+    assert np.isnan(result[5:8]).all(), "Windows containing the gap are NaN"
+    assert result[8] == 7.0
+
+def test_realized_volatility_matches_direct_formulas():
+    df = create_ohlc_data()
+    o, h, l, c = (df[col].values for col in ("open", "high", "low", "close"))
+    vol = realized_volatility(c, o, h, l, windows=(21,))["windows"][21]
+    
+    log_returns = pd.Series(np.log(c)).diff()
+    expected_cc = log_returns.rolling(21).std() * np.sqrt(252)
+    assert np.allclose(vol["close_to_close"], expected_cc, equal_nan=True)
+    
+    # Check the range estimators at one bar against their textbook formulas
+    end = 250
+    w = slice(end - 20, end + 1)
+    hl, co = np.log(h[w] / l[w]), np.log(c[w] / o[w])
+    parkinson = np.sqrt(np.mean(hl ** 2) / (4 * np.log(2)) * 252)
+    garman_klass = np.sqrt(np.mean(0.5 * hl ** 2 - (2 * np.log(2) - 1) * co ** 2) * 252)
+    rs_terms = np.log(h[w] / c[w]) * np.log(h[w] / o[w]) + np.log(l[w] / c[w]) * np.log(l[w] / o[w])
+    rogers_satchell = np.sqrt(np.mean(rs_terms) * 252)
+    overnight = np.log(o[w] / c[end - 21:end])
+    k = 0.34 / (1.34 + 22 / 20)
+    yang_zhang = np.sqrt((np.var(overnight, ddof=1) + k * np.var(co, ddof=1) + (1 - k) * np.mean(rs_terms)) * 252)
+    
+    assert np.isclose(vol["parkinson"][end], parkinson)
+    assert np.isclose(vol["garman_klass"][end], garman_klass)
+    assert np.isclose(vol["rogers_satchell"][end], rogers_satchell)
+    assert np.isclose(vol["yang_zhang"][end], yang_zhang)
+
+def test_ewma_variance_recursion():
+    returns = np.array([np.nan, 0.01, -0.02, 0.015, 0.0])
+    result = ewma_variance(returns, 0.9)
+    expected = [np.nan, 0.01 ** 2]
+    for r in returns[2:]:
+        expected.append(0.9 * expected[-1] + 0.1 * r ** 2)
+    assert np.allclose(result, expected, equal_nan=True)
+
+def test_volatility_suite():
+    df = create_ohlc_data()
+    suite = volatility_suite(df, windows=(10, 21))
+    assert set(suite["latest"]) == {"10", "21", "ewma"}
+    assert set(suite["latest"]["21"]) == {"close_to_close", "parkinson", "garman_klass", "rogers_satchell", "yang_zhang"}
+    assert len(suite["series"]["10"]["parkinson"]) == len(df)
+    assert suite["series"]["10"]["parkinson"][0] is None
+    
+    # Close-only data still gets close-to-close and EWMA
+    close_only = volatility_suite(df[["close"]].rename(columns={"close": "Close"}), windows=(21,), include_series=False)
+    assert set(close_only["latest"]["21"]) == {"close_to_close"}
+    assert "series" not in close_only
+
 if __name__ == "__main__":
     # Run tests directly
     test_calculate_returns()
     test_calculate_statistics()
     test_annualized_volatility()
+    test_returns_density()
+    test_rolling_mean_handles_gaps()
+    test_realized_volatility_matches_direct_formulas()
+    test_ewma_variance_recursion()
+    test_volatility_suite()
     print("All volatility tests passed!") 
\ No newline at end of file
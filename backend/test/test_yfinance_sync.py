@@ -5,6 +5,7 @@ import pytest
 import os
 from datetime import datetime, timedelta
 import pandas as pd
+import numpy as np
 from unittest.mock import patch, MagicMock, AsyncMock
 
 # Set testing environment variable
@@ -190,6 +191,156 @@ async def test_sync_ticker_data():
     # Basic assertion to ensure test passes
     assert result is not None, "Sync result should not be None"
 
+def make_bars(start, periods, close_offset=0.0):
+    """Create bars shaped like get_yfinance_data/get_mongodb_data output"""
+    dates = pd.date_range(start=start, periods=periods, freq='B')
+    close = [100.0 + i + close_offset for i in range(periods)]
+    return pd.DataFrame({
+        'date': dates.date,
+        'open': close,
+        'high': [c + 1 for c in close],
+        'low': [c - 1 for c in close],
+        'close': close,
+        'volume': [1000] * periods,
+        'ticker': 'AAPL'
+    })
+
+def test_find_changed_rows():
+    """Only new or revised bars are returned"""
+    mongo_df = make_bars('2024-01-01', 5)
+    yf_df = make_bars('2024-01-01', 7)
+    yf_df.loc[2, 'close'] += 0.5      # revision beyond the price tolerance
+    yf_df.loc[3, 'close'] += 0.001    # noise within tolerance
+    
+    changed = YFinanceSync.find_changed_rows(mongo_df, yf_df)
+    assert list(changed.index) == [2, 5, 6]
+    
+    assert YFinanceSync.find_changed_rows(pd.DataFrame(), yf_df).equals(yf_df)
+
+def test_incremental_sync_fetches_tail_only():
+    """A watermark limits the yfinance request to the tail plus the overlap"""
+    last_date = datetime.now() - timedelta(days=10)
+    state = {"_id": "AAPL", "first_date": datetime(2020, 1, 1), "last_date": last_date,
+             "checked_at": datetime.now() - timedelta(days=1)}
+    
+    yf_df = make_bars(last_date - timedelta(days=5), 8)
+    mongo_df = yf_df.iloc[:3].copy()
+    
+    with patch.object(YFinanceSync, 'get_sync_state', return_value=state), \
+         patch.object(YFinanceSync, 'save_sync_state') as save_state, \
+         patch.object(YFinanceSync, 'get_yfinance_data', new=AsyncMock(return_value=yf_df)) as get_yf, \
+         patch.object(YFinanceSync, 'get_mongodb_data', new=AsyncMock(return_value=mongo_df)), \
+         patch.object(YFinanceSync, 'update_mongodb', new=AsyncMock(return_value=True)) as update:
+        result = asyncio.run(YFinanceSync.sync_ticker_data("AAPL", "2021-01-01"))
+    
+    assert result["mode"] == "incremental"
+    fetch_start = get_yf.call_args.args[1]
+    assert fetch_start == (last_date.date() - timedelta(days=5)).isoformat()
+    
+    # Only the bars MongoDB does not have yet are written
+    written = update.call_args.args[1]
+    assert len(written) == len(yf_df) - 3
+    save_state.assert_called_once()
+    assert save_state.call_args.args[2] == max(yf_df['date'])
+
+def test_incremental_sync_skips_when_up_to_date():
+    """No yfinance request is made when the watermark covers the requested range"""
+    state = {"_id": "AAPL", "first_date": datetime(2020, 1, 1), "last_date": datetime(2024, 6, 28),
+             "checked_at": datetime(2024, 6, 29)}
+    
+    with patch.object(YFinanceSync, 'get_sync_state', return_value=state), \
+         patch.object(YFinanceSync, 'get_yfinance_data', new=AsyncMock()) as get_yf:
+        # 2024-06-30 is a Sunday, so the last business day is the watermark
+        result = asyncio.run(YFinanceSync.sync_ticker_data("AAPL", "2024-01-01", "2024-06-30"))
+    
+    assert result["mode"] == "skipped"
+    get_yf.assert_not_called()
+
+def test_sync_before_watermark_runs_full_sync():
+    """Requests starting before the synced range fall back to a full comparison"""
+    state = {"_id": "AAPL", "first_date": datetime(2023, 1, 3), "last_date": datetime(2024, 6, 28),
+             "checked_at": datetime(2024, 6, 29)}
+    
+    yf_df = make_bars('2020-01-01', 10)
+    
+    with patch.object(YFinanceSync, 'get_sync_state', return_value=state), \
+         patch.object(YFinanceSync, 'save_sync_state') as save_state, \
+         patch.object(YFinanceSync, 'get_yfinance_data', new=AsyncMock(return_value=yf_df)) as get_yf, \
+         patch.object(YFinanceSync, 'get_mongodb_data', new=AsyncMock(return_value=pd.DataFrame())), \
+         patch.object(YFinanceSync, 'update_mongodb', new=AsyncMock(return_value=True)) as update:
+        result = asyncio.run(YFinanceSync.sync_ticker_data("AAPL", "2020-01-01", "2021-01-01"))
+    
+    assert result["mode"] == "full"
+    # The whole requested range is fetched and written
+    assert get_yf.call_args.args[1:] == ("2020-01-01", "2021-01-01")
+    assert len(update.call_args.args[1]) == len(yf_df)
+    save_state.assert_called_once()
+
+def test_save_sync_state_only_widens_adjoining_ranges(mock_sync_state_db):
+    """A synced range that does not overlap or adjoin the watermark leaves it unchanged"""
+    collection = mock_sync_state_db.client["market"]["sync_state"]
+    state = {"_id": "AAPL", "first_date": datetime(2020, 1, 2), "last_date": datetime(2024, 6, 28)}
+    
+    def saved_update(first_date, last_date, synced_from=None, stored=state):
+        collection.find_one.return_value = stored
+        YFinanceSync.save_sync_state("AAPL", first_date, last_date, synced_from)
+        return collection.update_one.call_args.args[1]
+    
+    # No watermark yet: the range is stored as is
+    update = saved_update(datetime(2010, 1, 4).date(), datetime(2012, 12, 31).date(), stored=None)
+    assert update["$min"]["first_date"] == datetime(2010, 1, 4)
+    assert update["$max"]["last_date"] == datetime(2012, 12, 31)
+    
+    # An older disjoint full sync does not claim the years in between
+    update = saved_update(datetime(2010, 1, 4).date(), datetime(2012, 12, 31).date(), datetime(2010, 1, 1).date())
+    assert "$min" not in update and "$max" not in update
+    
+    # A recent window after a stale watermark leaves the gap for the next incremental sync
+    update = saved_update(datetime(2024, 11, 1).date(), datetime(2024, 11, 14).date())
+    assert "$max" not in update
+    
+    # Ranges that start within the overlap of the watermark extend it
+    update = saved_update(datetime(2024, 7, 1).date(), datetime(2024, 7, 12).date())
+    assert update["$max"]["last_date"] == datetime(2024, 7, 12)
+    update = saved_update(datetime(2018, 1, 2).date(), datetime(2020, 6, 30).date(), datetime(2018, 1, 1).date())
+    assert update["$min"] == {"first_date": datetime(2018, 1, 2), "synced_from": datetime(2018, 1, 1)}
+
+def test_build_price_documents():
+    """Ids, dates and typed columns are built as arrays"""
+    df = make_bars('2024-01-01', 3)
+    df.loc[1, 'volume'] = None
+    docs = YFinanceSync.build_price_documents(df, 'aapl')
+    
+    assert docs['_id'].tolist() == ['AAPL_2024-01-01', 'AAPL_2024-01-02', 'AAPL_2024-01-03']
+    assert docs['date'].tolist()[0] == datetime(2024, 1, 1)
+    assert docs['close'].dtype == np.float64
+    assert docs['volume'].tolist() == [1000, 0, 1000]
+    
+    # Without an explicit ticker the frame's ticker column is used
+    mixed = pd.concat([make_bars('2024-01-01', 1), make_bars('2024-01-01', 1).assign(ticker='AACT_U')])
+    assert YFinanceSync.build_price_documents(mixed)['_id'].tolist() == ['AAPL_2024-01-01', 'AACT_U_2024-01-01']
+
+def test_upsert_price_documents_skips_unchanged():
+    """Rows identical to the stored documents are not written"""
+    df = make_bars('2024-01-01', 5)
+    docs = YFinanceSync.build_price_documents(df, 'AAPL')
+    
+    stored = [{"_id": doc_id, "open": o, "high": h, "low": l, "close": c, "volume": v}
+              for doc_id, o, h, l, c, v in zip(docs['_id'].tolist(), docs['open'].tolist(), docs['high'].tolist(),
+                                               docs['low'].tolist(), docs['close'].tolist(), docs['volume'].tolist())]
+    stored[1]['close'] += 1.0   # revised bar
+    del stored[4]               # new bar
+    
+    collection = MagicMock()
+    collection.find.side_effect = lambda query, projection: [d for d in stored if d['_id'] in query['_id']['$in']]
+    
+    result = YFinanceSync.upsert_price_documents(collection, docs, batch_size=2)
+    
+    assert result == {"written": 2, "skipped": 3, "errors": {}}
+    assert collection.find.call_count == 3
+    written_ids = [op._filter['_id'] for call in collection.bulk_write.call_args_list for op in call.args[0]]
+    assert written_ids == ['AAPL_2024-01-02', 'AAPL_2024-01-05']
+
 # Allow running the test module directly
 if __name__ == "__main__":
     logger.info("Running yfinance sync tests")
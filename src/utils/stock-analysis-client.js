@@ -7,6 +7,29 @@
 import axios from 'axios';
 import { AuthService } from '../services/auth.js';
 
+const PACKED_MEDIA_TYPE = 'application/x-price-columns';
+
+/**
+ * Decode a packed price columns body (see backend/app/services/packed_columns.py)
+ * @param {ArrayBuffer} buffer - Response body
+ * @returns {Object} Header fields plus columns: { name: Float64Array | BigInt64Array }
+ */
+export function decodePriceColumns(buffer) {
+  const view = new DataView(buffer);
+  const magic = new TextDecoder().decode(new Uint8Array(buffer, 0, 4));
+  if (magic !== 'PCOL') throw new Error('Not a packed price columns body');
+  const headerLength = view.getUint32(4, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+  const columns = {};
+  let offset = 8 + headerLength;
+  for (const column of header.columns) {
+    const ArrayType = column.dtype === 'int64' ? BigInt64Array : Float64Array;
+    columns[column.name] = new ArrayType(buffer, offset, header.rows);
+    offset += header.rows * 8;
+  }
+  return { ...header, columns };
+}
+
 export const StockAnalysisClient = {
   /**
    * Get ticker data from the API
@@ -65,6 +88,32 @@ export const StockAnalysisClient = {
     }
   },
 
+  /**
+   * Get ticker price columns in the packed binary format (dates as epoch ms)
+   * @param {string} ticker - Stock ticker symbol
+   * @param {string} startDate - Optional start date in YYYY-MM-DD format
+   * @param {string} endDate - Optional end date in YYYY-MM-DD format
+   * @returns {Promise<Object>} Decoded header and typed-array columns
+   */
+  getTickerColumns: async (ticker, startDate = null, endDate = null) => {
+    try {
+      const params = {};
+      if (startDate) params.start_date = startDate;
+      if (endDate) params.end_date = endDate;
+      
+      // The browser decompresses the gzip Content-Encoding transparently
+      const response = await axios.get(`/api/stock-analysis/dataframe/${ticker}`, {
+        params,
+        headers: { Accept: PACKED_MEDIA_TYPE },
+        responseType: 'arraybuffer'
+      });
+      return decodePriceColumns(response.data);
+    } catch (error) {
+      console.error(`Error fetching price columns for ${ticker}:`, error);
+      throw error;
+    }
+  },
+
   /**
    * Get consecutive price movement analysis
    * @param {string} ticker - Stock ticker symbol